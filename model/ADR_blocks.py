@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+ADR_blocks.py
+NumPy models of the radar_core processing blocks
+window_multiplier, doppler_notch, magnitude_calc and os_cfar_2d as array
+operations. Integer inputs follow the RTL arithmetic (widths, rounding,
+saturation); float inputs take the same equations without quantization.
+"""
+
+import numpy as np
+
+from ADR_fixed import wrap, saturate, shift_right, abs_unsigned, float_to_fixed
+from ADR_kernels import cfar_rank
+
+# Generics used by radar_core (match VHDL)
+DATA_WIDTH = 16      # I/Q component width
+COEF_WIDTH = 16
+MAG_WIDTH = 17       # magnitude_calc OUT_WIDTH / os_cfar_2d DATA_WIDTH
+NOTCH_MODE = 2
+
+# Range rows per CFAR chunk (bounds the reference-cell copy)
+CFAR_CHUNK_ROWS = 64
+
+# =============================================================================
+# window_multiplier
+# =============================================================================
+
+def hamming_rom(n_samples, coef_width=COEF_WIDTH):
+    """Half-length Hamming ROM exactly as init_hamming_rom builds it."""
+    rom_size = n_samples // 2
+    full_scale = 2**(coef_width-1) - 1
+    i = np.arange(rom_size)
+    coef_real = 0.54 - 0.46 * np.cos(2.0 * np.pi * i / (n_samples - 1))
+    # VHDL integer(real) rounds to nearest, ties away from zero
+    coef = float_to_fixed(coef_real * full_scale, 0, coef_width + 1, rounding='half_away')
+    return np.clip(coef, 0, full_scale)
+
+def window_coefs(n_samples, coef_width=COEF_WIDTH, rom=None):
+    """Per-sample coefficients using the RTL's mirrored ROM addressing."""
+    if rom is None:
+        rom = hamming_rom(n_samples, coef_width)
+    rom_size = len(rom)
+    idx = np.arange(n_samples)
+    addr = np.where(idx < rom_size, idx, n_samples - 1 - idx)
+    return rom[np.minimum(addr, rom_size - 1)]
+
+def apply_window(x, coefs, coef_width=COEF_WIDTH, axis=-1, data_width=DATA_WIDTH,
+                 per_sample=False):
+    """Multiply a component array by window coefficients along axis.
+
+    Stage 3 of window_multiplier adds 2**(COEF_WIDTH-2) and keeps product
+    bits [HALF_W+COEF_WIDTH-2 : COEF_WIDTH-2], i.e. a Q14 extraction with a
+    net gain of 2 relative to Q15, before saturating to HALF_W bits
+    (data_width). Returns (y, saturated) for integer input, y for float
+    input; per_sample=True makes saturated a per-element mask.
+    """
+    shape = [1] * np.ndim(x)
+    shape[axis] = -1
+    c = np.asarray(coefs).reshape(shape)
+    if np.issubdtype(np.asarray(x).dtype, np.integer):
+        prod = x.astype(np.int64) * c
+        # RTL adds 2**(COEF_WIDTH-2) (a full output LSB, not half) before
+        # slicing; keep HALF_W+1 bits of the slice (two's complement wrap)
+        shifted = wrap(shift_right(prod + 2**(coef_width-2), coef_width-2), data_width+1)
+        y = saturate(shifted, data_width)
+        sat = y != shifted
+        y = y.astype(np.int16) if data_width <= 16 else y
+        return y, sat if per_sample else np.any(sat)
+    return x * (c / 2.0**(coef_width-2))
+
+# =============================================================================
+# doppler_notch
+# =============================================================================
+
+def mti_cancel(x, mode=NOTCH_MODE, axis=-1, return_saturated=False, data_width=DATA_WIDTH):
+    """2- or 3-pulse canceller along the slow-time axis (mode 0 = bypass).
+
+    Delay lines start at zero for every range line (they are cleared on
+    tlast). Integer input saturates to data_width-bit MIN_V/MAX_V like
+    the RTL.
+    return_saturated=True returns (y, saturated) as apply_window does.
+    """
+    if mode == 0:
+        return (x, False) if return_saturated else x
+    xs = np.moveaxis(np.asarray(x), axis, -1)
+    is_int = np.issubdtype(xs.dtype, np.integer)
+    acc = xs.astype(np.int64) if is_int else xs.copy()
+    d1 = np.zeros_like(acc)
+    d1[..., 1:] = acc[..., :-1]
+    if mode == 2:
+        y = acc - d1
+    else:
+        d2 = np.zeros_like(acc)
+        d2[..., 2:] = acc[..., :-2]
+        y = acc - 2 * d1 + d2
+    sat = False
+    if is_int:
+        ys = saturate(y, data_width)
+        sat = bool(np.any(ys != y))
+        y = ys.astype(xs.dtype)
+    y = np.moveaxis(y, -1, axis)
+    return (y, sat) if return_saturated else y
+
+# =============================================================================
+# magnitude_calc
+# =============================================================================
+
+def magnitude(i, q, out_width=MAG_WIDTH, data_width=DATA_WIDTH):
+    """Alpha-max-beta-min |Z| ~ max + min/4 + min/8.
+
+    Integer input is treated as data_width-bit two's complement; the
+    truncating shifts and the OUT_WIDTH-bit sum match magnitude_calc.
+    """
+    if np.issubdtype(np.asarray(i).dtype, np.integer):
+        ai = abs_unsigned(i, data_width)
+        aq = abs_unsigned(q, data_width)
+        mx = np.maximum(ai, aq)
+        mn = np.minimum(ai, aq)
+        return wrap(mx + shift_right(mn, 2) + shift_right(mn, 3), out_width, signed=False)
+    ai = np.abs(i)
+    aq = np.abs(q)
+    mn = np.minimum(ai, aq)
+    return np.maximum(ai, aq) + 0.375 * mn
+
+# =============================================================================
+# os_cfar_2d
+# =============================================================================
+
+def cfar_ref_mask(ref_range, ref_doppler, guard_range, guard_doppler):
+    """Boolean (WIN_RANGE, WIN_DOPPLER) mask of reference cells."""
+    win_r = 2*ref_range + 2*guard_range + 1
+    win_d = 2*ref_doppler + 2*guard_doppler + 1
+    r = np.abs(np.arange(win_r) - (ref_range + guard_range))[:, None]
+    d = np.abs(np.arange(win_d) - (ref_doppler + guard_doppler))[None, :]
+    return ~((r <= guard_range) & (d <= guard_doppler))
+
+def _box_sums(cs, r0, d0, h, w, n_range, n_doppler):
+    """h x w box sums at offset (r0, d0) from every window origin.
+
+    cs is the zero-prefixed 2D cumulative sum of the padded map.
+    """
+    r = slice(r0, r0 + n_range)
+    rh = slice(r0 + h, r0 + h + n_range)
+    d = slice(d0, d0 + n_doppler)
+    dw = slice(d0 + w, d0 + w + n_doppler)
+    return cs[:, rh, dw] - cs[:, r, dw] - cs[:, rh, d] + cs[:, r, d]
+
+def _low_rank_windows(padded, level, cells, mask, ref_range, ref_doppler,
+                      guard_range, guard_doppler, n_top):
+    """Cells whose ranked reference value may fall below level.
+
+    The ranked value is below level only if fewer than n_top reference
+    cells reach it. Counting the cells at or above the next power of two
+    (one integral image per octave, over the rows that need it) gives a
+    lower bound on that count, so every cell left True still needs
+    ranking; cells are only tested where cells is True.
+    """
+    n_doppler = level.shape[-1]
+    win_r = mask.shape[0]
+    low = np.zeros(level.shape, dtype=bool)
+    octave = np.full(level.shape, -1, dtype=np.int64)
+    test = cells & (level > 0)
+    octave[test] = np.ceil(np.log2(level[test])).astype(np.int64)
+    for e in np.flatnonzero(np.bincount(octave[test])):
+        sel = octave == e
+        b = np.flatnonzero(sel.any(axis=(1, 2)))
+        rows = np.flatnonzero(sel[b].any(axis=(0, 2)))
+        lo, hi = rows[0], rows[-1] + 1
+        part = padded[b, lo:hi + win_r - 1] >= (1 << int(e))
+        cs = np.zeros((len(b), part.shape[1] + 1, part.shape[2] + 1), dtype=np.int32)
+        np.cumsum(np.cumsum(part, axis=1, dtype=np.int32), axis=2, out=cs[:, 1:, 1:])
+        count = (_box_sums(cs, 0, 0, *mask.shape, hi - lo, n_doppler) -
+                 _box_sums(cs, ref_range, ref_doppler, 2*guard_range + 1,
+                           2*guard_doppler + 1, hi - lo, n_doppler))
+        sub = sel[b, lo:hi]
+        low[b, lo:hi] |= sub & (count < n_top)
+    return low
+
+def os_cfar_2d(mag, ref_range=4, ref_doppler=4, guard_range=2, guard_doppler=1,
+               rank_pct=75, scale_min=2, scale_max=6, scale_nom=4,
+               scale_override=0, prescreen=False, return_threshold=False, jit=None):
+    """2D OS-CFAR over the last two axes (..., range, doppler).
+
+    Reproduces the per-cell decision of os_cfar_2d: ranked reference value,
+    integer mean over N_REF cells, adaptive scale and CUT > threshold.
+    Doppler wraps (FFT bins are circular); range cells whose window runs
+    off the map never detect, like the RTL before window_valid. Returns the
+    CFAR output (CUT value where detected, else 0) and optionally the
+    threshold array.
+
+    prescreen=True ranks only cells that can detect: those whose CUT beats
+    the smallest threshold the nominal/high-clutter branches can produce
+    (both need a ranked value of at least mean>>1, so the floor is
+    (mean>>1) times the smaller of scale_nom and scale_max), plus cells
+    whose window could take the SCALE_MIN branch. The decisions are
+    exact; cells that are never ranked report the floor as threshold.
+
+    The rank selection runs in ADR_kernels: compiled when numba is
+    available (jit=None), the NumPy gather/partition when jit=False.
+    """
+    mag = np.asarray(mag)
+    mask = cfar_ref_mask(ref_range, ref_doppler, guard_range, guard_doppler)
+    n_ref = int(mask.sum())
+    rank_idx = min((n_ref * rank_pct) // 100, n_ref - 1)
+    pad_r = ref_range + guard_range
+    pad_d = ref_doppler + guard_doppler
+
+    n_range, n_doppler = mag.shape[-2:]
+    flat = mag.reshape((-1, n_range, n_doppler)).astype(np.int64)
+    # Magnitudes are MAG_WIDTH bits; int32 halves the gather/partition traffic
+    work = flat.astype(np.int32) if flat.max(initial=0) < 2**31 else flat
+    padded = np.pad(work, ((0, 0), (0, 0), (pad_d, pad_d)), mode='wrap')
+    padded = np.pad(padded, ((0, 0), (pad_r, pad_r), (0, 0)))
+
+    # Reference sum = full window box - guard box (integral image)
+    cs = np.zeros((padded.shape[0], padded.shape[1] + 1, padded.shape[2] + 1), dtype=np.int64)
+    np.cumsum(np.cumsum(padded, axis=1, dtype=np.int64), axis=2, out=cs[:, 1:, 1:])
+    ref_sum = (_box_sums(cs, 0, 0, *mask.shape, n_range, n_doppler) -
+               _box_sums(cs, ref_range, ref_doppler, 2*guard_range + 1,
+                         2*guard_doppler + 1, n_range, n_doppler))
+    mean = ref_sum // n_ref
+
+    valid = np.zeros(n_range, dtype=bool)
+    valid[pad_r:n_range - pad_r] = True
+    cand = np.broadcast_to(valid[:, None], flat.shape)
+    threshold = np.zeros_like(flat)
+    if prescreen and not scale_override:
+        floor = (mean >> 1) * min(scale_nom, scale_max)
+        low = _low_rank_windows(padded, mean >> 1, cand & (flat <= floor), mask,
+                                ref_range, ref_doppler, guard_range, guard_doppler,
+                                n_ref - rank_idx)
+        cand = cand & ((flat > floor) | low)
+        threshold[:] = floor
+
+    # Flat offsets of the reference cells relative to each window origin
+    width = padded.shape[2]
+    padded = padded.reshape(len(padded), -1)
+    wr, wd = np.nonzero(mask)
+    offsets = wr * width + wd
+
+    b, r, d = np.nonzero(cand)
+    ranked = cfar_rank(padded, b, r * width + d, offsets, rank_idx,
+                       chunk=CFAR_CHUNK_ROWS * n_doppler, jit=jit)
+    m = mean[b, r, d]
+    if scale_override:
+        scale = scale_override
+    else:
+        scale = np.where(ranked > m + (m >> 1), scale_max,
+                         np.where(ranked < (m >> 1), scale_min, scale_nom))
+    threshold[b, r, d] = ranked * scale
+
+    out = np.where(cand & (flat > threshold), flat, 0).reshape(mag.shape)
+    if return_threshold:
+        return out, threshold.reshape(mag.shape)
+    return out
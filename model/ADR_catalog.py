@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+ADR_catalog.py
+Indexed catalog of tactical simulation runs
+Ingests each xsim result folder once: detections (CSR by scan, as
+ADR_sparse) and track reports go to per-run .npy files, and the run's
+generics plus summary metrics (track continuity, fragmentation, GOSPA,
+detection load, ...) become one row of a columnar table with a sorted
+index per parameter. Cross-run questions such as continuity vs
+CFAR_REF_R are answered from those columns without reading the text
+dumps again.
+
+Layout of a catalog directory:
+  catalog.json         run list: id, folder, source file stamps, params, metrics
+  columns/<name>.npy   one float64 value per run (params and metrics)
+  index/<param>.npy    run order sorted by that parameter
+  runs/<id>/           tracks.npy, scan_counts.npy, dets/ (SparseDetections)
+"""
+
+import json
+import os
+import re
+import sys
+import time
+import hashlib
+import numpy as np
+from pathlib import Path
+
+from ADR_prefetch import TRACK_ROW_DTYPE, iter_track_chunks
+from ADR_sparse import SparseDetections
+from ADR_track_store import TrackStore
+from ADR_track_score import (scenario_truth, scenario_for_file, score_runs, phase_summary,
+                             track_labels)
+
+CATALOG_VERSION = 1
+DEFAULT_CATALOG = "ADR_catalog"
+
+# Result file names, preferred first
+DET_NAMES = ("tac_detections.txt", "ADR_detections.txt", "ADR_quick_det.txt")
+TRK_NAMES = ("tac_tracks.txt", "ADR_tracks.txt", "ADR_quick_trk.txt")
+
+# tb_tactical constants (match VHDL), full / QUICK_MODE
+TB_PARAMS = {
+    'N_RANGE': (1024, 128), 'N_DOPPLER': (128, 32), 'MAX_TRACKS': (32, 16),
+    'N_FIGHTERS': (6, 2), 'N_ATTACKERS': (4, 1), 'NUM_SCANS': (120, 5),
+    'CFAR_REF_R': (4, 2), 'CFAR_REF_D': (4, 2), 'CFAR_GRD_R': (2, 1), 'CFAR_GRD_D': (1, 1),
+}
+
+# Files that may carry generic overrides, and the xelab option that sets them
+PARAM_FILES = ("params.json", "run_params.json")
+ELAB_FILES = ("elaborate.sh", "elaborate.log", "xelab.log")
+_GENERIC_RE = re.compile(r'-?-generic_top\s+"?(\w+)=([^"\s]+)"?')
+
+# Summary metrics, one column each
+METRICS = ('n_scans', 'n_detections', 'dets_per_scan', 'n_track_ids', 'n_tracks',
+           'mean_track_len', 'mean_active', 'max_active', 'continuity', 'fragments',
+           'swaps', 'latency', 'gospa', 'gospa_notch', 'missed', 'false')
+
+def _stamp(path):
+    st = os.stat(path)
+    return dict(path=str(path), size=st.st_size, mtime=st.st_mtime)
+
+def _as_number(v):
+    if isinstance(v, bool):
+        return float(v)
+    if isinstance(v, str):
+        low = v.strip().lower()
+        if low in ('true', 'false'):
+            return float(low == 'true')
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return None
+
+def find_run_files(folder):
+    """(det_file, trk_file) in folder; either may be None."""
+    folder = Path(folder)
+    found = []
+    for names in (DET_NAMES, TRK_NAMES):
+        hits = [folder / n for n in names if (folder / n).exists()]
+        found.append(str(hits[0]) if hits else None)
+    return tuple(found)
+
+def find_runs(root):
+    """Every folder under root holding a track or detection dump."""
+    names = set(DET_NAMES + TRK_NAMES)
+    return sorted(dirpath for dirpath, _, files in os.walk(root) if names & set(files))
+
+def run_params(folder, quick=None):
+    """Generics of the run in folder.
+
+    params.json / run_params.json win, then -generic_top NAME=VALUE from
+    the elaboration script or log, then the tb_tactical constants of the
+    QUICK_MODE guessed from the file names.
+    """
+    folder = Path(folder)
+    params = {}
+    for name in ELAB_FILES:
+        f = folder / name
+        if f.exists():
+            params.update(_GENERIC_RE.findall(f.read_text(errors='replace')))
+    for name in PARAM_FILES:
+        f = folder / name
+        if f.exists():
+            params.update(json.loads(f.read_text()))
+    if 'QUICK_MODE' in params:
+        quick = bool(_as_number(params['QUICK_MODE']))
+    elif quick is None:
+        quick = any('quick' in str(f or '') for f in find_run_files(folder))
+    params['QUICK_MODE'] = int(quick)
+    for k, v in TB_PARAMS.items():
+        params.setdefault(k, v[1] if quick else v[0])
+    return {k: (_as_number(v) if _as_number(v) is not None else v) for k, v in params.items()}
+
+def summarize_run(dets, tracks, params, scenario='tactical'):
+    """METRICS for one run; NaN where a metric does not apply.
+
+    Truth scores use the scenario of the testbench that wrote the run
+    (ADR_track_score.scenario_for_file of its track file).
+    """
+    out = dict.fromkeys(METRICS, np.nan)
+    n_scans = max(tracks.n_scans, dets.n_scans)
+    out['n_scans'] = n_scans
+    out['n_detections'] = len(dets)
+    out['dets_per_scan'] = len(dets) / n_scans if n_scans else np.nan
+    if tracks.n_rows:
+        scan, ids = tracks.column('scan'), tracks.column('track_id')
+        labels = track_labels(scan, ids)
+        out['n_track_ids'] = len(np.unique(ids))
+        out['n_tracks'] = int(labels.max()) + 1
+        out['mean_track_len'] = tracks.n_rows / out['n_tracks']
+    else:
+        out['n_track_ids'] = out['n_tracks'] = 0
+    if tracks.scan_counts:
+        out['mean_active'] = float(np.mean(tracks.scan_counts))
+        out['max_active'] = float(np.max(tracks.scan_counts))
+
+    if tracks.n_scans:
+        truth = scenario_truth(bool(params.get('QUICK_MODE')),
+                               num_scans=min(tracks.n_scans, int(params['NUM_SCANS'])),
+                               scenario=scenario)
+        scans, truths, _ = score_runs([tracks], truth)
+        out['continuity'] = float(truths['coverage'].mean())
+        out['fragments'] = float(truths['fragments'].sum())
+        out['swaps'] = float(truths['swaps'].sum())
+        lat = truths['latency'][truths['latency'] >= 0]
+        out['latency'] = float(lat.mean()) if len(lat) else np.nan
+        out['gospa'] = float(scans['gospa'].mean())
+        out['missed'] = float(scans['missed'].mean())
+        out['false'] = float(scans['false'].mean())
+        notch = phase_summary(scans, truth).get('notch')
+        out['gospa_notch'] = notch['gospa'] if notch else np.nan
+    return out
+
+class RunCatalog:
+    """Columnar per-run table over a directory of ingested runs.
+
+    Rows follow catalog.json's run order. Columns and indexes are opened
+    memory-mapped on first use, so a query reads only what it touches.
+    """
+
+    def __init__(self, path=DEFAULT_CATALOG):
+        self.path = Path(path)
+        meta_path = self.path / 'catalog.json'
+        if meta_path.exists():
+            self.meta = json.loads(meta_path.read_text())
+            if self.meta.get('version') != CATALOG_VERSION:
+                raise ValueError(f"{meta_path}: catalog version {self.meta.get('version')}, "
+                                 f"expected {CATALOG_VERSION}")
+        else:
+            self.meta = dict(version=CATALOG_VERSION, runs=[])
+        self._cols = {}
+        self._by_folder = {r['folder']: i for i, r in enumerate(self.meta['runs'])}
+
+    # ---- ingest -------------------------------------------------------------
+
+    def _is_current(self, folder, det_file, trk_file):
+        i = self._by_folder.get(folder)
+        if i is None:
+            return False
+        old = self.meta['runs'][i]['files']
+        new = {k: _stamp(f) for k, f in (('det', det_file), ('trk', trk_file)) if f}
+        return old == new
+
+    def ingest(self, folder, params=None, force=False):
+        """Add or refresh one run folder; returns False when it was unchanged.
+
+        Call flush() after a batch of ingests to rewrite columns and indexes.
+        """
+        folder = str(Path(folder).resolve())
+        det_file, trk_file = find_run_files(folder)
+        if det_file is None and trk_file is None:
+            raise FileNotFoundError(f"no detection or track dump in {folder}")
+        if not force and self._is_current(folder, det_file, trk_file):
+            return False
+
+        p = run_params(folder)
+        p.update(params or {})
+        n_range, n_doppler = int(p['N_RANGE']), int(p['N_DOPPLER'])
+        dets = (SparseDetections.from_detection_file(det_file, n_range, n_doppler)
+                if det_file else SparseDetections(np.zeros(1, np.int64), [], [], [],
+                                                  n_range, n_doppler))
+        rows, counts = [], []
+        if trk_file:
+            for r, c in iter_track_chunks(trk_file):
+                rows.append(r)
+                counts += c
+        rows = np.concatenate(rows) if rows else np.zeros(0, dtype=TRACK_ROW_DTYPE)
+        tracks = TrackStore()
+        tracks.extend(rows)
+        tracks.scan_counts = counts
+
+        run_id = hashlib.sha1(folder.encode()).hexdigest()[:12]
+        run_dir = self.path / 'runs' / run_id
+        run_dir.mkdir(parents=True, exist_ok=True)
+        dets.save(run_dir / 'dets')
+        np.save(run_dir / 'tracks.npy', rows)
+        np.save(run_dir / 'scan_counts.npy', np.asarray(counts, dtype=np.int32))
+
+        rec = dict(id=run_id, folder=folder,
+                   files={k: _stamp(f) for k, f in (('det', det_file), ('trk', trk_file)) if f},
+                   params=p, metrics=summarize_run(dets, tracks, p, scenario_for_file(trk_file)))
+        i = self._by_folder.get(folder)
+        if i is None:
+            self._by_folder[folder] = len(self.meta['runs'])
+            self.meta['runs'].append(rec)
+        else:
+            self.meta['runs'][i] = rec
+        return True
+
+    def ingest_tree(self, root, force=False, progress=True):
+        """Ingest every run folder under root; returns the number (re)ingested."""
+        folders = find_runs(root)
+        done = 0
+        for k, folder in enumerate(folders):
+            done += self.ingest(folder, force=force)
+            if progress:
+                print(f"\r  {k + 1}/{len(folders)} folders, {done} ingested", end='', flush=True)
+        if progress:
+            print()
+        self.flush()
+        return done
+
+    def flush(self):
+        """Rewrite catalog.json, the columns and the per-parameter indexes."""
+        runs = self.meta['runs']
+        (self.path / 'columns').mkdir(parents=True, exist_ok=True)
+        (self.path / 'index').mkdir(parents=True, exist_ok=True)
+        params = sorted({k for r in runs for k, v in r['params'].items()
+                         if isinstance(v, (int, float))})
+        for name in params:
+            col = np.array([r['params'].get(name, np.nan) for r in runs], dtype=np.float64)
+            col = np.where([isinstance(r['params'].get(name), (int, float)) for r in runs],
+                           col, np.nan)
+            np.save(self.path / 'columns' / f'{name}.npy', col)
+            np.save(self.path / 'index' / f'{name}.npy', np.argsort(col, kind='stable'))
+        for name in METRICS:
+            col = np.array([r['metrics'].get(name, np.nan) for r in runs], dtype=np.float64)
+            np.save(self.path / 'columns' / f'{name}.npy', col)
+        self.meta['params'] = params
+        self.meta['metrics'] = list(METRICS)
+        (self.path / 'catalog.json').write_text(json.dumps(self.meta, indent=1))
+        self._cols = {}
+
+    # ---- queries ------------------------------------------------------------
+
+    def __len__(self):
+        return len(self.meta['runs'])
+
+    @property
+    def params(self):
+        return self.meta.get('params', [])
+
+    def column(self, name):
+        """float64 value of name for every run (memory-mapped)."""
+        if name not in self._cols:
+            f = self.path / 'columns' / f'{name}.npy'
+            if not f.exists():
+                raise KeyError(f"no column {name!r}; have {self.params + list(METRICS)}")
+            self._cols[name] = np.load(f, mmap_mode='r')
+        return self._cols[name]
+
+    def _sorted(self, param):
+        key = ('index', param)
+        if key not in self._cols:
+            self._cols[key] = np.load(self.path / 'index' / f'{param}.npy', mmap_mode='r')
+        order = self._cols[key]
+        return order, np.asarray(self.column(param))[order]
+
+    def select(self, **where):
+        """Run rows whose parameters equal the given values (index lookups)."""
+        rows = None
+        for param, value in where.items():
+            order, vals = self._sorted(param)
+            lo = np.searchsorted(vals, value, side='left')
+            hi = np.searchsorted(vals, value, side='right')
+            hit = np.sort(order[lo:hi])
+            rows = hit if rows is None else np.intersect1d(rows, hit)
+        return np.arange(len(self)) if rows is None else rows
+
+    def group(self, metric, by, **where):
+        """metric aggregated per value of parameter by, over the selected runs.
+
+        Returns a structured array (value, runs, mean, min, max); NaN
+        metrics are left out of the statistics.
+        """
+        rows = self.select(**where)
+        order, _ = self._sorted(by)
+        order = order[np.isin(order, rows)]
+        keys = np.asarray(self.column(by))[order]
+        vals = np.asarray(self.column(metric))[order]
+        uniq, start = np.unique(keys, return_index=True)
+        out = np.zeros(len(uniq), dtype=[('value', np.float64), ('runs', np.int32),
+                                         ('mean', np.float64), ('min', np.float64),
+                                         ('max', np.float64)])
+        for k, (lo, hi) in enumerate(zip(start, np.r_[start[1:], len(keys)])):
+            v = vals[lo:hi][~np.isnan(vals[lo:hi])]
+            out[k] = (uniq[k], hi - lo, v.mean() if len(v) else np.nan,
+                      v.min() if len(v) else np.nan, v.max() if len(v) else np.nan)
+        return out
+
+    def run(self, row):
+        return self.meta['runs'][row]
+
+    def tracks(self, row):
+        """TrackStore of one run from its stored columns."""
+        d = self.path / 'runs' / self.run(row)['id']
+        store = TrackStore()
+        store.extend(np.load(d / 'tracks.npy'))
+        store.scan_counts = np.load(d / 'scan_counts.npy').tolist()
+        return store
+
+    def detections(self, row):
+        """SparseDetections of one run (memory-mapped)."""
+        return SparseDetections.load(self.path / 'runs' / self.run(row)['id'] / 'dets')
+
+def _where(opts):
+    """--where=NAME=VALUE[,NAME=VALUE] -> {NAME: float}."""
+    pairs = [w.split('=', 1) for w in opts.get('where', '').split(',') if w]
+    return {k: float(v) for k, v in pairs}
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    opts = dict(a[2:].split('=', 1) if '=' in a else (a[2:], '1')
+                for a in sys.argv[1:] if a.startswith('--'))
+    cmd = args[0] if args else 'list'
+    cat = RunCatalog(opts.get('catalog', DEFAULT_CATALOG))
+
+    if cmd == 'ingest':
+        root = args[1] if len(args) > 1 else "."
+        t0 = time.perf_counter()
+        n = cat.ingest_tree(root, force='force' in opts)
+        print(f"Ingested {n} runs in {time.perf_counter() - t0:.1f} s; "
+              f"catalog holds {len(cat)} runs ({cat.path})")
+    elif cmd == 'query':
+        metric = args[1] if len(args) > 1 else 'continuity'
+        by = opts.get('by', 'CFAR_REF_R')
+        t0 = time.perf_counter()
+        res = cat.group(metric, by, **_where(opts))
+        dt = time.perf_counter() - t0
+        print(f"\n{metric} by {by} ({len(cat)} runs, {1e3 * dt:.1f} ms)")
+        print(f"{by:>12} {'runs':>5} {'mean':>9} {'min':>9} {'max':>9}")
+        for r in res:
+            print(f"{r['value']:12g} {r['runs']:5d} {r['mean']:9.3f} {r['min']:9.3f} {r['max']:9.3f}")
+    elif cmd == 'list':
+        rows = cat.select(**_where(opts))
+        print(f"{len(rows)} of {len(cat)} runs in {cat.path}")
+        for i in rows:
+            r = cat.run(i)
+            m = r['metrics']
+            print(f"{r['id']} {r['folder']}  scans={m['n_scans']:.0f} "
+                  f"tracks={m['n_tracks']:.0f} continuity={m['continuity']:.2f} "
+                  f"GOSPA={m['gospa']:.2f}")
+    else:
+        print("usage: ADR_catalog.py ingest <root> | query <metric> --by=PARAM "
+              "[--where=P=V,...] | list [--where=...]  [--catalog=DIR]")
+
+if __name__ == "__main__":
+    main()
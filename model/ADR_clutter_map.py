@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+ADR_clutter_map.py
+Recursive clutter map for Air Defense Radar range-Doppler cells
+Keeps an exponentially averaged background per (range, doppler) cell,
+updated once per scan, and uses it as an adaptive threshold next to
+OS-CFAR so slow movers and weather that leak through the MTI notch are
+suppressed scan-to-scan
+"""
+
+import json
+import numpy as np
+from pathlib import Path
+
+from ADR_blocks import MAG_WIDTH
+
+# uint16 storage LSB for MAG_WIDTH-bit magnitudes
+UINT16_LSB = 2**(MAG_WIDTH - 16)
+
+# Parameters of a new map; reopening takes the stored ones
+DEFAULTS = dict(n_range=1024, n_doppler=128, alpha_shift=3, dtype='float32', scale=4.0)
+
+def _ewma_int(cur, target, k):
+    """cur + (target - cur) / 2**k with a rounded shift.
+
+    A truncating >>k stalls up to 2**k - 1 LSB below a rising target (but
+    reaches a falling one), biasing the map low; rounding leaves a dead
+    band of half that, centred on the target.
+    """
+    return cur + ((target - cur + ((1 << k) >> 1)) >> k)
+
+class ClutterMap:
+    """Memory-mapped per-cell clutter background.
+
+    background <- background + (mag - background) * 2**-alpha_shift
+
+    The power-of-two gain keeps the update a shift-and-add, so the uint16
+    store can be mirrored in RTL. Storage lives in <path> with the map
+    parameters and scan count in <path>.json; reopening a map resumes where
+    it stopped. Parameters left as None take the stored values (DEFAULTS for
+    a new map); any that are given must match a stored map.
+    """
+
+    def __init__(self, path, n_range=None, n_doppler=None, alpha_shift=None,
+                 dtype=None, scale=None):
+        self.path = Path(path)
+        self.meta_path = self.path.with_suffix(self.path.suffix + '.json')
+        params = dict(n_range=n_range, n_doppler=n_doppler, alpha_shift=alpha_shift,
+                      dtype=None if dtype is None else str(np.dtype(dtype)), scale=scale)
+
+        if self.path.exists() and self.meta_path.exists():
+            meta = json.loads(self.meta_path.read_text())
+            mode = 'r+'
+            diff = {k: (meta[k], v) for k, v in params.items()
+                    if v is not None and meta[k] != v}
+            if diff:
+                raise ValueError(f"{self.path}: existing clutter map has different "
+                                 + ", ".join(f"{k}={old!r} (asked for {new!r})"
+                                             for k, (old, new) in diff.items()))
+        else:
+            meta = {k: DEFAULTS[k] if v is None else v for k, v in params.items()}
+            meta['dtype'] = str(np.dtype(meta['dtype']))
+            meta['scans'] = 0
+            mode = 'w+'
+        if meta['dtype'] not in ('float32', 'uint16'):
+            raise ValueError(f"unsupported clutter map dtype {meta['dtype']}")
+
+        self.meta = meta
+        self.map = np.memmap(self.path, dtype=meta['dtype'], mode=mode,
+                             shape=(meta['n_range'], meta['n_doppler']))
+        self._save_meta()
+
+    @property
+    def scans(self):
+        return self.meta['scans']
+
+    def _save_meta(self):
+        self.meta_path.write_text(json.dumps(self.meta, indent=2))
+
+    def background(self):
+        """Background level in magnitude units (float32 view)."""
+        if self.map.dtype == np.uint16:
+            return self.map.astype(np.float32) * UINT16_LSB
+        return np.asarray(self.map)
+
+    def update(self, mag, censor=None):
+        """Fold one scan's dense (range, doppler) magnitudes into the map.
+
+        Cells flagged in censor (e.g. confirmed detections) keep their
+        previous background so targets do not raise their own threshold.
+        """
+        k = self.meta['alpha_shift']
+        first = self.meta['scans'] == 0
+        if self.map.dtype == np.uint16:
+            target = np.asarray(mag, dtype=np.int64) // UINT16_LSB
+            cur = self.map.astype(np.int64)
+            new = target if first else _ewma_int(cur, target, k)
+        else:
+            target = np.asarray(mag, dtype=np.float32)
+            new = target if first else self.map + (target - self.map) * np.float32(2.0**-k)
+        if censor is not None:
+            new = np.where(censor, self.map, new)
+        self._store(new)
+
+    def update_sparse(self, ranges, dopplers, mags):
+        """Fold one scan of sparse detections (absent cells count as zero).
+
+        Works directly on CFAR output, giving a hit-density map of where
+        the detector keeps firing scan after scan. Like update(), the first
+        scan initialises the map. Detections outside the map are skipped.
+        """
+        k = self.meta['alpha_shift']
+        first = self.meta['scans'] == 0
+        r, d = np.asarray(ranges, dtype=np.int64), np.asarray(dopplers, dtype=np.int64)
+        inside = self._in_map(r, d)
+        cells = (r[inside], d[inside])
+        mags = np.asarray(mags)[inside]
+        if self.map.dtype == np.uint16:
+            cur = self.map.astype(np.int64)
+            target = np.zeros_like(cur)
+            target[cells] = mags.astype(np.int64) // UINT16_LSB
+            new = target if first else _ewma_int(cur, target, k)
+        else:
+            target = np.zeros(self.map.shape, dtype=np.float32)
+            target[cells] = mags
+            new = target if first else self.map + (target - self.map) * np.float32(2.0**-k)
+        self._store(new)
+
+    def _in_map(self, ranges, dopplers):
+        """Mask of cells inside the map (negative indices would wrap)."""
+        n_range, n_doppler = self.map.shape
+        return (ranges >= 0) & (ranges < n_range) & (dopplers >= 0) & (dopplers < n_doppler)
+
+    def _store(self, new):
+        if self.map.dtype == np.uint16:
+            new = np.clip(new, 0, np.iinfo(np.uint16).max)
+        self.map[:] = new
+        self.meta['scans'] += 1
+        # The map is a shared mapping; keep the count beside it on every scan
+        self._save_meta()
+
+    def threshold(self, scale=None):
+        """Clutter-map threshold: scale x background."""
+        return self.background() * (self.meta['scale'] if scale is None else scale)
+
+    def apply(self, cfar_out, scale=None):
+        """Keep OS-CFAR hits that also clear the clutter-map threshold."""
+        cfar_out = np.asarray(cfar_out)
+        return np.where(cfar_out > self.threshold(scale), cfar_out, 0)
+
+    def apply_sparse(self, ranges, dopplers, mags, scale=None):
+        """Boolean keep-mask for sparse detections against the map.
+
+        Detections outside the map are not kept.
+        """
+        r, d = np.asarray(ranges, dtype=np.int64), np.asarray(dopplers, dtype=np.int64)
+        inside = self._in_map(r, d)
+        keep = np.zeros(len(r), dtype=bool)
+        thr = self.threshold(scale)[r[inside], d[inside]]
+        keep[inside] = np.asarray(mags)[inside] > thr
+        return keep
+
+    def flush(self):
+        self.map.flush()
+        self._save_meta()
+
+def main():
+    import sys
+    from ADR_visualize import N_RANGE, N_DOPPLER, N_RANGE_QUICK, N_DOPPLER_QUICK
+    from ADR_prefetch import load_detection_scans
+
+    det_file = sys.argv[1] if len(sys.argv) > 1 else "ADR_detections.txt"
+    map_file = sys.argv[2] if len(sys.argv) > 2 else "ADR_clutter_map.dat"
+
+    if not Path(det_file).exists():
+        print(f"No detections in {det_file}")
+        return
+    is_quick = "quick" in det_file
+    n_range = N_RANGE_QUICK if is_quick else N_RANGE
+    n_doppler = N_DOPPLER_QUICK if is_quick else N_DOPPLER
+    detections, scans, n_scans = load_detection_scans(det_file, n_doppler)
+    if len(detections) == 0:
+        print(f"No detections in {det_file}")
+        return
+
+    cmap = ClutterMap(map_file, n_range, n_doppler)
+    # Scans without detections still age the map
+    bounds = np.searchsorted(scans, np.arange(n_scans + 1))
+
+    print("\n=== CLUTTER MAP ===")
+    kept_total = 0
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        r, d, mag = detections[lo:hi].T
+        keep = cmap.apply_sparse(r, d, mag) if cmap.scans > 0 else np.ones(hi - lo, bool)
+        kept_total += int(keep.sum())
+        cmap.update_sparse(r, d, mag)
+    cmap.flush()
+
+    print(f"Scans folded: {cmap.scans}")
+    print(f"Detections kept: {kept_total} / {len(detections)}")
+    print(f"Saved: {map_file}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+ADR_datacube.py
+Multi-channel data cube engine for the antenna-array board revision
+Runs range FFT, Doppler FFT and angle FFT/beamformer over
+(channel x chirp x sample) cubes as batched array operations, then applies
+the radar_core magnitude and OS-CFAR stages per beam. Apart from the
+corner-turn buffer, every stage works on a block of chirps or a slab of
+range gates.
+"""
+
+import numpy as np
+from dataclasses import dataclass, field
+
+from ADR_blocks import (window_coefs, apply_window, mti_cancel, magnitude,
+                        os_cfar_2d, NOTCH_MODE)
+
+# Detection record layout (one row per CFAR hit)
+CUBE_DET_DTYPE = np.dtype([
+    ('beam', np.int32),
+    ('range', np.int32),
+    ('doppler', np.int32),
+    ('mag', np.int64),
+])
+
+@dataclass
+class CubeConfig:
+    n_channels: int = 8
+    n_chirps: int = 128              # N_DOPPLER
+    n_samples: int = 1024            # N_RANGE
+    n_beams: int = 0                 # 0 = one beam per channel
+    element_spacing: float = 0.5     # wavelengths
+    notch_mode: int = NOTCH_MODE     # 0 = bypass, 2/3 = pulse canceller
+    slab_ranges: int = 64            # range gates per Doppler/CFAR slab
+    fft_chirps: int = 16             # chirps per range-FFT block
+    cfar: dict = field(default_factory=dict)
+
+    @property
+    def beams(self):
+        return self.n_beams or self.n_channels
+
+    @property
+    def cfar_pad(self):
+        """Range rows of context OS-CFAR needs on each side of a slab."""
+        return self.cfar.get('ref_range', 4) + self.cfar.get('guard_range', 2)
+
+def angle_fft_matrix(n_channels, n_beams):
+    """Beamformer equivalent to a zero-padded, fftshifted angle FFT."""
+    k = np.arange(n_beams) - n_beams // 2
+    n = np.arange(n_channels)
+    return np.exp(-2j * np.pi * np.outer(k, n) / n_beams).astype(np.complex64)
+
+def beam_angles_deg(n_beams, element_spacing=0.5):
+    """Boresight angle of each angle-FFT beam (NaN where not visible)."""
+    k = np.arange(n_beams) - n_beams // 2
+    s = k / (n_beams * element_spacing)
+    with np.errstate(invalid='ignore'):
+        return np.degrees(np.where(np.abs(s) <= 1.0, np.arcsin(np.clip(s, -1, 1)), np.nan))
+
+def steering_matrix(angles_deg, n_channels, element_spacing=0.5, taper=None):
+    """Conventional beamformer weights for arbitrary look angles (ULA)."""
+    phase = 2 * np.pi * element_spacing * np.sin(np.radians(np.asarray(angles_deg)))
+    w = np.exp(-1j * np.outer(phase, np.arange(n_channels)))
+    if taper is not None:
+        w = w * np.asarray(taper)[None, :]
+    return w.astype(np.complex64)
+
+class DataCube:
+    """Range/Doppler/angle processing for one CPI of a multi-channel cube."""
+
+    def __init__(self, config: CubeConfig = None, beamformer=None):
+        self.cfg = config or CubeConfig()
+        cfg = self.cfg
+        self.range_win = window_coefs(cfg.n_samples)
+        self.doppler_win = window_coefs(cfg.n_chirps)
+        if beamformer is None:
+            beamformer = angle_fft_matrix(cfg.n_channels, cfg.beams)
+        self.beamformer = np.asarray(beamformer, dtype=np.complex64)
+        if self.beamformer.shape[1] != cfg.n_channels:
+            raise ValueError(f"beamformer expects {self.beamformer.shape[1]} channels, "
+                             f"cube has {cfg.n_channels}")
+
+    def range_fft(self, cube, out=None):
+        """Window + FFT along fast time, fft_chirps chirps at a time.
+
+        Results land in out, the (channel, chirp, range) complex64
+        corner-turn buffer (allocated when None); temporaries are one block.
+        """
+        cfg = self.cfg
+        if out is None:
+            out = np.empty(np.shape(cube), dtype=np.complex64)
+        for lo in range(0, cfg.n_chirps, cfg.fft_chirps):
+            hi = min(lo + cfg.fft_chirps, cfg.n_chirps)
+            x = apply_window(np.asarray(cube[:, lo:hi], dtype=np.complex64),
+                             self.range_win, axis=-1)
+            out[:, lo:hi] = np.fft.fft(x, axis=-1)
+        return out
+
+    def doppler_slab(self, rfft, lo, hi):
+        """MTI, Doppler window/FFT and beamforming for range gates [lo, hi).
+
+        Returns complex (beam, range, doppler) for the slab only.
+        """
+        x = rfft[:, :, lo:hi]                                   # (ch, chirp, rng)
+        x = mti_cancel(x, self.cfg.notch_mode, axis=1)
+        x = apply_window(x, self.doppler_win, axis=1)
+        x = np.fft.fft(x, axis=1).astype(np.complex64)          # natural order
+        # (beam, ch) @ (ch, chirp*rng) -> (beam, doppler, rng)
+        n_ch, n_dop, n_rng = x.shape
+        beams = self.beamformer @ x.reshape(n_ch, -1)
+        return beams.reshape(-1, n_dop, n_rng).transpose(0, 2, 1)
+
+    def magnitude_slabs(self, rfft):
+        """Yield (lo, hi, magnitude [beam, lo:hi, doppler]) slab by slab."""
+        cfg = self.cfg
+        for lo in range(0, cfg.n_samples, cfg.slab_ranges):
+            hi = min(lo + cfg.slab_ranges, cfg.n_samples)
+            b = self.doppler_slab(rfft, lo, hi)
+            yield lo, hi, magnitude(b.real, b.imag).astype(np.float32)
+
+    def process(self, cube, out=None, keep_mag=True):
+        """Full CPI: returns (magnitude cube [beam, range, doppler], detections).
+
+        Doppler, beamforming, magnitude and OS-CFAR run one range slab at a
+        time; CFAR sees cfar_pad rows of the neighbouring slabs on each side,
+        so its decisions match a whole-cube pass. With keep_mag=False the
+        magnitude cube is never assembled (None is returned in its place)
+        and only the corner-turn buffer scales with the CPI.
+        """
+        cfg = self.cfg
+        cube = np.asarray(cube)
+        if cube.shape != (cfg.n_channels, cfg.n_chirps, cfg.n_samples):
+            raise ValueError(f"expected cube of shape "
+                             f"{(cfg.n_channels, cfg.n_chirps, cfg.n_samples)}, got {cube.shape}")
+
+        rfft = self.range_fft(cube)
+        if keep_mag and out is None:
+            out = np.empty((cfg.beams, cfg.n_samples, cfg.n_chirps), dtype=np.float32)
+
+        pad = cfg.cfar_pad
+        n = cfg.n_samples
+        # Magnitude rows [buf_lo, buf_lo + len) still needed as CFAR context;
+        # rows below done are decided
+        buf, buf_lo, done = None, 0, 0
+        dets = []
+        for lo, hi, mag in self.magnitude_slabs(rfft):
+            if keep_mag:
+                out[:, lo:hi, :] = mag
+            buf = mag if buf is None else np.concatenate([buf, mag], axis=1)
+            end = n if hi == n else hi - pad
+            if end <= done:
+                continue
+            a = max(done - pad, buf_lo)
+            hits = os_cfar_2d(buf[:, a - buf_lo:min(end + pad, hi) - buf_lo], **cfg.cfar)
+            d = cube_detections(hits[:, done - a:end - a])
+            d['range'] += done
+            dets.append(d)
+            done = end
+            keep = max(done - pad, buf_lo)
+            buf, buf_lo = buf[:, keep - buf_lo:], keep
+        dets = np.concatenate(dets) if dets else np.zeros(0, dtype=CUBE_DET_DTYPE)
+        return out, dets[np.lexsort((dets['doppler'], dets['range'], dets['beam']))]
+
+def cube_detections(hits):
+    """Convert a (beam, range, doppler) CFAR output to CUBE_DET_DTYPE rows."""
+    idx = np.nonzero(hits)
+    dets = np.zeros(len(idx[0]), dtype=CUBE_DET_DTYPE)
+    dets['beam'], dets['range'], dets['doppler'] = idx
+    dets['mag'] = hits[idx]
+    return dets
+
+def iq_to_complex(i, q):
+    """Combine int16 I/Q component arrays into a complex64 cube."""
+    return np.asarray(i, dtype=np.float32) + 1j * np.asarray(q, dtype=np.float32)
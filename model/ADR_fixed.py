@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+ADR_fixed.py
+Vectorized numeric_std fixed-point arithmetic
+resize, shift_left/shift_right, saturation, rounding shifts, Q-format gain
+multiplies and packed I/Q words on whole NumPy integer arrays with explicit
+bit widths. Values are carried as int64 holding the integer a signed or
+unsigned vector of the given width represents.
+"""
+
+import numpy as np
+
+ROUNDING_MODES = ('truncate', 'half_up', 'half_even', 'half_away', 'toward_zero')
+
+def _as_int(x):
+    return np.asarray(x).astype(np.int64)
+
+def limits(width, signed=True):
+    """(min, max) representable in a width-bit vector."""
+    if signed:
+        return -2**(width-1), 2**(width-1) - 1
+    return 0, 2**width - 1
+
+def wrap(x, width, signed=True):
+    """Keep the low width bits (two's complement reinterpretation).
+
+    This is what slicing a vector or converting an overflowed sum back to
+    width bits does.
+    """
+    x = _as_int(x)
+    mask = (1 << width) - 1
+    u = x & mask
+    if signed:
+        return np.where(u >= 1 << (width - 1), u - (1 << width), u)
+    return u
+
+def resize(x, width, signed=True):
+    """numeric_std RESIZE.
+
+    Growing sign- or zero-extends (value unchanged). Shrinking UNSIGNED
+    keeps the low bits; shrinking SIGNED keeps the sign bit and the low
+    width-1 bits, which differs from wrap() when the value overflows.
+    """
+    x = _as_int(x)
+    if not signed:
+        return x & ((1 << width) - 1)
+    low = x & ((1 << (width - 1)) - 1)
+    return np.where(x < 0, low - (1 << (width - 1)), low)
+
+def saturate(x, width, signed=True):
+    """Clamp to the width-bit range (MIN_V/MAX_V style)."""
+    lo, hi = limits(width, signed)
+    return np.clip(_as_int(x), lo, hi)
+
+def to_signed(u, width):
+    """Reinterpret unsigned bit patterns as signed(width)."""
+    return wrap(u, width, signed=True)
+
+def to_unsigned(x, width):
+    """Reinterpret signed values as unsigned(width) bit patterns."""
+    return wrap(x, width, signed=False)
+
+def shift_left(x, n, width, signed=True):
+    """numeric_std shift_left: bits shifted past width are lost."""
+    return wrap(_as_int(x) << n, width, signed)
+
+def shift_right(x, n):
+    """numeric_std shift_right: arithmetic for signed, logical for unsigned.
+
+    Both are floor division by 2**n on the represented value.
+    """
+    return _as_int(x) >> n
+
+def round_shift(x, n, mode='truncate'):
+    """Divide by 2**n with the given rounding.
+
+    truncate     floor (plain shift_right)
+    half_up      add 2**(n-1) then shift (round half toward +inf)
+    half_even    convergent rounding (xfft 'convergent')
+    half_away    round half away from zero (VHDL integer(real))
+    toward_zero  drop fraction toward zero
+    """
+    x = _as_int(x)
+    if n <= 0:
+        return x << -n
+    if mode == 'truncate':
+        return x >> n
+    half = 1 << (n - 1)
+    if mode == 'half_up':
+        return (x + half) >> n
+    if mode == 'half_away':
+        return np.where(x >= 0, (x + half) >> n, -((-x + half) >> n))
+    if mode == 'toward_zero':
+        return np.where(x >= 0, x >> n, -((-x) >> n))
+    if mode == 'half_even':
+        q = x >> n
+        rem = x - (q << n)
+        up = (rem > half) | ((rem == half) & (q & 1 == 1))
+        return q + up
+    raise ValueError(f"rounding mode must be one of {ROUNDING_MODES}, got {mode!r}")
+
+def mul_gain(x, gain, frac_bits=8, width=None, signed=True, rounding='truncate'):
+    """x * gain >> frac_bits, e.g. tws_tracker's shift_right(innov * ALPHA_GAIN, 8).
+
+    With width set the result is resized to width bits like the RTL's
+    resize() around the product.
+    """
+    y = round_shift(_as_int(x) * int(gain), frac_bits, rounding)
+    return resize(y, width, signed) if width else y
+
+def abs_unsigned(x, width):
+    """|x| of signed(width) as unsigned(width); -2**(width-1) maps to 2**(width-1).
+
+    Matches `unsigned(-si)` when si is the most negative value.
+    """
+    x = wrap(x, width, signed=True)
+    return wrap(-x, width, signed=False) * (x < 0) + x * (x >= 0)
+
+def pack_iq(i, q, width=16):
+    """Pack I (low half) and Q (high half) into 2*width-bit unsigned words."""
+    return (to_unsigned(q, width) << width) | to_unsigned(i, width)
+
+def unpack_iq(words, width=16):
+    """Split 2*width-bit words into signed (I, Q)."""
+    w = _as_int(words)
+    return to_signed(w, width), to_signed(w >> width, width)
+
+def float_to_fixed(x, frac_bits, width, signed=True, rounding='half_away', sat=True):
+    """Quantize real values to width-bit integers with frac_bits fraction bits."""
+    scaled = np.asarray(x, dtype=np.float64) * 2.0**frac_bits
+    if rounding == 'half_away':
+        q = np.sign(scaled) * np.floor(np.abs(scaled) + 0.5)
+    elif rounding == 'half_even':
+        q = np.round(scaled)
+    elif rounding == 'half_up':
+        q = np.floor(scaled + 0.5)
+    elif rounding == 'toward_zero':
+        q = np.trunc(scaled)
+    elif rounding == 'truncate':
+        q = np.floor(scaled)
+    else:
+        raise ValueError(f"rounding mode must be one of {ROUNDING_MODES}, got {rounding!r}")
+    q = q.astype(np.int64)
+    return saturate(q, width, signed) if sat else wrap(q, width, signed)
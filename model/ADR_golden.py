@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+"""
+ADR_golden.py
+Golden test vectors for the per-block VHDL testbenches
+Builds compact stimulus / expected-response files for magnitude_calc,
+window_multiplier, doppler_notch, corner_turner, os_cfar_2d and
+tws_tracker from the bit-exact models, aimed at the corner cases
+(saturation, ROM fold, delay-line reset, bank reuse, guard-cell and
+Doppler-wrap edges, track coasting and table limits) instead of long
+random runs. Each generic set gets its own directory keyed by a hash of
+the generics, so vectors are only rebuilt when generics change.
+
+Files are plain integer columns, one beat per line, readable with textio
+read(L, int); 32-bit words are split into 16-bit halves so every value
+fits a VHDL integer. The first column is a case number; vectors.json
+names the cases and columns. rtl/src/tb_<block>_golden.vhd read them
+with textio (VECTOR_DIR generic), drive the block and report mismatches
+per case.
+"""
+
+import sys
+import json
+import hashlib
+import numpy as np
+from pathlib import Path
+
+from ADR_fixed import wrap, limits
+from ADR_blocks import window_coefs, apply_window, mti_cancel, magnitude, os_cfar_2d
+from ADR_window_sweep import window_rom
+from ADR_tws_tracker import TwsTracker
+
+# Bump when a generator changes so cached vectors are rebuilt
+GENERATOR_VERSION = 1
+DEFAULT_OUT = "golden"
+SEED = 2024
+
+# Generic sets the unit testbenches instantiate (match VHDL)
+TESTBENCHES = {
+    'tb_magnitude_calc': ('magnitude_calc', [
+        dict(DATA_WIDTH=16, OUT_WIDTH=17)]),
+    'tb_window_multiplier': ('window_multiplier', [
+        dict(DATA_WIDTH=32, N_SAMPLES=64, COEF_WIDTH=16)]),
+    'tb_doppler_notch': ('doppler_notch', [
+        dict(DATA_WIDTH=32, N_DOPPLER=32, NOTCH_MODE=2),
+        dict(DATA_WIDTH=32, N_DOPPLER=32, NOTCH_MODE=3)]),
+    'tb_corner_turner': ('corner_turner', [
+        dict(N_RANGE=16, N_DOPPLER=8, DATA_WIDTH=32)]),
+    'tb_os_cfar_2d': ('os_cfar_2d', [
+        dict(DATA_WIDTH=17, N_RANGE=64, N_DOPPLER=32, REF_RANGE=3, REF_DOPPLER=2,
+             GUARD_RANGE=1, GUARD_DOPPLER=1, RANK_PCT=75, SCALE_MIN=2, SCALE_MAX=6,
+             SCALE_NOM=4)]),
+    'tb_tws_tracker': ('tws_tracker', [
+        dict(MAX_TRACKS=16, N_RANGE=1024, N_DOPPLER=128, INIT_HITS=2, COAST_MAX=3,
+             ASSOC_GATE_R=10, ASSOC_GATE_D=5, ALPHA_GAIN=128, BETA_GAIN=64)]),
+}
+
+class Vectors:
+    """Stimulus and expected rows for one generic set, grouped by case."""
+
+    def __init__(self, stim_columns, exp_columns):
+        self.stim_columns = ('case',) + tuple(stim_columns)
+        self.exp_columns = ('case',) + tuple(exp_columns)
+        self.cases = []
+        self.stim = []
+        self.exp = []
+
+    def case(self, name):
+        self.cases.append(name)
+        return len(self.cases) - 1
+
+    def add(self, case, stim, exp):
+        """Append (N, len(stim_columns)) stimulus and expected rows."""
+        for rows, out in ((stim, self.stim), (exp, self.exp)):
+            rows = np.asarray(rows, dtype=np.int64)
+            if len(rows):
+                out.append(np.column_stack([np.full(len(rows), case), rows.reshape(len(rows), -1)]))
+
+    def arrays(self):
+        stim = np.concatenate(self.stim) if self.stim else np.zeros((0, len(self.stim_columns)))
+        exp = np.concatenate(self.exp) if self.exp else np.zeros((0, len(self.exp_columns)))
+        return stim.astype(np.int64), exp.astype(np.int64)
+
+def _split16(words, width):
+    """(lo, hi) 16-bit halves of width-bit unsigned words."""
+    w = wrap(words, width, signed=False)
+    return w & 0xFFFF, w >> 16
+
+def _last(n):
+    t = np.zeros(n, dtype=np.int64)
+    t[-1] = 1
+    return t
+
+# =============================================================================
+# magnitude_calc
+# =============================================================================
+
+def gen_magnitude_calc(g):
+    dw, ow = g['DATA_WIDTH'], g['OUT_WIDTH']
+    lo, hi = limits(dw)
+    v = Vectors(('i', 'q', 'last'), ('mag', 'last'))
+    cases = {
+        'axes': [(1000, 0), (0, 1000), (-1000, 0), (0, -1000)],
+        'diagonals': [(1000, 1000), (-1000, 1000), (-1000, -1000), (1000, -1000)],
+        'zero_and_lsb': [(0, 0), (1, 0), (0, 1), (1, 1), (-1, -1), (-1, 0)],
+        # min below 4 and 8 exercises the truncating shifts
+        'shift_truncation': [(100, m) for m in range(10)] + [(-100, -m) for m in range(1, 10)],
+        # abs(-2**(dw-1)) only fits as unsigned; sum needs the extra output bit
+        'full_scale': [(lo, lo), (lo, hi), (hi, lo), (hi, hi), (lo, 0), (0, lo), (hi, 0)],
+        # Largest relative/absolute errors from ADR_magnitude_sweep
+        'worst_error': [(64, 24), (24, -64), (1, 1), (lo, 13256 * hi // 32767), (hi, hi)],
+    }
+    rng = np.random.default_rng(SEED)
+    cases['random'] = [tuple(x) for x in rng.integers(lo, hi + 1, (16, 2))]
+
+    names = list(cases)
+    for k, name in enumerate(names):
+        c = v.case(name)
+        iq = np.array(cases[name], dtype=np.int64)
+        i, q = wrap(iq[:, 0], dw), wrap(iq[:, 1], dw)
+        mag = magnitude(i, q, out_width=ow, data_width=dw)
+        last = _last(len(i)) if k == len(names) - 1 else np.zeros(len(i), dtype=np.int64)
+        v.add(c, np.column_stack([i, q, last]), np.column_stack([mag, last]))
+    return v
+
+# =============================================================================
+# window_multiplier
+# =============================================================================
+
+def gen_window_multiplier(g):
+    hw = g['DATA_WIDTH'] // 2
+    n, cw = g['N_SAMPLES'], g['COEF_WIDTH']
+    lo, hi = limits(hw)
+    coefs = window_coefs(n, cw, rom=window_rom(n, cw, 'hamming'))
+    rom_size = n // 2
+    v = Vectors(('i', 'q', 'last'), ('i', 'q', 'saturated', 'last'))
+
+    def frame(i, q, length=n):
+        i = np.broadcast_to(np.asarray(i, dtype=np.int64), (length,))
+        q = np.broadcast_to(np.asarray(q, dtype=np.int64), (length,))
+        return i, q
+
+    impulse = np.zeros(n, dtype=np.int64)
+    impulse[[0, rom_size - 1, rom_size, n - 1]] = [10000, -10000, 5000, -5000]
+    alt = np.where(np.arange(n) % 2, lo, hi)
+    rng = np.random.default_rng(SEED)
+    frames = [
+        ('dc', *frame(16000, -16000)),
+        ('zero', *frame(0, 0)),
+        # Coefficients near 1.0 carry a net gain of 2: these saturate
+        ('full_scale_pos', *frame(hi, hi)),
+        ('full_scale_neg', *frame(lo, lo)),
+        ('alternating_full_scale', alt, -alt),
+        ('rom_fold_impulses', impulse, -impulse),
+        # Output LSBs: the stage adds a whole LSB before the slice
+        ('lsb_rounding', np.resize([1, -1, 2, -2, 3, -3], n), np.resize([-1, 1, -2, 2, 0, 0], n)),
+        # tlast early resets the sample counter, then a full frame follows
+        ('short_frame', *frame(12000, 12000, n // 4)),
+        ('after_short_frame', *frame(12000, 12000)),
+        ('random', rng.integers(lo, hi + 1, n), rng.integers(lo, hi + 1, n)),
+    ]
+    for name, i, q in frames:
+        c = v.case(name)
+        length = len(i)
+        wi, sat_i = apply_window(i, coefs[:length], cw, data_width=hw, per_sample=True)
+        wq, sat_q = apply_window(q, coefs[:length], cw, data_width=hw, per_sample=True)
+        last = _last(length)
+        v.add(c, np.column_stack([i, q, last]),
+              np.column_stack([wi, wq, sat_i | sat_q, last]))
+    return v
+
+# =============================================================================
+# doppler_notch
+# =============================================================================
+
+def _notch_line(x, bypass, mode, hw):
+    """One tlast-delimited line: delay lines start (and end) at zero."""
+    return np.where(bypass, x, mti_cancel(x, mode, data_width=hw))
+
+def gen_doppler_notch(g):
+    hw = g['DATA_WIDTH'] // 2
+    n, mode = g['N_DOPPLER'], g['NOTCH_MODE']
+    lo, hi = limits(hw)
+    v = Vectors(('i', 'q', 'last', 'bypass'), ('i', 'q', 'last'))
+    t = np.arange(n)
+    alt = np.where(t % 2, lo, hi)
+    ramp = (t * (hi // n)).astype(np.int64)
+    rng = np.random.default_rng(SEED)
+    half = (t >= n // 2).astype(np.int64)
+    lines = [
+        ('dc_clutter', np.full(n, 10000), np.full(n, -10000), 0),
+        # +-full scale every sample: differences overflow both ways
+        ('alternating_saturation', alt, -alt, 0),
+        ('step_extremes', np.where(t < n // 2, lo, hi), np.where(t < n // 2, hi, lo), 0),
+        ('ramp', ramp, -ramp, 0),
+        # Last sample of the previous line must not leak into this one
+        ('line_reset', np.full(n, hi), np.full(n, lo), 0),
+        ('line_reset_next', np.full(n, 5), np.full(n, -5), 0),
+        # Bypass passes input through; delay lines keep updating
+        ('bypass_second_half', alt // 2, ramp, half),
+        ('bypass_all', alt, -alt, 1),
+        ('random', rng.integers(lo, hi + 1, n), rng.integers(lo, hi + 1, n), 0),
+    ]
+    for name, i, q, bypass in lines:
+        c = v.case(name)
+        i, q = np.asarray(i, dtype=np.int64), np.asarray(q, dtype=np.int64)
+        bp = np.broadcast_to(np.asarray(bypass, dtype=np.int64), (n,)).astype(bool)
+        last = _last(n)
+        v.add(c, np.column_stack([i, q, last, bp]),
+              np.column_stack([_notch_line(i, bp, mode, hw), _notch_line(q, bp, mode, hw), last]))
+    return v
+
+# =============================================================================
+# corner_turner
+# =============================================================================
+
+def gen_corner_turner(g):
+    n_r, n_d, dw = g['N_RANGE'], g['N_DOPPLER'], g['DATA_WIDTH']
+    v = Vectors(('lo', 'hi', 'last'), ('lo', 'hi', 'last'))
+    banks = [np.zeros(n_r * n_d, dtype=np.int64), np.zeros(n_r * n_d, dtype=np.int64)]
+    chirp, sample = np.meshgrid(np.arange(n_d), np.arange(n_r), indexing='ij')
+    rng = np.random.default_rng(SEED)
+    extremes = np.resize(np.array([2**dw - 1, 2**(dw - 1), 0, 2**(dw - 1) - 1]), (n_d, n_r))
+    frames = [
+        ('index_pattern', (chirp << 16) | sample, None),
+        # Second bank: all-ones / sign-bit words
+        ('extremes', extremes, None),
+        # Bank 0 again with chirp 3 cut short: skipped cells keep frame 0 data
+        ('short_chirp', (chirp << 16) | (sample ^ 0x55), (3, n_r // 2)),
+        ('random', rng.integers(0, 2**min(dw, 62), (n_d, n_r)), None),
+    ]
+    for k, (name, data, short) in enumerate(frames):
+        c = v.case(name)
+        bank = banks[k % 2]
+        words, lasts = [], []
+        for ch in range(n_d):
+            length = short[1] if short and ch == short[0] else n_r
+            row = wrap(data[ch, :length], dw, signed=False)
+            bank[ch * n_r:ch * n_r + length] = row
+            words.append(row)
+            lasts.append(_last(length))
+        words, lasts = np.concatenate(words), np.concatenate(lasts)
+        # Read side: range-major, Doppler inner, tlast on the last Doppler bin
+        out = bank.reshape(n_d, n_r).T.ravel()
+        out_last = np.tile(_last(n_d), n_r)
+        v.add(c, np.column_stack([*_split16(words, dw), lasts]),
+              np.column_stack([*_split16(out, dw), out_last]))
+    return v
+
+# =============================================================================
+# os_cfar_2d
+# =============================================================================
+
+def gen_os_cfar_2d(g):
+    dw = g['DATA_WIDTH']
+    n_r, n_d = g['N_RANGE'], g['N_DOPPLER']
+    ref_r, ref_d = g['REF_RANGE'], g['REF_DOPPLER']
+    grd_r, grd_d = g['GUARD_RANGE'], g['GUARD_DOPPLER']
+    pad_r = ref_r + grd_r
+    full = 2**dw - 1
+    v = Vectors(('mag', 'last'), ('range', 'doppler', 'out', 'threshold'))
+
+    rng = np.random.default_rng(SEED)
+    mag = rng.integers(80, 121, (n_r, n_d)).astype(np.int64)
+    case = np.zeros((n_r, n_d), dtype=np.int64)
+    v.case('background')
+
+    def place(name, cells, value):
+        c = v.case(name)
+        for r, d in cells:
+            mag[r % n_r, d % n_d] = value
+            case[r % n_r, d % n_d] = c
+
+    mid_r = n_r // 2
+    # Quiet region with one large cell: ranked << mean -> SCALE_MIN branch
+    mag[mid_r - 6:mid_r + 7, 0:n_d // 4] = 10
+    place('low_clutter_min_scale', [(mid_r, n_d // 8 - ref_d)], 3000)
+    place('low_clutter_cut', [(mid_r, n_d // 8)], 400)
+    # Clutter ridge: ranked >> mean -> SCALE_MAX branch next to the edge
+    mag[:, n_d // 2] *= 30
+    place('clutter_edge_target', [(mid_r // 2, n_d // 2 + 1)], 9000)
+    place('isolated_target', [(mid_r + 8, 3 * n_d // 4)], 5000)
+    # Neighbour inside the guard ring is excluded from the reference set...
+    place('guard_inside', [(n_r // 4, 3 * n_d // 4), (n_r // 4 + grd_r, 3 * n_d // 4 + grd_d)], 5000)
+    # ...one cell further out it lands in the reference set
+    place('guard_outside', [(3 * n_r // 4, n_d // 4),
+                            (3 * n_r // 4 + grd_r + 1, n_d // 4 + grd_d + 1)], 5000)
+    # Reference window wraps from Doppler 0 to N_DOPPLER-1
+    place('doppler_wrap', [(mid_r + 14, 0), (mid_r + 14, n_d - 1 - grd_d)], 6000)
+    # Window not valid until pad_r range lines are in
+    place('range_edge_invalid', [(pad_r - 1, n_d // 3)], 5000)
+    place('range_edge_first', [(pad_r, 2 * n_d // 3)], 5000)
+    place('range_edge_last', [(n_r - pad_r - 1, n_d // 3)], 5000)
+    place('full_scale', [(mid_r - 14, 5 * n_d // 8)], full)
+
+    out, thr = os_cfar_2d(mag, ref_range=ref_r, ref_doppler=ref_d, guard_range=grd_r,
+                          guard_doppler=grd_d, rank_pct=g['RANK_PCT'],
+                          scale_min=g['SCALE_MIN'], scale_max=g['SCALE_MAX'],
+                          scale_nom=g['SCALE_NOM'], return_threshold=True)
+    r, d = np.meshgrid(np.arange(n_r), np.arange(n_d), indexing='ij')
+    last = (d == n_d - 1).astype(np.int64)
+    # Range-major stream order; dbg_threshold carries the low DATA_WIDTH bits
+    v.stim.append(np.column_stack([case.ravel(), mag.ravel(), last.ravel()]))
+    v.exp.append(np.column_stack([case.ravel(), r.ravel(), d.ravel(), out.ravel(),
+                                  wrap(thr.ravel(), dw, signed=False)]))
+    return v
+
+# =============================================================================
+# tws_tracker
+# =============================================================================
+
+DET_BEAT, DET_LAST, RESET = 0, 1, 2
+TRK_BEAT, SCAN_COMPLETE = 0, 1
+
+def _tracker_scenarios(g):
+    """{case: [scan detections]}; each case starts from aresetn."""
+    gate_r, gate_d = g['ASSOC_GATE_R'], g['ASSOC_GATE_D']
+    hits, coast = g['INIT_HITS'], g['COAST_MAX']
+    n_tracks = g['MAX_TRACKS']
+    n_scans = hits + coast + 6
+
+    def steady(r0, d, vr=0, scans=range(n_scans), mag=5000):
+        return {k: [(r0 + vr * k, d, mag)] for k in scans}
+
+    def merge(*parts, n=n_scans):
+        out = [[] for _ in range(n)]
+        for p in parts:
+            for k, dets in p.items():
+                out[k] += dets
+        return out
+
+    gap = range(hits + 2, hits + 4)
+    return {
+        # Tentative -> firm after INIT_HITS further hits, approaching target
+        'confirm_approaching': merge(steady(200, 40, -5)),
+        # Firm, two missed scans (coast), then re-acquired (firm again)
+        'coast_reacquire': merge(steady(300, 20, 2, [k for k in range(n_scans) if k not in gap])),
+        # Firm then gone: dropped after COAST_MAX misses
+        'coast_drop': merge(steady(150, 30, 0, range(hits + 2))),
+        # Tentative track that never confirms is dropped the same way
+        'tentative_drop': merge(steady(250, 50, 0, range(1))),
+        # Second scan measurement just inside / just outside the gate
+        'gate_edge_inside': merge({0: [(100, 20, 4000)], 1: [(100 + gate_r - 1, 20 + gate_d - 1, 4000)]},
+                                  steady(100 + gate_r - 1, 20 + gate_d - 1, 0, range(2, n_scans))),
+        'gate_edge_outside': merge({0: [(100, 20, 4000)], 1: [(100 + gate_r, 20, 4000)]},
+                                   steady(100 + gate_r, 20, 0, range(2, n_scans))),
+        # Two tracks in one gate; best_distance carries over between tracks
+        'shared_gate': merge(steady(400, 10, 0), steady(403, 11, 0),
+                             {k: [(401, 10, 3000)] for k in range(hits + 1, n_scans)}),
+        # Q2 range register is 12 bits: bins >= 512 wrap and never associate
+        'range_wrap': merge(steady(511, 40, 0), steady(600, 40, 0)),
+        # Doppler Q2 is 9 bits: bins >= 64 wrap the same way
+        'doppler_wrap': merge(steady(220, 63, 0), steady(240, 64, 0)),
+        # More new detections than free track slots
+        'table_full': merge({0: [(20 * k + 10, 5, 2000) for k in range(n_tracks + 4)]}, n=3),
+        # 6-bit det_count: the 65th detection overwrites slot 0
+        'det_buffer_wrap': merge({0: [(10 * k + 5, 12, 2000) for k in range(70)]}, n=2),
+    }
+
+def gen_tws_tracker(g):
+    v = Vectors(('scan', 'kind', 'range', 'doppler', 'mag'),
+                ('scan', 'kind', 'id', 'range', 'doppler', 'vel_r', 'vel_d',
+                 'quality', 'status', 'active'))
+    for name, scans in _tracker_scenarios(g).items():
+        c = v.case(name)
+        trk = TwsTracker(max_tracks=g['MAX_TRACKS'], init_hits=g['INIT_HITS'],
+                         coast_max=g['COAST_MAX'], assoc_gate_r=g['ASSOC_GATE_R'],
+                         assoc_gate_d=g['ASSOC_GATE_D'], alpha_gain=g['ALPHA_GAIN'],
+                         beta_gain=g['BETA_GAIN'])
+        stim = [(0, RESET, 0, 0, 0)]
+        exp = []
+        for k, dets in enumerate(scans):
+            stim += [(k, DET_BEAT, r, d, m) for r, d, m in dets]
+            stim.append((k, DET_LAST, 0, 0, 0))
+            rows, active = trk.scan(np.array(dets, dtype=np.int64).reshape(-1, 3))
+            exp += [(k, TRK_BEAT, t['id'], t['range'], t['doppler'], t['vel_r'], t['vel_d'],
+                     t['quality'], t['status'], 0) for t in rows]
+            exp.append((k, SCAN_COMPLETE, 0, 0, 0, 0, 0, 0, 0, active))
+        v.add(c, stim, exp)
+    return v
+
+GENERATORS = {
+    'magnitude_calc': gen_magnitude_calc,
+    'window_multiplier': gen_window_multiplier,
+    'doppler_notch': gen_doppler_notch,
+    'corner_turner': gen_corner_turner,
+    'os_cfar_2d': gen_os_cfar_2d,
+    'tws_tracker': gen_tws_tracker,
+}
+
+# =============================================================================
+# Cache
+# =============================================================================
+
+def vector_key(entity, generics):
+    """Short hash of (entity, generics, GENERATOR_VERSION)."""
+    text = json.dumps(dict(entity=entity, generics=generics, version=GENERATOR_VERSION),
+                      sort_keys=True)
+    return hashlib.sha1(text.encode()).hexdigest()[:12]
+
+def vector_dir(out_dir, tb, entity, generics):
+    return Path(out_dir) / tb / vector_key(entity, generics)
+
+def generate(tb, generics=None, out_dir=DEFAULT_OUT, force=False):
+    """Write vectors for one testbench generic set unless already cached.
+
+    Returns (directory, meta dict, regenerated).
+    """
+    entity, generic_sets = TESTBENCHES[tb]
+    generics = dict(generic_sets[0] if generics is None else generics)
+    path = vector_dir(out_dir, tb, entity, generics)
+    meta_path = path / 'vectors.json'
+    if meta_path.exists() and not force:
+        meta = json.loads(meta_path.read_text())
+        if meta.get('key') == vector_key(entity, generics):
+            return path, meta, False
+
+    v = GENERATORS[entity](generics)
+    stim, exp = v.arrays()
+    path.mkdir(parents=True, exist_ok=True)
+    np.savetxt(path / 'stimulus.txt', stim, fmt='%d')
+    np.savetxt(path / 'expected.txt', exp, fmt='%d')
+    meta = dict(testbench=tb, entity=entity, generics=generics, version=GENERATOR_VERSION,
+                key=vector_key(entity, generics),
+                stimulus_columns=v.stim_columns, expected_columns=v.exp_columns,
+                cases=v.cases, n_stimulus=len(stim), n_expected=len(exp))
+    meta_path.write_text(json.dumps(meta, indent=2))
+    return path, meta, True
+
+def generate_all(out_dir=DEFAULT_OUT, testbenches=None, overrides=None, force=False):
+    """Vectors for every generic set of the given testbenches (default: all).
+
+    overrides replaces generic values wherever the generic exists.
+    """
+    results = []
+    for tb in testbenches or TESTBENCHES:
+        _, generic_sets = TESTBENCHES[tb]
+        for generics in generic_sets:
+            g = dict(generics)
+            g.update({k: val for k, val in (overrides or {}).items() if k in g})
+            results.append(generate(tb, g, out_dir, force))
+    return results
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    opts = dict(a[2:].split('=', 1) for a in sys.argv[1:] if a.startswith('--') and '=' in a)
+    out_dir = args[0] if args else DEFAULT_OUT
+    force = '--force' in sys.argv
+    tbs = opts.pop('tb').split(',') if 'tb' in opts else None
+    # Any other --NAME=value overrides that generic
+    overrides = {k: int(val) for k, val in opts.items()}
+
+    results = generate_all(out_dir, tbs, overrides, force)
+
+    print("\n=== GOLDEN VECTORS ===")
+    print(f"{'testbench':22s} {'key':12s} {'cases':>5s} {'stim':>6s} {'exp':>6s}  status")
+    for path, meta, regenerated in results:
+        print(f"{meta['testbench']:22s} {meta['key']:12s} {len(meta['cases']):5d} "
+              f"{meta['n_stimulus']:6d} {meta['n_expected']:6d}  "
+              f"{'written' if regenerated else 'cached'}")
+    print(f"Output: {Path(out_dir).resolve()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,561 @@
+#!/usr/bin/env python3
+"""
+ADR_ingest.py
+asyncio ingest service for live detection/track streams
+Receives radar_core detections and tws_tracker reports over UDP or TCP in
+a compact binary framing, decodes them in batches into preallocated scan
+buffers and fans each completed scan out to subscribers without blocking
+the receive path. FpgaEmulator is a loopback stand-in for the board.
+
+Frame layout (little endian):
+  header   magic 'AR', version, type, count (uint16), seq (uint32)
+  payload  count records of DET_WIRE_DTYPE / TRK_WIRE_DTYPE, or one
+           SCAN_WIRE_DTYPE record closing the scan
+"""
+
+import sys
+import time
+import struct
+import asyncio
+import inspect
+import numpy as np
+from dataclasses import dataclass
+
+from ADR_prefetch import RdmAccumulator, load_scans
+
+MAGIC = b'AR'
+VERSION = 1
+FRAME_HDR = struct.Struct('<2sBBHI')
+
+REC_DET = 1
+REC_TRK = 2
+REC_SCAN_END = 3
+
+# Detection: range bin, doppler bin, 17-bit magnitude
+DET_WIRE_DTYPE = np.dtype([('range', '<u2'), ('doppler', '<u2'), ('mag', '<u4')])
+
+# Track report: tws_tracker output ports (Q2 range/doppler)
+TRK_WIRE_DTYPE = np.dtype([
+    ('id', 'u1'),
+    ('range', '<i2'),
+    ('doppler', '<i2'),
+    ('vel_r', '<i2'),
+    ('quality', 'u1'),
+    ('status', 'u1'),
+])
+
+# Scan delimiter: scan number, ACTIVE count, sender monotonic clock
+SCAN_WIRE_DTYPE = np.dtype([('scan', '<u4'), ('active', '<u2'), ('t_send_ns', '<u8')])
+
+_WIRE = {REC_DET: DET_WIRE_DTYPE, REC_TRK: TRK_WIRE_DTYPE, REC_SCAN_END: SCAN_WIRE_DTYPE}
+
+# Records per frame that keep a datagram under a 1500-byte MTU
+UDP_PAYLOAD = 1472 - FRAME_HDR.size
+MAX_DETS_PER_FRAME = UDP_PAYLOAD // DET_WIRE_DTYPE.itemsize
+MAX_TRKS_PER_FRAME = UDP_PAYLOAD // TRK_WIRE_DTYPE.itemsize
+
+# Track reports per scan the buffers start with: the 6-bit trk_id range
+# (tws_tracker's MAX_TRACKS generic is 32, so this covers any build)
+MAX_TRACKS = 64
+
+DEFAULT_PORT = 50710
+
+def encode_frames(rec_type, records, seq=0, max_per_frame=None):
+    """Pack a record array into one or more frames; returns (bytes list, next seq)."""
+    records = np.ascontiguousarray(records, dtype=_WIRE[rec_type])
+    if max_per_frame is None:
+        max_per_frame = UDP_PAYLOAD // records.dtype.itemsize
+    frames = []
+    for lo in range(0, max(len(records), 1), max_per_frame):
+        chunk = records[lo:lo + max_per_frame]
+        frames.append(FRAME_HDR.pack(MAGIC, VERSION, rec_type, len(chunk), seq & 0xFFFFFFFF)
+                      + chunk.tobytes())
+        seq += 1
+    return frames, seq
+
+def encode_scan(dets, tracks, scan, active, seq=0, t_send_ns=None):
+    """All frames for one scan: detections, track reports, then SCAN_END."""
+    frames = []
+    if len(dets):
+        f, seq = encode_frames(REC_DET, dets, seq)
+        frames += f
+    if len(tracks):
+        f, seq = encode_frames(REC_TRK, tracks, seq)
+        frames += f
+    end = np.zeros(1, dtype=SCAN_WIRE_DTYPE)
+    end['scan'] = scan
+    end['active'] = active
+    end['t_send_ns'] = time.monotonic_ns() if t_send_ns is None else t_send_ns
+    f, seq = encode_frames(REC_SCAN_END, end, seq)
+    return frames + f, seq
+
+class ScanBatch:
+    """One scan's records in preallocated storage owned by the service.
+
+    dets/tracks are views valid until every subscriber has returned from
+    its handler; copy them to keep data beyond that.
+    """
+
+    def __init__(self, det_capacity, trk_capacity):
+        self._det_buf = np.empty(det_capacity, dtype=DET_WIRE_DTYPE)
+        self._trk_buf = np.empty(trk_capacity, dtype=TRK_WIRE_DTYPE)
+        self.n_dets = 0
+        self.n_tracks = 0
+        self.scan = 0
+        self.active = 0
+        self.t_send_ns = 0
+        self.t_recv_ns = 0
+        self._refs = 0
+
+    @property
+    def dets(self):
+        return self._det_buf[:self.n_dets]
+
+    @property
+    def tracks(self):
+        return self._trk_buf[:self.n_tracks]
+
+    def _append(self, buf_name, count_name, recs):
+        buf = getattr(self, buf_name)
+        n = getattr(self, count_name)
+        if n + len(recs) > len(buf):
+            # Rare: grow by doubling so the pool settles at the peak scan size
+            grown = np.empty(max(2 * len(buf), n + len(recs)), dtype=buf.dtype)
+            grown[:n] = buf[:n]
+            buf = grown
+            setattr(self, buf_name, buf)
+        buf[n:n + len(recs)] = recs
+        setattr(self, count_name, n + len(recs))
+
+    def _reset(self):
+        self.n_dets = 0
+        self.n_tracks = 0
+
+@dataclass
+class IngestStats:
+    frames: int = 0
+    bytes: int = 0
+    dets: int = 0
+    tracks: int = 0
+    scans: int = 0
+    bad_frames: int = 0
+    lost_frames: int = 0
+
+class _Subscriber:
+    def __init__(self, name, handler, depth):
+        self.name = name
+        self.handler = handler
+        self.queue = asyncio.Queue(maxsize=depth)
+        self.delivered = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_error = None
+        self.task = None
+
+class IngestService:
+    """Decode framed records and publish one ScanBatch per SCAN_END.
+
+    Subscribers each get their own bounded queue; a subscriber that falls
+    behind drops scans (counted) instead of stalling reception or the
+    other subscribers. A handler that raises has that scan counted as an
+    error and keeps receiving the following ones.
+    """
+
+    def __init__(self, det_capacity=4096, trk_capacity=MAX_TRACKS, queue_depth=8):
+        self.det_capacity = det_capacity
+        self.trk_capacity = trk_capacity
+        self.queue_depth = queue_depth
+        self.stats = IngestStats()
+        self._subs = []
+        self._free = []
+        self._current = self._take_batch()
+        self._next_seq = None
+        self._stream_buf = bytearray()
+        self._servers = []
+        self._transports = []
+
+    # ---- subscribers --------------------------------------------------------
+
+    def subscribe(self, handler, name=None, depth=None):
+        """Register handler(batch); plain functions and coroutines both work."""
+        sub = _Subscriber(name or getattr(handler, '__name__', type(handler).__name__),
+                          handler, depth or self.queue_depth)
+        sub.task = asyncio.get_running_loop().create_task(self._run_subscriber(sub))
+        self._subs.append(sub)
+        return sub
+
+    async def _run_subscriber(self, sub):
+        while True:
+            batch = await sub.queue.get()
+            try:
+                result = sub.handler(batch)
+                if inspect.isawaitable(result):
+                    await result
+                sub.delivered += 1
+            except Exception as e:
+                # Keep the task alive so drain()/close() still see task_done()
+                sub.errors += 1
+                sub.last_error = e
+            finally:
+                self._release(batch)
+                sub.queue.task_done()
+
+    def subscriber_stats(self):
+        return {s.name: dict(delivered=s.delivered, dropped=s.dropped, errors=s.errors,
+                             queued=s.queue.qsize()) for s in self._subs}
+
+    # ---- batch pool ---------------------------------------------------------
+
+    def _take_batch(self):
+        if self._free:
+            batch = self._free.pop()
+            batch._reset()
+            return batch
+        return ScanBatch(self.det_capacity, self.trk_capacity)
+
+    def _release(self, batch):
+        batch._refs -= 1
+        if batch._refs == 0:
+            self._free.append(batch)
+
+    def _publish(self, batch):
+        batch._refs = 1
+        for sub in self._subs:
+            try:
+                sub.queue.put_nowait(batch)
+                batch._refs += 1
+            except asyncio.QueueFull:
+                sub.dropped += 1
+        self._release(batch)
+
+    # ---- decoding -----------------------------------------------------------
+
+    def feed_datagram(self, data):
+        """Decode a datagram holding one or more whole frames."""
+        with memoryview(data) as view:
+            self._decode(view, stream=False)
+
+    def feed_stream(self, data):
+        """Decode TCP stream bytes; partial frames wait for the next call."""
+        self._stream_buf += data
+        with memoryview(self._stream_buf) as view:
+            used = self._decode(view, stream=True)
+        del self._stream_buf[:used]
+
+    def _decode(self, view, stream):
+        pos = 0
+        hdr = FRAME_HDR.size
+        while len(view) - pos >= hdr:
+            magic, version, rec_type, count, seq = FRAME_HDR.unpack_from(view, pos)
+            dtype = _WIRE.get(rec_type)
+            if magic != MAGIC or version != VERSION or dtype is None:
+                self.stats.bad_frames += 1
+                if stream:
+                    # Resynchronise on the next magic
+                    nxt = bytes(view[pos + 1:]).find(MAGIC)
+                    pos = pos + 1 + nxt if nxt >= 0 else len(view)
+                    continue
+                return len(view)
+            end = pos + hdr + count * dtype.itemsize
+            if end > len(view):
+                if not stream:
+                    self.stats.bad_frames += 1
+                    return len(view)
+                break
+            recs = np.frombuffer(view, dtype=dtype, count=count, offset=pos + hdr)
+            self._track_seq(seq)
+            self._handle(rec_type, recs)
+            self.stats.frames += 1
+            self.stats.bytes += end - pos
+            pos = end
+        return pos
+
+    def _track_seq(self, seq):
+        if self._next_seq is not None and seq != self._next_seq:
+            self.stats.lost_frames += (seq - self._next_seq) & 0xFFFFFFFF
+        self._next_seq = (seq + 1) & 0xFFFFFFFF
+
+    def _handle(self, rec_type, recs):
+        batch = self._current
+        if rec_type == REC_DET:
+            batch._append('_det_buf', 'n_dets', recs)
+            self.stats.dets += len(recs)
+        elif rec_type == REC_TRK:
+            batch._append('_trk_buf', 'n_tracks', recs)
+            self.stats.tracks += len(recs)
+        elif len(recs):
+            end = recs[0]
+            batch.scan = int(end['scan'])
+            batch.active = int(end['active'])
+            batch.t_send_ns = int(end['t_send_ns'])
+            batch.t_recv_ns = time.monotonic_ns()
+            self.stats.scans += 1
+            self._current = self._take_batch()
+            self._publish(batch)
+        else:
+            # SCAN_END frame without its record
+            self.stats.bad_frames += 1
+
+    # ---- transports ---------------------------------------------------------
+
+    async def start_udp(self, host='127.0.0.1', port=DEFAULT_PORT, rcvbuf=4 << 20):
+        loop = asyncio.get_running_loop()
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: _UdpProtocol(self), local_addr=(host, port))
+        sock = transport.get_extra_info('socket')
+        if sock is not None and rcvbuf:
+            import socket
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+        self._transports.append(transport)
+        return transport
+
+    async def start_tcp(self, host='127.0.0.1', port=DEFAULT_PORT):
+        server = await asyncio.start_server(self._serve_tcp, host, port)
+        self._servers.append(server)
+        return server
+
+    async def _serve_tcp(self, reader, writer):
+        try:
+            while True:
+                data = await reader.read(1 << 16)
+                if not data:
+                    break
+                self.feed_stream(data)
+                # read() does not yield while data is buffered; give the
+                # subscriber tasks a turn
+                await asyncio.sleep(0)
+        finally:
+            writer.close()
+
+    async def drain(self):
+        """Wait until every queued batch has been handled."""
+        for sub in self._subs:
+            await sub.queue.join()
+
+    async def close(self):
+        for t in self._transports:
+            t.close()
+        for s in self._servers:
+            s.close()
+            await s.wait_closed()
+        await self.drain()
+        for sub in self._subs:
+            sub.task.cancel()
+        await asyncio.gather(*(s.task for s in self._subs), return_exceptions=True)
+
+class _UdpProtocol(asyncio.DatagramProtocol):
+    def __init__(self, service):
+        self.service = service
+
+    def datagram_received(self, data, addr):
+        self.service.feed_datagram(data)
+
+# =============================================================================
+# Subscribers
+# =============================================================================
+
+class Recorder:
+    """Write scans back out in the simulation text formats.
+
+    Each scan ends with a bare SCAN_END line in the detection file and a
+    SCAN_END ACTIVE= line in the track file, as the testbenches write them.
+    """
+
+    def __init__(self, det_path, trk_path):
+        self.det_f = open(det_path, 'w')
+        self.trk_f = open(trk_path, 'w')
+
+    def __call__(self, batch):
+        d = batch.dets
+        if len(d):
+            self.det_f.write(''.join(f"{r} {dp} {m}\n" for r, dp, m in
+                                     zip(d['range'].tolist(), d['doppler'].tolist(),
+                                         d['mag'].tolist())))
+        self.det_f.write("SCAN_END\n")
+        t = batch.tracks
+        for tid, r, dp, vr, q, s in zip(t['id'].tolist(), t['range'].tolist(),
+                                        t['doppler'].tolist(), t['vel_r'].tolist(),
+                                        t['quality'].tolist(), t['status'].tolist()):
+            self.trk_f.write(f"TRK {tid} R={r} D={dp} VR={vr} Q={q} S={s:02b}\n")
+        self.trk_f.write(f"SCAN_END ACTIVE={batch.active}\n")
+
+    def close(self):
+        self.det_f.close()
+        self.trk_f.close()
+
+class ScanAnalytics:
+    """Per-scan counts and send-to-handler latency."""
+
+    def __init__(self):
+        self.latency_ns = []
+        self.dets = []
+        self.active = []
+        self.last_scan = None
+        self.scan_gaps = 0
+
+    def __call__(self, batch):
+        self.latency_ns.append(time.monotonic_ns() - batch.t_send_ns)
+        self.dets.append(batch.n_dets)
+        self.active.append(batch.active)
+        if self.last_scan is not None and batch.scan != self.last_scan + 1:
+            self.scan_gaps += 1
+        self.last_scan = batch.scan
+
+    def latency_ms(self, pct):
+        if not self.latency_ns:
+            return 0.0
+        return float(np.percentile(self.latency_ns, pct)) / 1e6
+
+class LiveRdm(RdmAccumulator):
+    """Max-hold RDM for a live plot; the plot reads .rdm at its own rate."""
+
+    def __call__(self, batch):
+        d = batch.dets
+        if len(d):
+            self.add(np.column_stack([d['range'], d['doppler'], d['mag']]).astype(np.int64))
+
+# =============================================================================
+# Loopback FPGA stand-in
+# =============================================================================
+
+def scans_from_files(det_file, trk_file, n_doppler=128):
+    """Split recorded detection/track files into per-scan wire records."""
+    for dets, rows, active in load_scans(det_file, trk_file, n_doppler):
+        wd = np.zeros(len(dets), dtype=DET_WIRE_DTYPE)
+        if len(dets):
+            wd['range'], wd['doppler'], wd['mag'] = dets.T
+        wt = np.zeros(len(rows), dtype=TRK_WIRE_DTYPE)
+        for name in TRK_WIRE_DTYPE.names:
+            wt[name] = rows[name]
+        yield wd, wt, active
+
+def synthetic_scans(n_scans, dets_per_scan=64, n_tracks=10, n_range=1024,
+                    n_doppler=128, seed=0):
+    """Random detections in raster order plus drifting firm tracks."""
+    rng = np.random.default_rng(seed)
+    base_r = rng.integers(100, n_range - 100, n_tracks) * 4
+    base_d = rng.integers(8, n_doppler - 8, n_tracks) * 4
+    for k in range(n_scans):
+        cells = np.sort(rng.choice(n_range * n_doppler, dets_per_scan, replace=False))
+        wd = np.zeros(dets_per_scan, dtype=DET_WIRE_DTYPE)
+        wd['range'], wd['doppler'] = np.divmod(cells, n_doppler)
+        wd['mag'] = rng.integers(500, 2**17, dets_per_scan)
+        wt = np.zeros(n_tracks, dtype=TRK_WIRE_DTYPE)
+        wt['id'] = np.arange(n_tracks)
+        wt['range'] = base_r - 4 * k
+        wt['doppler'] = base_d
+        wt['vel_r'] = -4
+        wt['quality'] = min(k + 1, 15)
+        wt['status'] = 2
+        yield wd, wt, n_tracks
+
+class FpgaEmulator:
+    """Send scans to an IngestService over UDP or TCP.
+
+    scan_rate=0 sends as fast as the transport allows; otherwise scans go
+    out on a monotonic schedule at scan_rate Hz.
+    """
+
+    def __init__(self, host='127.0.0.1', port=DEFAULT_PORT, proto='udp', scan_rate=0.0):
+        self.host = host
+        self.port = port
+        self.proto = proto
+        self.scan_rate = scan_rate
+        self.seq = 0
+        self.frames_sent = 0
+        self.bytes_sent = 0
+
+    async def run(self, scans):
+        loop = asyncio.get_running_loop()
+        if self.proto == 'udp':
+            transport, _ = await loop.create_datagram_endpoint(
+                asyncio.DatagramProtocol, remote_addr=(self.host, self.port))
+            send = transport.sendto
+            writer = None
+        else:
+            _, writer = await asyncio.open_connection(self.host, self.port)
+            send = writer.write
+
+        t0 = time.monotonic()
+        try:
+            for k, (dets, tracks, active) in enumerate(scans):
+                if self.scan_rate:
+                    delay = t0 + k / self.scan_rate - time.monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                frames, self.seq = encode_scan(dets, tracks, k, active, self.seq)
+                for f in frames:
+                    send(f)
+                    self.bytes_sent += len(f)
+                self.frames_sent += len(frames)
+                if writer is not None:
+                    await writer.drain()
+                else:
+                    # Let the receiver run so loopback socket buffers never fill
+                    await asyncio.sleep(0)
+        finally:
+            if writer is not None:
+                writer.close()
+                await writer.wait_closed()
+            else:
+                transport.close()
+
+async def loopback(scans, proto='udp', port=DEFAULT_PORT, scan_rate=0.0, recorder=None):
+    """Run service + emulator in one event loop; returns (service, analytics, seconds)."""
+    service = IngestService()
+    if proto == 'udp':
+        await service.start_udp(port=port)
+    else:
+        await service.start_tcp(port=port)
+
+    analytics = ScanAnalytics()
+    service.subscribe(analytics, name='analytics')
+    service.subscribe(LiveRdm(1024, 128), name='plot')
+    if recorder is not None:
+        service.subscribe(recorder, name='recorder')
+
+    emu = FpgaEmulator(port=port, proto=proto, scan_rate=scan_rate)
+    t0 = time.perf_counter()
+    await emu.run(scans)
+    # Give the last datagrams / stream bytes time to land
+    for _ in range(100):
+        if service.stats.frames >= emu.frames_sent:
+            break
+        await asyncio.sleep(0.01)
+    await service.drain()
+    elapsed = time.perf_counter() - t0
+    await service.close()
+    return service, analytics, elapsed
+
+def main():
+    proto = 'tcp' if '--tcp' in sys.argv else 'udp'
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+
+    if args:
+        det_file = args[0]
+        trk_file = args[1] if len(args) > 1 else None
+        scans = list(scans_from_files(det_file, trk_file))
+        source = f"{det_file}, {trk_file}"
+    else:
+        scans = list(synthetic_scans(120, dets_per_scan=2048))
+        source = "synthetic (120 scans x 2048 detections)"
+
+    service, analytics, elapsed = asyncio.run(loopback(scans, proto=proto))
+    st = service.stats
+
+    print("\n=== INGEST LOOPBACK ===")
+    print(f"Source: {source}")
+    print(f"Transport: {proto.upper()} 127.0.0.1:{DEFAULT_PORT}")
+    print(f"Scans: {st.scans}, detections: {st.dets}, track reports: {st.tracks}")
+    print(f"Frames: {st.frames} ({st.bytes / 1e6:.2f} MB), "
+          f"lost {st.lost_frames}, bad {st.bad_frames}")
+    print(f"Throughput: {st.dets / elapsed / 1e6:.2f} M det/s, "
+          f"{st.bytes / elapsed / 1e6:.1f} MB/s")
+    print(f"Latency (send -> handler): p50 {analytics.latency_ms(50):.3f} ms, "
+          f"p99 {analytics.latency_ms(99):.3f} ms")
+    for name, s in service.subscriber_stats().items():
+        print(f"  {name:10s} delivered {s['delivered']}, dropped {s['dropped']}, "
+              f"errors {s['errors']}")
+
+if __name__ == "__main__":
+    main()
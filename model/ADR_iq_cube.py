@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+ADR_iq_cube.py
+Out-of-core CPI processing of raw IQ recordings
+A recording is a raw (scan x chirp x sample x I/Q) int16 file with a JSON
+sidecar, written a scan at a time and opened memory-mapped. CpiProcessor
+pulls as many scans as fit under a memory ceiling, runs them through the
+RadarCore frame model (window, range FFT, corner turn, notch, Doppler FFT,
+magnitude, OS-CFAR) as one batch, and appends the detections (and
+optionally the magnitude cube) to an output directory before the next
+chunk. Progress is committed per chunk, so an interrupted run resumes and
+the result opens as a memory-mapped SparseDetections store.
+
+  python ADR_iq_cube.py synth <rec.iq> [--scans=N] [--quick]
+  python ADR_iq_cube.py process <rec.iq> [out_dir] [--mem=MB] [--mode=fast]
+                        [--rdm] [--restart]
+"""
+
+import sys
+import json
+import time
+import tracemalloc
+import numpy as np
+from pathlib import Path
+
+from ADR_pipeline import RadarCore, synth_frames
+from ADR_sparse import SparseDetections
+
+# Radar parameters (match VHDL)
+N_RANGE = 1024
+N_DOPPLER = 128
+MAX_RANGE_M = 120000.0
+SCAN_RATE = 2.0  # Hz
+
+# Default memory ceiling for one chunk (input copy + processing temporaries)
+MEM_LIMIT_MB = 2048
+# Headroom over the calibrated per-scan peak
+MEM_MARGIN = 1.25
+
+# Column files appended per chunk, turned into SparseDetections .npy at the end
+_COLUMNS = (('range', np.int16), ('doppler', np.int16), ('mag', np.uint32),
+            ('counts', np.int64))
+
+def _meta_path(path):
+    return Path(str(path) + '.json')
+
+class IqWriter:
+    """Streams scans into a raw recording; the sidecar is written on close."""
+
+    def __init__(self, path, n_chirps=N_DOPPLER, n_samples=N_RANGE):
+        self.path = Path(path)
+        self.n_chirps = n_chirps
+        self.n_samples = n_samples
+        self.n_scans = 0
+        self._f = open(self.path, 'wb')
+
+    def append(self, i, q):
+        """One or more (…, chirp, sample) int16 I and Q frames."""
+        i = np.asarray(i, dtype=np.int16).reshape(-1, self.n_chirps, self.n_samples)
+        q = np.asarray(q, dtype=np.int16).reshape(i.shape)
+        self._f.write(np.stack([i, q], axis=-1).tobytes())
+        self.n_scans += len(i)
+
+    def close(self):
+        self._f.close()
+        _meta_path(self.path).write_text(json.dumps(
+            dict(n_scans=self.n_scans, n_chirps=self.n_chirps, n_samples=self.n_samples,
+                 dtype='int16', layout='scan,chirp,sample,iq'), indent=2))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class IqRecording:
+    """Memory-mapped (scan, chirp, sample, 2) int16 recording."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        meta = json.loads(_meta_path(self.path).read_text())
+        self.n_scans = meta['n_scans']
+        self.n_chirps = meta['n_chirps']
+        self.n_samples = meta['n_samples']
+        self.data = np.memmap(self.path, dtype=np.int16, mode='r',
+                              shape=(self.n_scans, self.n_chirps, self.n_samples, 2))
+
+    @property
+    def scan_bytes(self):
+        return self.n_chirps * self.n_samples * 4
+
+    def __len__(self):
+        return self.n_scans
+
+    def frames(self, lo, hi):
+        """In-memory (i, q) int16 copies of scans [lo, hi)."""
+        block = np.array(self.data[lo:hi])
+        return block[..., 0], block[..., 1]
+
+class CpiProcessor:
+    """Chunked RadarCore over an IqRecording under a memory ceiling."""
+
+    def __init__(self, core=None, mem_limit_mb=MEM_LIMIT_MB):
+        self.core = core or RadarCore()
+        self.mem_limit = int(mem_limit_mb * 2**20)
+        self._scan_peak = None
+
+    def scan_peak_bytes(self, rec):
+        """Peak allocation for one scan (input copy + pipeline), measured once."""
+        if self._scan_peak is None:
+            i, q = rec.frames(0, 1)
+            tracemalloc.start()
+            self.core.process(np.array(i), np.array(q))
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            self._scan_peak = int(MEM_MARGIN * peak) + rec.scan_bytes
+        return self._scan_peak
+
+    def scans_per_chunk(self, rec):
+        peak = self.scan_peak_bytes(rec)
+        if peak > self.mem_limit:
+            raise ValueError(f"memory ceiling {self.mem_limit / 2**20:.3g} MB is below the "
+                             f"{peak / 2**20:.1f} MB one scan needs")
+        return self.mem_limit // peak
+
+    def run(self, rec, out_dir, rdm=False, restart=False, progress=True):
+        """Process every scan of rec into out_dir; returns SparseDetections.
+
+        rdm=True also writes the magnitude cube (scan, range, doppler) to
+        out_dir/rdm.npy. A run interrupted mid-way continues from its last
+        committed chunk unless restart=True.
+        """
+        if isinstance(rec, (str, Path)):
+            rec = IqRecording(rec)
+        core = self.core
+        if (rec.n_chirps, rec.n_samples) != (core.n_doppler, core.n_range):
+            raise ValueError(f"recording is {rec.n_chirps}x{rec.n_samples}, core expects "
+                             f"{core.n_doppler}x{core.n_range}")
+        out = Path(out_dir)
+        out.mkdir(parents=True, exist_ok=True)
+        state_path = out / 'progress.json'
+        state = dict(scans=0, rows=0)
+        if state_path.exists() and not restart:
+            state = json.loads(state_path.read_text())
+            if state.get('done'):
+                return SparseDetections.load(out)
+
+        # Drop anything written after the last committed chunk
+        files = {}
+        for name, dt in _COLUMNS:
+            p = out / f'{name}.bin'
+            keep = (state['scans'] if name == 'counts' else state['rows']) * np.dtype(dt).itemsize
+            with open(p, 'ab') as f:
+                f.truncate(keep)
+            files[name] = open(p, 'ab')
+        mag_dtype = np.uint32 if core.mode == 'fixed' else np.float32
+        cube = None
+        if rdm:
+            cube = np.lib.format.open_memmap(
+                out / 'rdm.npy', mode='r+' if state['scans'] else 'w+', dtype=mag_dtype,
+                shape=(rec.n_scans, core.n_range, core.n_doppler))
+
+        chunk = self.scans_per_chunk(rec)
+        t0 = time.perf_counter()
+        done0 = state['scans']
+        try:
+            for lo in range(state['scans'], rec.n_scans, chunk):
+                hi = min(lo + chunk, rec.n_scans)
+                i, q = rec.frames(lo, hi)
+                res = core.process(i, q)
+                s, r, d = np.nonzero(res.cfar)
+                cols = dict(range=r, doppler=d, mag=res.cfar[s, r, d],
+                            counts=np.bincount(s, minlength=hi - lo))
+                for name, dt in _COLUMNS:
+                    files[name].write(np.asarray(cols[name], dtype=dt).tobytes())
+                    files[name].flush()
+                if cube is not None:
+                    cube[lo:hi] = res.mag
+                    cube.flush()
+                state = dict(scans=hi, rows=state['rows'] + len(r))
+                state_path.write_text(json.dumps(state))
+                if progress:
+                    rate = (hi - done0) / max(time.perf_counter() - t0, 1e-9)
+                    print(f"\r  {hi}/{rec.n_scans} scans, {chunk}/chunk, "
+                          f"{rate:.1f} scans/s", end='', flush=True)
+        finally:
+            for f in files.values():
+                f.close()
+        if progress:
+            print()
+        return self._finish(out, state, rec)
+
+    def _finish(self, out, state, rec):
+        counts = np.fromfile(out / 'counts.bin', dtype=np.int64)
+        indptr = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+        cols = [np.memmap(out / f'{name}.bin', dtype=dt, mode='r') if state['rows']
+                else np.zeros(0, dt) for name, dt in _COLUMNS[:3]]
+        SparseDetections(indptr, *cols, n_range=rec.n_samples,
+                         n_doppler=rec.n_chirps).save(out)
+        del cols
+        for name, _ in _COLUMNS:
+            (out / f'{name}.bin').unlink()
+        state_path = out / 'progress.json'
+        state_path.write_text(json.dumps(dict(state, done=True, source=str(rec.path))))
+        return SparseDetections.load(out)
+
+def synth_recording(path, n_scans=120, n_range=N_RANGE, n_doppler=N_DOPPLER, seed=42):
+    """Write an n_scans recording of closing point targets, scan by scan."""
+    bins_per_scan = 340.29 / SCAN_RATE / (MAX_RANGE_M / n_range)
+    targets = [(0.8 * n_range, n_doppler // 3, 2000.0, -0.65 * bins_per_scan),
+               (0.5 * n_range, n_doppler // 2 + 5, 1200.0, -bins_per_scan),
+               (0.3 * n_range, 3 * n_doppler // 4, 800.0, 0.0)]
+    with IqWriter(path, n_doppler, n_range) as w:
+        for k in range(n_scans):
+            tgt = [(r0 + k * v, d, amp) for r0, d, amp, v in targets]
+            i, q = synth_frames(tgt, 1, n_range, n_doppler, seed=seed + k)
+            w.append(i, q)
+    return IqRecording(path)
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    opts = dict(a[2:].split('=', 1) if '=' in a else (a[2:], '1')
+                for a in sys.argv[1:] if a.startswith('--'))
+    cmd = args[0] if args else 'process'
+    src = args[1] if len(args) > 1 else 'ADR_recording.iq'
+
+    if cmd == 'synth':
+        n = (32, 64) if 'quick' in opts else (N_DOPPLER, N_RANGE)
+        t0 = time.perf_counter()
+        rec = synth_recording(src, int(opts.get('scans', 120)), n_range=n[1], n_doppler=n[0])
+        print(f"Written: {src} ({rec.n_scans} scans, {rec.n_chirps}x{rec.n_samples}, "
+              f"{rec.n_scans * rec.scan_bytes / 1e6:.1f} MB) "
+              f"in {time.perf_counter() - t0:.1f} s")
+        return
+    if cmd != 'process':
+        sys.exit(f"unknown command {cmd!r} (synth, process)")
+
+    out_dir = args[2] if len(args) > 2 else str(Path(src).with_suffix('.dets'))
+    rec = IqRecording(src)
+    core = RadarCore(n_range=rec.n_samples, n_doppler=rec.n_chirps,
+                     mode=opts.get('mode', 'fixed'))
+    proc = CpiProcessor(core, float(opts.get('mem', MEM_LIMIT_MB)))
+    try:
+        chunk = proc.scans_per_chunk(rec)
+    except ValueError as e:
+        sys.exit(f"Error: {e}")
+
+    print("\n=== OUT-OF-CORE CPI ===")
+    print(f"Recording: {src}, {rec.n_scans} scans of {rec.n_chirps}x{rec.n_samples} "
+          f"({rec.n_scans * rec.scan_bytes / 1e6:.1f} MB)")
+    print(f"Mode: {core.mode}, ceiling {proc.mem_limit / 2**20:.0f} MB, "
+          f"{proc.scan_peak_bytes(rec) / 2**20:.1f} MB/scan -> "
+          f"{chunk} scans per chunk")
+    t0 = time.perf_counter()
+    store = proc.run(rec, out_dir, rdm='rdm' in opts, restart='restart' in opts)
+    dt = time.perf_counter() - t0
+    print(f"Detections: {len(store)} over {store.n_scans} scans "
+          f"({len(store) / max(store.n_scans, 1):.1f}/scan)")
+    print(f"Time: {dt:.1f} s ({store.n_scans / max(dt, 1e-9):.1f} scans/s)")
+    print(f"Written: {out_dir}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+ADR_kernels.py
+Optional JIT kernels for the loops that do not vectorize
+OS-CFAR rank selection (the k-th smallest of each cell's reference
+window) and the tws_tracker per-scan track-file pass (predict, the
+sequential associate/update over track slots, new-track allocation).
+Each kernel is plain scalar Python compiled with numba when it is
+installed, and the NumPy implementation is the reference everywhere
+else. numba is imported and the kernels compiled on first use, with
+cache=True so the machine code is kept in __pycache__ and later
+processes skip the compile. ADR_JIT=0 in the environment forces the
+NumPy path.
+
+  python ADR_kernels.py     backend, compile/cached load time, parity, speed
+  python -m pytest test_ADR_kernels.py     parity only
+"""
+
+import os
+import sys
+import time
+import numpy as np
+
+_jit = {}
+_numba = None
+
+def _load_numba():
+    global _numba
+    if _numba is None:
+        if os.environ.get('ADR_JIT', '1') == '0':
+            _numba = False
+        else:
+            try:
+                import numba
+                _numba = numba
+            except ImportError:
+                _numba = False
+    return _numba
+
+def backend():
+    """'numba' when the JIT kernels are used, else 'numpy'."""
+    return 'numba' if _load_numba() else 'numpy'
+
+def _compiled(fn):
+    """numba.njit(cache=True) version of fn, built once; None without numba."""
+    numba = _load_numba()
+    if not numba:
+        return None
+    if fn.__name__ not in _jit:
+        _jit[fn.__name__] = numba.njit(cache=True, nogil=True)(fn)
+    return _jit[fn.__name__]
+
+# =============================================================================
+# OS-CFAR rank selection
+# =============================================================================
+
+def cfar_rank_numpy(padded, b, origin, offsets, rank_idx, chunk=8192):
+    """rank_idx-th smallest reference value per cell (reference).
+
+    padded: (batch, flat padded map); cell i's references sit at
+    padded[b[i], origin[i] + offsets]. Cells are gathered chunk at a time.
+    """
+    out = np.empty(len(b), dtype=np.int64)
+    for lo in range(0, len(b), chunk):
+        sl = slice(lo, lo + chunk)
+        refs = padded[b[sl, None], origin[sl, None] + offsets[None, :]]
+        out[sl] = np.partition(refs, rank_idx, axis=-1)[:, rank_idx]
+    return out
+
+def _cfar_rank_loop(padded, b, origin, offsets, rank_idx, out):
+    # Gather then quickselect (Hoare partition) per cell
+    n_ref = offsets.shape[0]
+    buf = np.empty(n_ref, dtype=np.int64)
+    for i in range(b.shape[0]):
+        row = b[i]
+        o = origin[i]
+        for j in range(n_ref):
+            buf[j] = padded[row, o + offsets[j]]
+        lo = 0
+        hi = n_ref - 1
+        while lo < hi:
+            pivot = buf[(lo + hi) // 2]
+            x = lo
+            y = hi
+            while x <= y:
+                while buf[x] < pivot:
+                    x += 1
+                while buf[y] > pivot:
+                    y -= 1
+                if x <= y:
+                    t = buf[x]
+                    buf[x] = buf[y]
+                    buf[y] = t
+                    x += 1
+                    y -= 1
+            if rank_idx <= y:
+                hi = y
+            elif rank_idx >= x:
+                lo = x
+            else:
+                break
+        out[i] = buf[rank_idx]
+
+def cfar_rank(padded, b, origin, offsets, rank_idx, chunk=8192, jit=None):
+    """JIT kernel when available (jit=None), NumPy when jit=False.
+
+    jit=True without numba runs the kernel source uncompiled (parity checks).
+    """
+    kernel = _compiled(_cfar_rank_loop) if jit is not False else None
+    if kernel is None:
+        if jit:
+            return _run_python(_cfar_rank_loop, padded, b, origin, offsets, rank_idx)
+        return cfar_rank_numpy(padded, b, origin, offsets, rank_idx, chunk)
+    out = np.empty(len(b), dtype=np.int64)
+    kernel(padded, np.ascontiguousarray(b, dtype=np.int64),
+           np.ascontiguousarray(origin, dtype=np.int64),
+           np.ascontiguousarray(offsets, dtype=np.int64), int(rank_idx), out)
+    return out
+
+def _run_python(loop, padded, b, origin, offsets, rank_idx):
+    """The kernel source run uncompiled (parity checks without numba)."""
+    out = np.empty(len(b), dtype=np.int64)
+    loop(padded, np.asarray(b, dtype=np.int64), np.asarray(origin, dtype=np.int64),
+         np.asarray(offsets, dtype=np.int64), int(rank_idx), out)
+    return out
+
+# =============================================================================
+# tws_tracker scan pass
+# =============================================================================
+
+def _tracker_scan_loop(active, status, range_pos, dopp_pos, range_vel, dopp_vel,
+                       hit_count, miss_count, quality, age,
+                       det_valid, det_assoc, det_range, det_dopp, det_count, best, params):
+    # params: gate_r, gate_d, alpha_r, alpha_d, beta_r, beta_d, init_hits,
+    # coast_max; best: best_distance, best_det_idx (carried across tracks
+    # and scans like the RTL signals). Widths match ADR_tws_tracker.
+    gate_r = params[0]
+    gate_d = params[1]
+    alpha_r = params[2]
+    alpha_d = params[3]
+    beta_r = params[4]
+    beta_d = params[5]
+    init_hits = params[6]
+    coast_max = params[7]
+    n_trk = active.shape[0]
+    n_det = det_valid.shape[0]
+
+    # ST_PREDICT
+    for t in range(n_trk):
+        if active[t]:
+            range_pos[t] = ((range_pos[t] + range_vel[t] + 2048) & 4095) - 2048
+            dopp_pos[t] = ((dopp_pos[t] + dopp_vel[t] + 256) & 511) - 256
+            age[t] = (age[t] + 1) & 0xFF
+
+    for t in range(n_trk):
+        if not active[t]:
+            continue
+        # ST_ASSOCIATE: every detection is compared with the carried
+        # best_distance, the last passing one wins
+        carry = best[0]
+        found = -1
+        found_d = 0
+        for k in range(n_det):
+            meas_r = (det_range[k] << 2) & 4095
+            meas_d = (det_dopp[k] << 2) & 511
+            dr = abs(range_pos[t] - meas_r)
+            dd = abs(dopp_pos[t] - meas_d)
+            if (det_valid[k] and not det_assoc[k] and dr < 4 * gate_r
+                    and dd < 4 * gate_d and dr + dd < carry):
+                found = k
+                found_d = dr + dd
+        if found >= 0:
+            best[1] = found
+            best[0] = found_d
+        else:
+            best[1] = n_det - 1
+            best[0] = 0xFFFF
+
+        # ST_UPDATE
+        if best[1] < n_det and best[0] < 0xFFFF:
+            k = best[1]
+            det_assoc[k] = True
+            meas_r = (((det_range[k] << 2) + 2048) & 4095) - 2048
+            meas_d = (((det_dopp[k] << 2) + 256) & 511) - 256
+            innov_r = ((meas_r - range_pos[t] + 2048) & 4095) - 2048
+            innov_d = ((meas_d - dopp_pos[t] + 256) & 511) - 256
+            # resize(shift_right(innov * gain, 8), width): sign + low bits
+            g = (innov_r * alpha_r) >> 8
+            g = (g & 2047) - 2048 if g < 0 else g & 2047
+            range_pos[t] = ((range_pos[t] + g + 2048) & 4095) - 2048
+            g = (innov_d * alpha_d) >> 8
+            g = (g & 255) - 256 if g < 0 else g & 255
+            dopp_pos[t] = ((dopp_pos[t] + g + 256) & 511) - 256
+            g = (innov_r * beta_r) >> 8
+            g = (g & 511) - 512 if g < 0 else g & 511
+            range_vel[t] = ((range_vel[t] + g + 512) & 1023) - 512
+            g = (innov_d * beta_d) >> 8
+            g = (g & 127) - 128 if g < 0 else g & 127
+            dopp_vel[t] = ((dopp_vel[t] + g + 128) & 255) - 128
+            hits = hit_count[t]
+            hit_count[t] = (hits + 1) & 0xF
+            miss_count[t] = 0
+            if status[t] == 1 and hits >= init_hits:
+                status[t] = 2
+            elif status[t] == 3:
+                status[t] = 2
+            if quality[t] < 15:
+                quality[t] += 1
+        else:
+            misses = miss_count[t]
+            miss_count[t] = (misses + 1) & 0xF
+            if status[t] == 2:
+                status[t] = 3
+            if misses >= coast_max:
+                active[t] = False
+                status[t] = 0
+            if quality[t] > 0:
+                quality[t] -= 1
+
+    # ST_INITIATE: first free slot per unassociated detection, stopping at
+    # det_count - 1 (6-bit) or straight away when det_count = 0
+    k = 0
+    while True:
+        if det_valid[k] and not det_assoc[k]:
+            for t in range(n_trk):
+                if not active[t]:
+                    active[t] = True
+                    status[t] = 1
+                    range_pos[t] = (((det_range[k] << 2) + 2048) & 4095) - 2048
+                    dopp_pos[t] = (((det_dopp[k] << 2) + 256) & 511) - 256
+                    range_vel[t] = 0
+                    dopp_vel[t] = 0
+                    hit_count[t] = 1
+                    miss_count[t] = 0
+                    quality[t] = 1
+                    age[t] = 0
+                    break
+        if det_count == 0 or k == (det_count - 1) % n_det:
+            break
+        k += 1
+
+def tracker_scan_kernel(jit=None):
+    """Compiled _tracker_scan_loop, the uncompiled source when jit=True and
+    numba is missing, or None for the NumPy methods."""
+    if jit is False:
+        return None
+    kernel = _compiled(_tracker_scan_loop)
+    if kernel is None and jit:
+        return _tracker_scan_loop
+    return kernel
+
+# =============================================================================
+# Parity check
+# =============================================================================
+
+def check_cfar(n_maps=4, n_range=64, n_doppler=32, seed=0, jit=True):
+    """Mismatching cells between the kernel and NumPy os_cfar_2d paths."""
+    from ADR_blocks import os_cfar_2d
+    rng = np.random.default_rng(seed)
+    mag = rng.rayleigh(300.0, (n_maps, n_range, n_doppler)).astype(np.int64)
+    mag[:, 20, 5] += 5000
+    mag[:, 40:43, 10] += 3000
+    bad = 0
+    for kw in (dict(), dict(ref_range=2, ref_doppler=2, guard_range=1, guard_doppler=1),
+               dict(rank_pct=50), dict(scale_override=3)):
+        a, ta = os_cfar_2d(mag, return_threshold=True, jit=jit, **kw)
+        b, tb = os_cfar_2d(mag, return_threshold=True, jit=False, **kw)
+        bad += int((a != b).sum() + (ta != tb).sum())
+    return bad
+
+def check_tracker(n_scans=60, seed=0, jit=True):
+    """Differing report rows between the kernel and NumPy tracker paths."""
+    from ADR_tws_tracker import TwsTracker
+    rng = np.random.default_rng(seed)
+    a, b = TwsTracker(jit=jit), TwsTracker(jit=False)
+    tgt = np.array([[100.0, 20.0, -0.7], [600.0, 90.0, 1.3], [300.0, 64.0, 0.0]])
+    bad = 0
+    for k in range(n_scans):
+        pos = tgt[:, 0] + k * tgt[:, 2]
+        dets = np.column_stack([np.rint(pos + rng.normal(0, 0.6, len(tgt))), tgt[:, 1]])
+        dets = dets[rng.random(len(dets)) > 0.15]
+        clutter = rng.integers(0, [1024, 128], size=(rng.integers(0, 80), 2))
+        dets = np.vstack([dets, clutter]).astype(np.int64)
+        ra, na = a.scan(dets)
+        rb, nb = b.scan(dets)
+        bad += int(na != nb or len(ra) != len(rb) or bool((ra != rb).any()))
+    return bad
+
+def main():
+    print("\n=== KERNELS ===")
+    print(f"Backend: {backend()}")
+    if backend() == 'numba':
+        from ADR_blocks import os_cfar_2d
+        t0 = time.perf_counter()
+        os_cfar_2d(np.ones((1, 32, 16), dtype=np.int64))
+        print(f"First call (compile or load from cache): {time.perf_counter() - t0:.2f} s")
+    else:
+        print("numba not available (or ADR_JIT=0); checking the kernel source uncompiled")
+
+    t0 = time.perf_counter()
+    bad_cfar = check_cfar()
+    bad_trk = check_tracker()
+    print(f"Parity: os_cfar_2d {'OK' if bad_cfar == 0 else f'{bad_cfar} mismatches'}, "
+          f"tws_tracker {'OK' if bad_trk == 0 else f'{bad_trk} mismatching scans'} "
+          f"({time.perf_counter() - t0:.1f} s)")
+
+    if backend() == 'numba':
+        from ADR_blocks import os_cfar_2d
+        mag = np.random.default_rng(1).rayleigh(300.0, (1024, 128)).astype(np.int64)
+        for jit in (None, False):
+            t0 = time.perf_counter()
+            os_cfar_2d(mag, jit=jit)
+            print(f"os_cfar_2d 1024x128 {'numba' if jit is None else 'numpy'}: "
+                  f"{1e3 * (time.perf_counter() - t0):.0f} ms")
+    sys.exit(1 if bad_cfar or bad_trk else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+ADR_magnitude_sweep.py
+Exhaustive error characterization of magnitude_calc
+Evaluates the bit-exact alpha-max-beta-min approximation against the true
+magnitude over the whole 2^32 (I, Q) input space, for the RTL estimator
+and any number of alternative shift-add (alpha, beta) pairs in the same
+pass. Work is split into memory-bounded chunks across all cores.
+
+The estimator only sees (max(|I|,|Q|), min(|I|,|Q|)), so the sweep runs
+over the max >= min triangle of |I|,|Q| in 0..32768 and weights each pair
+by the number of (I, Q) words that map to it. The histograms are identical
+to enumerating all 2^32 words (run with --exhaustive to check).
+"""
+
+import os
+import sys
+import time
+import numpy as np
+from dataclasses import dataclass
+from multiprocessing import Pool
+
+from ADR_fixed import unpack_iq, abs_unsigned, shift_right, wrap
+from ADR_blocks import DATA_WIDTH, MAG_WIDTH, cfar_ref_mask
+
+# |I| or |Q| ranges over 0..2**(DATA_WIDTH-1) (-32768 -> 32768)
+A_MAX = 2**(DATA_WIDTH-1)
+
+# Cells per chunk (bounds per-worker memory to a few hundred MB)
+CHUNK_CELLS = 1 << 22
+
+# Histogram layout
+REL_BINS = np.linspace(-0.5, 0.5, 2001)      # relative error (approx/true - 1)
+ABS_LO, ABS_HI = -4096, 4096                  # absolute error in LSB, 1-LSB bins
+
+@dataclass(frozen=True)
+class ShiftAdd:
+    """alpha*max + beta*min built from truncating shifts, as in magnitude_calc.
+
+    Each term is (sign, shift): +1, 2 adds x >> 2. out_width wraps the sum
+    like the OUT_WIDTH-bit register.
+    """
+    name: str
+    max_terms: tuple
+    min_terms: tuple
+    out_width: int = MAG_WIDTH
+
+    @property
+    def alpha(self):
+        return sum(s * 2.0**-k for s, k in self.max_terms)
+
+    @property
+    def beta(self):
+        return sum(s * 2.0**-k for s, k in self.min_terms)
+
+    def __call__(self, mx, mn):
+        acc = np.zeros(np.shape(mx), dtype=np.int64)
+        for s, k in self.max_terms:
+            acc += s * shift_right(mx, k)
+        for s, k in self.min_terms:
+            acc += s * shift_right(mn, k)
+        return wrap(acc, self.out_width, signed=False)
+
+# magnitude_calc: max + min/4 + min/8
+RTL = ShiftAdd('rtl max+3/8min', ((1, 0),), ((1, 2), (1, 3)))
+
+ALTERNATIVES = (
+    ShiftAdd('max+1/2min', ((1, 0),), ((1, 1),)),
+    ShiftAdd('max+1/4min', ((1, 0),), ((1, 2),)),
+    ShiftAdd('15/16max+15/32min', ((1, 0), (-1, 4)), ((1, 1), (-1, 5))),
+    ShiftAdd('31/32max+13/32min', ((1, 0), (-1, 5)), ((1, 2), (1, 3), (1, 5))),
+)
+
+def _sign_weight(a):
+    """(I or Q) values with |x| == a: one for 0 and 32768, two otherwise."""
+    return np.where((a == 0) | (a == A_MAX), 1, 2)
+
+def triangle_blocks(chunk_cells=CHUNK_CELLS):
+    """Split max values 0..A_MAX into blocks of about chunk_cells triangle cells."""
+    blocks = []
+    lo = 0
+    while lo <= A_MAX:
+        hi = lo
+        cells = 0
+        while hi <= A_MAX and cells + hi + 1 <= chunk_cells:
+            cells += hi + 1
+            hi += 1
+        hi = max(hi, lo + 1)
+        blocks.append((lo, hi))
+        lo = hi
+    return blocks
+
+def _triangle_cells(lo, hi):
+    """(max, min, weight) for max in [lo, hi), 0 <= min <= max."""
+    mx_vals = np.arange(lo, hi, dtype=np.int64)
+    counts = mx_vals + 1
+    mx = np.repeat(mx_vals, counts)
+    starts = np.cumsum(counts) - counts
+    mn = np.arange(len(mx), dtype=np.int64) - np.repeat(starts, counts)
+    # Ordered (|I|, |Q|) pairs: off-diagonal cells occur both ways round
+    w = _sign_weight(mx) * _sign_weight(mn) * np.where(mx == mn, 1, 2)
+    return mx, mn, w.astype(np.float64)
+
+class ErrorStats:
+    """Weighted error accumulators for one estimator."""
+
+    def __init__(self, name):
+        self.name = name
+        self.rel_hist = np.zeros(len(REL_BINS) - 1)
+        self.abs_hist = np.zeros(ABS_HI - ABS_LO + 1)
+        self.n = 0.0
+        self.sum_rel = 0.0
+        self.sum_rel2 = 0.0
+        self.sum_abs = 0.0
+        self.sum_abs2 = 0.0
+        self.sum_est = 0.0
+        self.sum_true = 0.0
+        # (value, max, min) of the extremes
+        self.worst = dict(rel_max=(-np.inf, 0, 0), rel_min=(np.inf, 0, 0),
+                          abs_max=(-np.inf, 0, 0), abs_min=(np.inf, 0, 0))
+
+    def add(self, est, true, mx, mn, w):
+        err = est - true
+        nz = true > 0
+        rel = np.zeros_like(true)
+        rel[nz] = est[nz] / true[nz] - 1.0
+        wr = w * nz
+
+        idx = np.clip(np.searchsorted(REL_BINS, rel, side='right') - 1, 0, len(self.rel_hist) - 1)
+        self.rel_hist += np.bincount(idx, weights=wr, minlength=len(self.rel_hist))
+        aidx = np.clip(np.rint(err).astype(np.int64), ABS_LO, ABS_HI) - ABS_LO
+        self.abs_hist += np.bincount(aidx, weights=w, minlength=len(self.abs_hist))
+
+        self.n += w.sum()
+        self.sum_rel += (wr * rel).sum()
+        self.sum_rel2 += (wr * rel * rel).sum()
+        self.sum_abs += (w * err).sum()
+        self.sum_abs2 += (w * err * err).sum()
+        self.sum_est += (w * est).sum()
+        self.sum_true += (w * true).sum()
+
+        for key, vals, pick, better in (('rel_max', np.where(nz, rel, -np.inf), np.argmax, np.greater),
+                                        ('rel_min', np.where(nz, rel, np.inf), np.argmin, np.less),
+                                        ('abs_max', err, np.argmax, np.greater),
+                                        ('abs_min', err, np.argmin, np.less)):
+            k = pick(vals)
+            if better(vals[k], self.worst[key][0]):
+                self.worst[key] = (float(vals[k]), int(mx[k]), int(mn[k]))
+
+    def merge(self, other):
+        self.rel_hist += other.rel_hist
+        self.abs_hist += other.abs_hist
+        for attr in ('n', 'sum_rel', 'sum_rel2', 'sum_abs', 'sum_abs2', 'sum_est', 'sum_true'):
+            setattr(self, attr, getattr(self, attr) + getattr(other, attr))
+        for key, (v, a, b) in other.worst.items():
+            cur = self.worst[key][0]
+            if (key.endswith('max') and v > cur) or (key.endswith('min') and v < cur):
+                self.worst[key] = (v, a, b)
+
+    @property
+    def n_rel(self):
+        return self.rel_hist.sum()
+
+    def summary(self):
+        mean_rel = self.sum_rel / self.n_rel
+        rms_rel = np.sqrt(self.sum_rel2 / self.n_rel)
+        mean_abs = self.sum_abs / self.n
+        rms_abs = np.sqrt(self.sum_abs2 / self.n)
+        gain_db = 20 * np.log10(self.sum_est / self.sum_true)
+        return mean_rel, rms_rel, mean_abs, rms_abs, gain_db
+
+def _sweep_block(args):
+    lo, hi, estimators = args
+    mx, mn, w = _triangle_cells(lo, hi)
+    true = np.hypot(mx, mn)
+    out = []
+    for est in estimators:
+        st = ErrorStats(est.name)
+        st.add(est(mx, mn).astype(np.float64), true, mx, mn, w)
+        out.append(st)
+    return out
+
+def _exhaustive_block(args):
+    lo, hi, estimators = args
+    i, q = unpack_iq(np.arange(lo, hi, dtype=np.int64), DATA_WIDTH)
+    ai = abs_unsigned(i, DATA_WIDTH)
+    aq = abs_unsigned(q, DATA_WIDTH)
+    mx = np.maximum(ai, aq)
+    mn = np.minimum(ai, aq)
+    true = np.hypot(mx, mn)
+    w = np.ones(len(mx))
+    out = []
+    for est in estimators:
+        st = ErrorStats(est.name)
+        st.add(est(mx, mn).astype(np.float64), true, mx, mn, w)
+        out.append(st)
+    return out
+
+def characterize(estimators=(RTL,) + ALTERNATIVES, processes=None, exhaustive=False,
+                 chunk_cells=CHUNK_CELLS, progress=False):
+    """Run the sweep; returns one merged ErrorStats per estimator."""
+    estimators = tuple(estimators)
+    if exhaustive:
+        total = 1 << (2 * DATA_WIDTH)
+        tasks = [(lo, min(lo + chunk_cells, total), estimators)
+                 for lo in range(0, total, chunk_cells)]
+        fn = _exhaustive_block
+    else:
+        tasks = [(lo, hi, estimators) for lo, hi in triangle_blocks(chunk_cells)]
+        fn = _sweep_block
+
+    merged = [ErrorStats(e.name) for e in estimators]
+    with Pool(processes or os.cpu_count()) as pool:
+        for k, part in enumerate(pool.imap_unordered(fn, tasks)):
+            for m, p in zip(merged, part):
+                m.merge(p)
+            if progress:
+                print(f"\r  {k + 1}/{len(tasks)} chunks", end='', flush=True)
+    if progress:
+        print()
+    return merged
+
+# =============================================================================
+# CFAR impact
+# =============================================================================
+
+def cfar_bias(estimator, n_trials=20_000, sigma=2000.0, seed=0,
+              ref_range=4, ref_doppler=4, guard_range=2, guard_doppler=1,
+              rank_pct=75, scale_min=2, scale_max=6, scale_nom=4, n_phase=4096):
+    """Noise-only OS-CFAR threshold bias and false-alarm rate.
+
+    Draws complex Gaussian I/Q (int16) reference windows and applies the
+    os_cfar_2d rank/mean/adaptive-scale rule with the estimator and with
+    the true magnitude. The nominal Pfa (~1e-10) is far below what Monte
+    Carlo can see, so the CUT is handled analytically: given threshold T,
+    P(|Z| > T) = exp(-T^2 / 2 sigma^2), and the estimator reads |Z| as
+    c(phase) * |Z| with the phase uniform.
+
+    Returns (threshold bias dB, Pfa true, Pfa estimator); the bias is the
+    median ratio of the two thresholds.
+    """
+    n_ref = int(cfar_ref_mask(ref_range, ref_doppler, guard_range, guard_doppler).sum())
+    rank_idx = min((n_ref * rank_pct) // 100, n_ref - 1)
+    rng = np.random.default_rng(seed)
+    iq = np.clip(np.rint(rng.normal(0, sigma, (2, n_trials, n_ref))),
+                 -A_MAX, A_MAX - 1).astype(np.int64)
+    ai = abs_unsigned(iq[0], DATA_WIDTH)
+    aq = abs_unsigned(iq[1], DATA_WIDTH)
+    mx, mn = np.maximum(ai, aq), np.minimum(ai, aq)
+
+    def threshold(refs):
+        ranked = np.partition(refs, rank_idx, axis=1)[:, rank_idx]
+        mean = refs.sum(axis=1) / n_ref
+        scale = np.where(ranked > 1.5 * mean, scale_max,
+                         np.where(ranked < 0.5 * mean, scale_min, scale_nom))
+        return ranked * scale
+
+    thr_t = threshold(np.hypot(mx, mn))
+    thr_e = threshold(estimator(mx, mn).astype(np.float64))
+
+    # Estimator gain vs phase for a full-scale-ish vector (truncation negligible)
+    th = (np.arange(n_phase) + 0.5) * (np.pi / 2) / n_phase
+    r = 2.0**(DATA_WIDTH - 2)
+    a, b = np.abs(r * np.cos(th)), np.abs(r * np.sin(th))
+    c = estimator(np.maximum(a, b).astype(np.int64),
+                  np.minimum(a, b).astype(np.int64)) / r
+
+    pfa_t = np.exp(-thr_t**2 / (2 * sigma**2)).mean()
+    pfa_e = np.exp(-(thr_e[:, None] / c[None, :])**2 / (2 * sigma**2)).mean()
+    bias_db = 20 * np.log10(np.median(thr_e / thr_t))
+    return float(bias_db), float(pfa_t), float(pfa_e)
+
+def main():
+    exhaustive = '--exhaustive' in sys.argv
+    n_proc = os.cpu_count()
+
+    print(f"Characterizing magnitude_calc (DATA_WIDTH={DATA_WIDTH}, OUT_WIDTH={MAG_WIDTH}) "
+          f"over 2^{2 * DATA_WIDTH} inputs, {n_proc} processes"
+          f"{' (exhaustive enumeration)' if exhaustive else ''}")
+    t0 = time.perf_counter()
+    estimators = (RTL,) + ALTERNATIVES
+    stats = characterize(estimators, exhaustive=exhaustive, progress=True)
+    print(f"Done in {time.perf_counter() - t0:.1f} s "
+          f"({stats[0].n:.0f} input words)")
+
+    print("\n=== MAGNITUDE ERROR ===")
+    print(f"{'estimator':22s} {'alpha':>7s} {'beta':>7s} {'mean%':>7s} {'rms%':>6s} "
+          f"{'max%':>7s} {'min%':>7s} {'meanLSB':>8s} {'gain dB':>8s}")
+    for est, st in zip(estimators, stats):
+        mean_rel, rms_rel, mean_abs, rms_abs, gain_db = st.summary()
+        print(f"{est.name:22s} {est.alpha:7.4f} {est.beta:7.4f} {100 * mean_rel:7.3f} "
+              f"{100 * rms_rel:6.3f} {100 * st.worst['rel_max'][0]:7.2f} "
+              f"{100 * st.worst['rel_min'][0]:7.2f} {mean_abs:8.2f} {gain_db:8.3f}")
+
+    print("\nWorst-case inputs (|I|, |Q|) for", RTL.name)
+    for key, label in (('rel_max', 'largest overestimate'), ('rel_min', 'largest underestimate'),
+                       ('abs_max', 'largest + error (LSB)'), ('abs_min', 'largest - error (LSB)')):
+        v, a, b = stats[0].worst[key]
+        unit = f"{100 * v:.2f}%" if key.startswith('rel') else f"{v:.1f} LSB"
+        print(f"  {label:24s} {unit:>10s} at ({a}, {b})")
+
+    rel = stats[0].rel_hist / stats[0].n_rel
+    centers = 0.5 * (REL_BINS[:-1] + REL_BINS[1:])
+    print("\nRelative error histogram (RTL, 1% bins, share of inputs):")
+    edges = np.arange(-0.10, 0.1001, 0.01)
+    shares = [rel[(centers >= lo) & (centers < hi)].sum() for lo, hi in zip(edges[:-1], edges[1:])]
+    peak = max(max(shares), 1e-12)
+    for lo, hi, share in zip(edges[:-1], edges[1:], shares):
+        print(f"  {100 * lo:+5.0f}% .. {100 * hi:+4.0f}% |{'#' * int(round(50 * share / peak)):<50s}| "
+              f"{100 * share:6.3f}%")
+
+    print("\n=== CFAR IMPACT (noise only, N_REF=128, rank 75%) ===")
+    print(f"{'estimator':22s} {'thr bias dB':>11s} {'Pfa true':>10s} {'Pfa est':>10s} {'ratio':>7s}")
+    for est in estimators:
+        bias_db, pfa_t, pfa_e = cfar_bias(est)
+        print(f"{est.name:22s} {bias_db:11.3f} {pfa_t:10.2e} {pfa_e:10.2e} "
+              f"{pfa_e / pfa_t:7.2f}")
+
+if __name__ == "__main__":
+    main()
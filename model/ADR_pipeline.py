@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+ADR_pipeline.py
+Frame-level model of radar_core
+Window -> Range FFT -> Corner Turn -> MTI -> Window -> Doppler FFT
+       -> Magnitude -> 2D OS-CFAR
+Two execution modes:
+  fixed  integer arithmetic of the RTL blocks (sign-off reference)
+  fast   float32 batched FFTs, window, canceller and FFT outputs rounded
+         and clipped like the RTL, prescreened OS-CFAR; range_headroom
+         optionally scales the range FFT down further (not RTL behaviour)
+"""
+
+import time
+import numpy as np
+from dataclasses import dataclass, field
+
+from ADR_blocks import (window_coefs, apply_window, mti_cancel, magnitude,
+                        os_cfar_2d, DATA_WIDTH, COEF_WIDTH, NOTCH_MODE)
+
+# Radar parameters (match VHDL)
+N_RANGE = 1024
+N_DOPPLER = 128
+
+MODES = ('fixed', 'fast')
+
+# Error-budget acceptance limits for trusting fast mode
+MAG_RMS_DB_LIMIT = 0.5       # RMS magnitude error over detected cells
+DET_MISMATCH_LIMIT = 0.02    # fraction of detections that disagree
+
+# Bits of gain after the range FFT: the Doppler window_multiplier (Q14
+# extraction, x2) plus the pulse canceller (x2 for mode 2, x4 for mode 3).
+# The RTL xfft leaves none of this as headroom, so full-scale range peaks
+# saturate downstream; fast mode can reserve it for studies
+WINDOW_GAIN_BITS = 1
+MTI_GAIN_BITS = {0: 0, 2: 1, 3: 2}
+
+def gain_headroom(notch_mode=NOTCH_MODE):
+    """range_headroom that keeps a full-scale range peak out of saturation."""
+    return WINDOW_GAIN_BITS + MTI_GAIN_BITS[notch_mode]
+
+def _block_exponent(re, im, axis, headroom=0):
+    """Per-transform shift that brings the block peak inside DATA_WIDTH bits.
+
+    Stands in for the xfft block-floating-point scaling; radar_core drops
+    the BLK_EXP tuser field, so each transform keeps its own scale.
+    headroom leaves that many bits free for gain in later stages.
+    """
+    peak = np.maximum(np.abs(re), np.abs(im)).max(axis=axis, keepdims=True)
+    _, exp = np.frexp(peak)
+    return np.maximum(exp - (DATA_WIDTH - 1 - headroom), 0)
+
+def xfft_fixed(i, q, axis, headroom=0):
+    """Block-floating-point FFT with convergent rounding to DATA_WIDTH bits.
+
+    Exact transform, one block exponent per transform, round-half-even,
+    then saturation. Matches the xfft core configuration (BFP, convergent
+    rounding, natural order) but not its internal per-stage rounding.
+    """
+    x = np.fft.fft(i.astype(np.float64) + 1j * q.astype(np.float64), axis=axis)
+    shift = _block_exponent(x.real, x.imag, axis, headroom)
+    scale = np.ldexp(1.0, -shift)
+    lim = 2**(DATA_WIDTH-1)
+    re = np.clip(np.round(x.real * scale), -lim, lim - 1).astype(np.int16)
+    im = np.clip(np.round(x.imag * scale), -lim, lim - 1).astype(np.int16)
+    return re, im
+
+def xfft_fast(x, axis, headroom=0):
+    """float32 FFT with the same per-transform block scaling and output
+    rounding as xfft_fixed (no saturation)."""
+    y = np.fft.fft(x, axis=axis)
+    shift = _block_exponent(y.real, y.imag, axis, headroom)
+    y = (y * np.ldexp(np.float32(1.0), -shift).astype(np.float32)).astype(np.complex64)
+    return (np.rint(y.real) + 1j * np.rint(y.imag)).astype(np.complex64)
+
+def _clip_fast(re, im):
+    lim = 2**(DATA_WIDTH-1)
+    return (np.clip(re, -lim, lim - 1) + 1j * np.clip(im, -lim, lim - 1)).astype(np.complex64)
+
+def window_fast(x, coefs):
+    """Complex float window with window_multiplier's rounding and saturation.
+
+    The RTL adds a full output LSB before truncating, so outputs sit 1/2 LSB
+    high on average; after the pulse canceller that bias leaves a Doppler-0
+    line the fixed path detects. The coefficient gain is at most 2, so a
+    DATA_WIDTH input never reaches the RTL's wrap and a clip is exact.
+    """
+    y = x * (coefs / np.float32(2**(COEF_WIDTH-2))).astype(np.float32)
+    return _clip_fast(np.floor(y.real + 1), np.floor(y.imag + 1))
+
+def mti_fast(x, mode, axis=-1):
+    """Complex float pulse canceller, saturated like the RTL."""
+    if mode == 0:
+        return x
+    y = mti_cancel(x, mode, axis=axis)
+    return _clip_fast(y.real, y.imag)
+
+@dataclass
+class FrameResult:
+    mag: np.ndarray           # (n_range, n_doppler)
+    cfar: np.ndarray          # CUT value where detected, else 0
+    sat_range: bool = False   # range window_multiplier saturation_flag seen
+    sat_mti: bool = False     # doppler_notch clipped to MIN_V/MAX_V
+    sat_doppler: bool = False # Doppler window_multiplier saturation_flag seen
+
+    @property
+    def saturated(self):
+        return self.sat_range or self.sat_mti or self.sat_doppler
+
+    def detections(self):
+        """[range, doppler, mag] rows in radar_core output (raster) order."""
+        r, d = np.nonzero(self.cfar)
+        return np.column_stack([r, d, self.cfar[r, d]]).astype(np.int64)
+
+@dataclass
+class RadarCore:
+    n_range: int = N_RANGE
+    n_doppler: int = N_DOPPLER
+    mode: str = 'fixed'
+    notch_mode: int = NOTCH_MODE
+    mti_bypass: bool = False
+    cfar: dict = field(default_factory=dict)
+    range_headroom: int = 0   # fast mode only: extra range FFT scaling (not RTL)
+
+    def __post_init__(self):
+        if self.mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}, got {self.mode!r}")
+        if self.range_headroom and self.mode == 'fixed':
+            raise ValueError("range_headroom is not RTL behaviour; use it with mode='fast'")
+        self.range_win = window_coefs(self.n_range)
+        self.doppler_win = window_coefs(self.n_doppler)
+
+    def process(self, i, q):
+        """Process frames of ADC samples.
+
+        i, q: int16 arrays (..., n_doppler chirps, n_range samples).
+        Returns a FrameResult whose arrays carry the same leading axes.
+        """
+        i = np.asarray(i)
+        q = np.asarray(q)
+        if i.shape[-2:] != (self.n_doppler, self.n_range):
+            raise ValueError(f"expected (..., {self.n_doppler}, {self.n_range}) "
+                             f"frames, got {i.shape}")
+        if self.mode == 'fixed':
+            return self._process_fixed(i, q)
+        return self._process_fast(i, q)
+
+    def _process_fixed(self, i, q):
+        mode = 0 if self.mti_bypass else self.notch_mode
+        wi, sat_i = apply_window(i, self.range_win, axis=-1)
+        wq, sat_q = apply_window(q, self.range_win, axis=-1)
+        ri, rq = xfft_fixed(wi, wq, axis=-1)
+        # Corner turn: (chirp, range) -> (range, chirp)
+        ri = np.swapaxes(ri, -1, -2)
+        rq = np.swapaxes(rq, -1, -2)
+        mi, sat_mi = mti_cancel(ri, mode, axis=-1, return_saturated=True)
+        mq, sat_mq = mti_cancel(rq, mode, axis=-1, return_saturated=True)
+        di, sat_di = apply_window(mi, self.doppler_win, axis=-1)
+        dq, sat_dq = apply_window(mq, self.doppler_win, axis=-1)
+        fi, fq = xfft_fixed(di, dq, axis=-1)
+        mag = magnitude(fi, fq)
+        return FrameResult(mag=mag, cfar=os_cfar_2d(mag, **self.cfar),
+                           sat_range=bool(sat_i or sat_q), sat_mti=sat_mi or sat_mq,
+                           sat_doppler=bool(sat_di or sat_dq))
+
+    def _process_fast(self, i, q):
+        mode = 0 if self.mti_bypass else self.notch_mode
+        x = i.astype(np.float32) + 1j * q.astype(np.float32)
+        x = xfft_fast(window_fast(x, self.range_win), axis=-1, headroom=self.range_headroom)
+        x = np.swapaxes(x, -1, -2)
+        x = mti_fast(x, mode, axis=-1)
+        x = xfft_fast(window_fast(x, self.doppler_win), axis=-1)
+        mag = magnitude(x.real, x.imag)
+        cfar = dict(self.cfar, prescreen=True)
+        return FrameResult(mag=mag, cfar=os_cfar_2d(mag, **cfar))
+
+@dataclass
+class ErrorBudget:
+    frames: list
+    mag_rms_db: float
+    mag_max_db: float
+    det_fixed: int
+    det_fast: int
+    det_missed: int
+    det_extra: int
+    t_fixed: float
+    t_fast: float
+    sat_range: bool = False     # saturation in the fixed reference, per stage
+    sat_mti: bool = False
+    sat_doppler: bool = False
+
+    @property
+    def det_mismatch(self):
+        return (self.det_missed + self.det_extra) / max(self.det_fixed, 1)
+
+    @property
+    def trusted(self):
+        return self.mag_rms_db <= MAG_RMS_DB_LIMIT and self.det_mismatch <= DET_MISMATCH_LIMIT
+
+    def report(self):
+        lines = [
+            "=== FAST MODE ERROR BUDGET ===",
+            f"Sampled frames: {len(self.frames)} {self.frames}",
+            f"Magnitude error (detected cells): RMS {self.mag_rms_db:.3f} dB, "
+            f"max {self.mag_max_db:.3f} dB",
+            f"Detections: fixed {self.det_fixed}, fast {self.det_fast}, "
+            f"missed {self.det_missed}, extra {self.det_extra} "
+            f"({100 * self.det_mismatch:.2f}% mismatch)",
+            f"Fixed-path saturation: range window {'yes' if self.sat_range else 'no'}, "
+            f"MTI {'yes' if self.sat_mti else 'no'}, "
+            f"Doppler window {'yes' if self.sat_doppler else 'no'}",
+            f"Time per frame: fixed {1e3 * self.t_fixed:.1f} ms, "
+            f"fast {1e3 * self.t_fast:.1f} ms "
+            f"({self.t_fixed / max(self.t_fast, 1e-12):.1f}x)",
+            f"Fast mode {'TRUSTED' if self.trusted else 'NOT TRUSTED'} "
+            f"(limits: {MAG_RMS_DB_LIMIT} dB RMS, {100 * DET_MISMATCH_LIMIT:.0f}% mismatch)",
+        ]
+        return "\n".join(lines)
+
+def error_budget(i, q, n_sample=4, seed=0, **core_kwargs):
+    """Compare fast mode against fixed mode on a random subset of frames.
+
+    i, q: int16 arrays (frames, n_doppler, n_range).
+    """
+    n_frames = len(i)
+    rng = np.random.default_rng(seed)
+    frames = np.sort(rng.choice(n_frames, size=min(n_sample, n_frames), replace=False))
+
+    fast = RadarCore(mode='fast', **core_kwargs)
+    core_kwargs.pop('range_headroom', None)
+    fixed = RadarCore(mode='fixed', **core_kwargs)
+
+    t0 = time.perf_counter()
+    ref = fixed.process(i[frames], q[frames])
+    t1 = time.perf_counter()
+    out = fast.process(i[frames], q[frames])
+    t2 = time.perf_counter()
+
+    hit_ref = ref.cfar > 0
+    hit_out = out.cfar > 0
+    cells = hit_ref | hit_out
+    err_db = 20 * np.log10((out.mag[cells] + 1.0) / (ref.mag[cells] + 1.0))
+
+    return ErrorBudget(
+        frames=frames.tolist(),
+        mag_rms_db=float(np.sqrt(np.mean(err_db**2))) if err_db.size else 0.0,
+        mag_max_db=float(np.max(np.abs(err_db))) if err_db.size else 0.0,
+        det_fixed=int(hit_ref.sum()),
+        det_fast=int(hit_out.sum()),
+        det_missed=int((hit_ref & ~hit_out).sum()),
+        det_extra=int((hit_out & ~hit_ref).sum()),
+        t_fixed=(t1 - t0) / len(frames),
+        t_fast=(t2 - t1) / len(frames),
+        sat_range=ref.sat_range,
+        sat_mti=ref.sat_mti,
+        sat_doppler=ref.sat_doppler,
+    )
+
+def synth_frames(targets, n_frames=1, n_range=N_RANGE, n_doppler=N_DOPPLER,
+                 noise=50.0, seed=42):
+    """ADC frames with point targets, same signal model as tb_tactical.
+
+    targets: iterable of (range_bin, doppler_bin, amplitude).
+    Returns int16 (i, q), each (n_frames, n_doppler, n_range).
+    """
+    rng = np.random.default_rng(seed)
+    c = np.arange(n_doppler)[:, None]
+    s = np.arange(n_range)[None, :]
+    x = np.zeros((n_doppler, n_range), dtype=np.complex128)
+    for rb, db, amp in targets:
+        x += amp * np.exp(2j * np.pi * (rb * s / n_range + db * c / n_doppler))
+    x = x[None] + noise * (rng.standard_normal((n_frames, n_doppler, n_range)) +
+                           1j * rng.standard_normal((n_frames, n_doppler, n_range)))
+    i = np.clip(np.rint(x.real), -32000, 32000).astype(np.int16)
+    q = np.clip(np.rint(x.imag), -32000, 32000).astype(np.int16)
+    return i, q
+
+def main():
+    n_frames = 8
+    targets = [(300, 40, 2000.0), (310, 44, 1500.0), (700, 90, 800.0)]
+    i, q = synth_frames(targets, n_frames=n_frames)
+
+    for mode in MODES:
+        core = RadarCore(mode=mode)
+        t0 = time.perf_counter()
+        res = core.process(i, q)
+        dt = time.perf_counter() - t0
+        print(f"{mode:5s}: {n_frames} frames in {dt:.2f} s "
+              f"({1e3 * dt / n_frames:.1f} ms/frame), "
+              f"{int((res.cfar > 0).sum())} detections")
+
+    print()
+    print(error_budget(i, q, n_sample=4).report())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+ADR_plot_extract.py
+Plot extraction for Air Defense Radar detections
+Groups adjacent OS-CFAR hits of the same scan into clusters and reduces
+each cluster to one plot (centroid, peak, extent) before tracking
+"""
+
+import numpy as np
+
+# Plot record layout (one row per cluster)
+PLOT_DTYPE = np.dtype([
+    ('scan', np.int32),
+    ('range', np.float64),       # magnitude-weighted centroid (bins)
+    ('doppler', np.float64),     # magnitude-weighted centroid (bins, wrapped)
+    ('peak_range', np.int32),
+    ('peak_doppler', np.int32),
+    ('peak_mag', np.int64),
+    ('sum_mag', np.int64),
+    ('n_cells', np.int32),
+    ('range_extent', np.int32),  # bins spanned in range
+    ('doppler_extent', np.int32),
+])
+
+def scan_ids(detections, n_doppler):
+    """Assign a scan number to each detection.
+
+    Fallback for detection files without SCAN_END markers: radar_core emits
+    CFAR hits in raster order (range-major, Doppler-minor), so a new scan
+    starts wherever the linear cell index stops increasing. Two scans whose
+    hits happen to continue the raster order (a receding target) are
+    merged; ADR_prefetch.load_detection_scans() uses the markers when the
+    file has them, and its scan numbers should be passed as scans.
+    """
+    if len(detections) == 0:
+        return np.zeros(0, dtype=np.int32)
+    cell = detections[:, 0].astype(np.int64) * n_doppler + detections[:, 1]
+    new_scan = np.empty(len(cell), dtype=bool)
+    new_scan[0] = False
+    new_scan[1:] = cell[1:] <= cell[:-1]
+    return np.cumsum(new_scan, dtype=np.int32)
+
+def _neighbour_edges(r, d, n_range, n_doppler, lut):
+    """Edges between 8-connected cells of one scan (each pair listed once).
+
+    lut is a cell -> detection lookup table filled with -1; it is restored
+    before returning so one table serves every scan. Cells outside the map
+    get no edges.
+    """
+    ok = (r >= 0) & (r < n_range) & (d >= 0) & (d < n_doppler)
+    if not ok.all():
+        idx = np.flatnonzero(ok)
+        s, t = _neighbour_edges(r[ok], d[ok], n_range, n_doppler, lut)
+        return idx[s], idx[t]
+    cell = r * n_doppler + d
+    lut[cell] = np.arange(len(r))
+
+    src, dst = [], []
+    # Forward half of the 8-neighbourhood; Doppler wraps (FFT bins are circular)
+    for dr, dd in ((0, 1), (1, -1), (1, 0), (1, 1)):
+        nr = r + dr
+        nd = (d + dd) % n_doppler
+        ok = nr < n_range
+        j = np.full(len(r), -1, dtype=np.int64)
+        j[ok] = lut[nr[ok] * n_doppler + nd[ok]]
+        hit = j >= 0
+        src.append(np.nonzero(hit)[0])
+        dst.append(j[hit])
+    lut[cell] = -1
+    return np.concatenate(src), np.concatenate(dst)
+
+def label_clusters(detections, n_range, n_doppler, scans=None):
+    """Connected-component labels (8-connectivity) for sparse detections.
+
+    Returns (labels, scans) where labels are compact 0..n_clusters-1.
+    Edge construction uses a per-scan cell lookup table, and labels are
+    resolved by vectorized min-label propagation with pointer jumping, so
+    the cost stays linear in the number of detections.
+    """
+    n = len(detections)
+    if scans is None:
+        scans = scan_ids(detections, n_doppler)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64), scans
+
+    r = detections[:, 0].astype(np.int64)
+    d = detections[:, 1].astype(np.int64)
+
+    # Scan boundaries (scans are contiguous runs in file order)
+    starts = np.flatnonzero(np.r_[True, scans[1:] != scans[:-1]])
+    stops = np.r_[starts[1:], n]
+
+    lut = np.full(n_range * n_doppler, -1, dtype=np.int64)
+    src, dst = [], []
+    for lo, hi in zip(starts, stops):
+        s, t = _neighbour_edges(r[lo:hi], d[lo:hi], n_range, n_doppler, lut)
+        src.append(s + lo)
+        dst.append(t + lo)
+    src = np.concatenate(src)
+    dst = np.concatenate(dst)
+
+    labels = np.arange(n, dtype=np.int64)
+    while True:
+        lo_lab = np.minimum(labels[src], labels[dst])
+        prev = labels.copy()
+        np.minimum.at(labels, src, lo_lab)
+        np.minimum.at(labels, dst, lo_lab)
+        # Pointer jumping: follow label chains to their root
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+        if np.array_equal(labels, prev):
+            break
+
+    # Roots label themselves; compact them to 0..k-1
+    is_root = labels == np.arange(n)
+    compact = np.cumsum(is_root) - 1
+    return compact[labels], scans
+
+def extract_plots(detections, n_range, n_doppler, scans=None):
+    """Reduce raw CFAR detections [range, doppler, mag] to one plot per cluster.
+
+    Returns a structured array of PLOT_DTYPE, ordered by scan then by the
+    first cell of each cluster in raster order. Detections outside the
+    n_range x n_doppler map are dropped.
+    """
+    detections = np.asarray(detections)
+    if len(detections) == 0:
+        return np.zeros(0, dtype=PLOT_DTYPE)
+    if scans is None:
+        scans = scan_ids(detections, n_doppler)
+    r, d = detections[:, 0], detections[:, 1]
+    ok = (r >= 0) & (r < n_range) & (d >= 0) & (d < n_doppler)
+    if not ok.all():
+        detections, scans = detections[ok], np.asarray(scans)[ok]
+        if len(detections) == 0:
+            return np.zeros(0, dtype=PLOT_DTYPE)
+
+    labels, scans = label_clusters(detections, n_range, n_doppler, scans)
+    k = int(labels.max()) + 1
+
+    r = detections[:, 0].astype(np.int64)
+    d = detections[:, 1].astype(np.int64)
+    mag = detections[:, 2].astype(np.int64)
+
+    plots = np.zeros(k, dtype=PLOT_DTYPE)
+    plots['n_cells'] = np.bincount(labels, minlength=k)
+    plots['sum_mag'] = np.bincount(labels, weights=mag, minlength=k)
+
+    # Peak cell: first detection (in file order) holding the cluster maximum
+    peak = np.zeros(k, dtype=np.int64)
+    np.maximum.at(peak, labels, mag)
+    is_peak = mag == peak[labels]
+    peak_idx = np.full(k, len(mag), dtype=np.int64)
+    np.minimum.at(peak_idx, labels[is_peak], np.flatnonzero(is_peak))
+
+    plots['scan'] = scans[peak_idx]
+    plots['peak_range'] = r[peak_idx]
+    plots['peak_doppler'] = d[peak_idx]
+    plots['peak_mag'] = peak
+
+    # Offsets from the peak; Doppler unwrapped so clusters may straddle bin 0
+    dr = r - r[peak_idx][labels]
+    dd = (d - d[peak_idx][labels] + n_doppler // 2) % n_doppler - n_doppler // 2
+
+    w = mag.astype(np.float64)
+    wsum = np.bincount(labels, weights=w, minlength=k)
+    safe = np.where(wsum > 0, wsum, 1.0)
+    plots['range'] = plots['peak_range'] + np.bincount(labels, weights=w * dr, minlength=k) / safe
+    plots['doppler'] = (plots['peak_doppler'] +
+                        np.bincount(labels, weights=w * dd, minlength=k) / safe) % n_doppler
+
+    for field, off in (('range_extent', dr), ('doppler_extent', dd)):
+        hi = np.full(k, np.iinfo(np.int64).min)
+        lo = np.full(k, np.iinfo(np.int64).max)
+        np.maximum.at(hi, labels, off)
+        np.minimum.at(lo, labels, off)
+        plots[field] = hi - lo + 1
+
+    # Compact labels follow each cluster's first detection, so plots are
+    # already in scan order
+    return plots
+
+def plots_to_detections(plots, n_doppler):
+    """Convert plots back to the 3-column [range, doppler, mag] detection format.
+
+    Centroids are rounded to the nearest bin and carry the peak magnitude,
+    so existing consumers of load_detections() can take plots unchanged.
+    """
+    if len(plots) == 0:
+        return np.array([])
+    out = np.empty((len(plots), 3), dtype=np.int64)
+    out[:, 0] = np.rint(plots['range'])
+    out[:, 1] = np.rint(plots['doppler']).astype(np.int64) % n_doppler
+    out[:, 2] = plots['peak_mag']
+    return out
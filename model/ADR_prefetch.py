@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+ADR_prefetch.py
+Background prefetching readers for simulation output
+Parses detection and track files in worker threads and hands parsed
+chunks to the consumer through bounded (double-buffered) queues, so RDM
+accumulation and track analytics run while the rest of the file is
+still being parsed
+"""
+
+import re
+import queue
+import threading
+import numpy as np
+from pathlib import Path
+
+# Bytes read per chunk (cut back to the last full line)
+CHUNK_BYTES = 4 << 20
+
+# Parsed chunks buffered ahead of the consumer (2 = double buffering)
+QUEUE_DEPTH = 2
+
+# Track row layout (one row per TRK line)
+TRACK_ROW_DTYPE = np.dtype([
+    ('scan', np.int32),
+    ('id', np.int16),
+    ('range', np.int32),      # Q2 range bins
+    ('doppler', np.int32),    # Q2 Doppler bins
+    ('vel_r', np.int32),      # 0 when the quick format omits VR=
+    ('quality', np.int8),
+    ('status', np.int8),      # TRK_FREE/TENTATIVE/FIRM/COAST = 0..3
+])
+
+# Scan boundary line the testbenches write into detection files
+_SCAN_MARK_RE = re.compile(rb'^[ \t]*SCAN_END\b[^\n]*(?:\n|$)', re.M)
+
+# TRK id R= D= [VR=] Q= [S=]  |  SCAN_END ACTIVE=
+_TRACK_RE = re.compile(
+    rb'TRK\s+(\d+)\s+R=(-?\d+)\s+D=(-?\d+)(?:\s+VR=(-?\d+))?\s+Q=(\d+)(?:\s+S=([01]+))?'
+    rb'|SCAN_END\s+ACTIVE=(\d+)')
+
+_SENTINEL = object()
+
+def read_line_chunks(filepath, chunk_bytes=CHUNK_BYTES):
+    """Yield byte blocks of whole lines from a text file."""
+    with open(filepath, 'rb') as f:
+        tail = b''
+        while True:
+            block = f.read(chunk_bytes)
+            if not block:
+                break
+            block = tail + block
+            cut = block.rfind(b'\n') + 1
+            if cut == 0:
+                tail = block
+                continue
+            tail = block[cut:]
+            yield block[:cut]
+        if tail.strip():
+            yield tail
+
+def _line_field_counts(block):
+    """Whitespace-separated field count of every non-blank line of a block."""
+    b = np.frombuffer(block, dtype=np.uint8)
+    ws = (b == 32) | (b == 9) | (b == 13) | (b == 10)
+    first = ~ws & np.r_[True, ws[:-1]]
+    line = np.cumsum(b == 10) - (b == 10)
+    counts = np.bincount(line[first], minlength=int(line[-1]) + 1)
+    return counts[counts > 0]
+
+def _int_row(line, n_cols):
+    parts = line.split()
+    if len(parts) != n_cols:
+        return None
+    try:
+        return [int(p) for p in parts]
+    except ValueError:
+        return None
+
+def detection_row(line):
+    """[range, doppler, mag] of a detection line, None for any other line."""
+    return _int_row(line, 3)
+
+def parse_int_rows(block, n_cols):
+    """(N, n_cols) int64 array of the block's lines that hold exactly
+    n_cols integer fields; every other line is skipped.
+
+    The whole block converts in one call when every line is a clean row;
+    anything else goes through the line parser.
+    """
+    if len(block) and (_line_field_counts(block) == n_cols).all():
+        try:
+            return np.array(block.split(), dtype=np.int64).reshape(-1, n_cols)
+        except ValueError:
+            pass
+    rows = [_int_row(line, n_cols) for line in block.splitlines()]
+    return np.array([r for r in rows if r is not None], dtype=np.int64).reshape(-1, n_cols)
+
+def parse_detection_block(block):
+    """Parse a block of 'range doppler mag' lines into an (N, 3) int64 array.
+
+    Lines with a different field count (headers, comments, SCAN_END
+    markers) or non-integer fields are skipped, as in load_detections().
+    """
+    return parse_int_rows(block, 3)
+
+def iter_detection_chunks(filepath, chunk_bytes=CHUNK_BYTES):
+    """Yield (N, 3) detection arrays chunk by chunk."""
+    for block in read_line_chunks(filepath, chunk_bytes):
+        dets = parse_detection_block(block)
+        if len(dets):
+            yield dets
+
+def parse_detection_scans(block):
+    """Parse a detection block with SCAN_END marker lines.
+
+    Returns (detections, ends); ends[k] is the number of the block's
+    detections that precede its k-th marker.
+    """
+    dets = [parse_detection_block(part) for part in _SCAN_MARK_RE.split(block)]
+    ends = np.cumsum([len(d) for d in dets[:-1]], dtype=np.int64)
+    return np.concatenate(dets), ends
+
+def has_scan_marks(filepath, chunk_bytes=CHUNK_BYTES):
+    """True when a detection file carries SCAN_END marker lines."""
+    for block in read_line_chunks(filepath, chunk_bytes):
+        return _SCAN_MARK_RE.search(block) is not None
+    return False
+
+def iter_detection_scans(filepath, n_doppler=128, chunk_bytes=CHUNK_BYTES):
+    """Yield (detections, ends) per chunk; ends are chunk-relative row
+    counts at which a scan closes (repeated for scans with no detections).
+
+    Scans end at the SCAN_END marker lines of the file. Files without
+    markers fall back to the raster-order rule of scan_ids(), which merges
+    consecutive scans whose hits continue the raster.
+    """
+    marked = None
+    prev = None
+    for block in read_line_chunks(filepath, chunk_bytes):
+        if marked is None:
+            marked = _SCAN_MARK_RE.search(block) is not None
+        if marked:
+            dets, ends = parse_detection_scans(block)
+            if len(dets) or len(ends):
+                yield dets, ends
+            continue
+        dets = parse_detection_block(block)
+        if len(dets) == 0:
+            continue
+        cell = dets[:, 0] * n_doppler + dets[:, 1]
+        new = np.empty(len(cell), dtype=bool)
+        new[0] = prev is not None and cell[0] <= prev
+        new[1:] = cell[1:] <= cell[:-1]
+        prev = int(cell[-1])
+        yield dets, np.flatnonzero(new)
+
+def load_detection_scans(filepath, n_doppler=128, chunk_bytes=CHUNK_BYTES):
+    """(detections, scan number of each row, n_scans) of a detection file."""
+    chunks, ends, n = [], [], 0
+    for dets, e in iter_detection_scans(filepath, n_doppler, chunk_bytes):
+        chunks.append(dets)
+        ends.append(e + n)
+        n += len(dets)
+    dets = np.concatenate(chunks) if chunks else np.zeros((0, 3), dtype=np.int64)
+    ends = np.concatenate(ends) if ends else np.zeros(0, dtype=np.int64)
+    scans = np.searchsorted(ends, np.arange(n), side='right').astype(np.int32)
+    # A final scan without a closing marker still counts
+    n_scans = len(ends) + int(n > (ends[-1] if len(ends) else 0))
+    return dets, scans, n_scans
+
+def parse_track_block(block, scan=0):
+    """Parse TRK/SCAN_END lines; returns (rows, scan_counts).
+
+    rows is a TRACK_ROW_DTYPE array whose scan numbers start at scan;
+    scan_counts holds the ACTIVE= value of each SCAN_END in the block.
+    """
+    matches = _TRACK_RE.findall(block)
+    is_end = np.array([m[6] != b'' for m in matches], dtype=bool)
+    # Scan of a TRK row = number of SCAN_END lines before it
+    row_scan = scan + np.cumsum(is_end) - is_end
+    trk = [m for m, e in zip(matches, is_end) if not e]
+
+    rows = np.zeros(len(trk), dtype=TRACK_ROW_DTYPE)
+    if trk:
+        cols = list(zip(*trk))
+        rows['scan'] = row_scan[~is_end]
+        rows['id'] = np.array(cols[0], dtype=np.int64)
+        rows['range'] = np.array(cols[1], dtype=np.int64)
+        rows['doppler'] = np.array(cols[2], dtype=np.int64)
+        rows['vel_r'] = [int(v) if v else 0 for v in cols[3]]
+        rows['quality'] = np.array(cols[4], dtype=np.int64)
+        rows['status'] = [int(s, 2) if s else 0 for s in cols[5]]
+    counts = [int(m[6]) for m, e in zip(matches, is_end) if e]
+    return rows, counts
+
+def iter_track_chunks(filepath, chunk_bytes=CHUNK_BYTES):
+    """Yield (rows, scan_counts) per chunk, scans counted across chunks."""
+    scan = 0
+    for block in read_line_chunks(filepath, chunk_bytes):
+        rows, counts = parse_track_block(block, scan)
+        if len(rows) == 0 and not counts:
+            continue
+        scan += len(counts)
+        yield rows, counts
+
+class Prefetcher:
+    """Run a chunk iterator in a daemon thread behind a bounded queue.
+
+    Iterating the Prefetcher yields the same items as the wrapped
+    iterator; worker exceptions are re-raised in the consumer.
+    """
+
+    def __init__(self, source, depth=QUEUE_DEPTH):
+        self._queue = queue.Queue(maxsize=depth)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, args=(source,), daemon=True)
+        self._thread.start()
+
+    def _run(self, source):
+        try:
+            for item in source:
+                self._queue.put(item)
+        except BaseException as e:
+            self._error = e
+        finally:
+            self._queue.put(_SENTINEL)
+
+    def __iter__(self):
+        while True:
+            item = self._queue.get()
+            if item is _SENTINEL:
+                break
+            yield item
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+def prefetch_detections(filepath, chunk_bytes=CHUNK_BYTES, depth=QUEUE_DEPTH):
+    """Background-parsed detection chunks (empty when the file is missing)."""
+    if not filepath or not Path(filepath).exists():
+        return iter(())
+    return iter(Prefetcher(iter_detection_chunks(filepath, chunk_bytes), depth))
+
+def prefetch_detection_scans(filepath, n_doppler=128, chunk_bytes=CHUNK_BYTES,
+                            depth=QUEUE_DEPTH):
+    """Background-parsed (detections, ends) chunks, as iter_detection_scans."""
+    if not filepath or not Path(filepath).exists():
+        return iter(())
+    return iter(Prefetcher(iter_detection_scans(filepath, n_doppler, chunk_bytes), depth))
+
+def prefetch_tracks(filepath, chunk_bytes=CHUNK_BYTES, depth=QUEUE_DEPTH):
+    """Background-parsed (rows, scan_counts) track chunks."""
+    if not filepath or not Path(filepath).exists():
+        return iter(())
+    return iter(Prefetcher(iter_track_chunks(filepath, chunk_bytes), depth))
+
+def load_scans(det_file, trk_file, n_doppler=128):
+    """Split detection/track files into per-scan (dets, rows, active) tuples.
+
+    Track scans come from SCAN_END lines; detection scans from the SCAN_END
+    markers of the detection file, or the raster-order rule of scan_ids()
+    for files without them. Scans without detections get an empty (0, 3)
+    array.
+    """
+    if det_file and Path(det_file).exists():
+        dets, det_scan, n_det_scans = load_detection_scans(det_file, n_doppler)
+    else:
+        dets, det_scan, n_det_scans = np.zeros((0, 3), dtype=np.int64), np.zeros(0, np.int32), 0
+
+    rows, counts = [], []
+    for r, c in prefetch_tracks(trk_file):
+        rows.append(r)
+        counts += c
+    rows = np.concatenate(rows) if rows else np.zeros(0, dtype=TRACK_ROW_DTYPE)
+
+    if n_det_scans < len(counts) and det_file and not has_scan_marks(det_file):
+        print(f"Warning: {det_file} has no SCAN_END markers; raster order found "
+              f"{n_det_scans} scans against {len(counts)} in the track log, so "
+              f"some detection scans are merged")
+    n_scans = max(len(counts), n_det_scans)
+    det_bounds = np.searchsorted(det_scan, np.arange(n_scans + 1))
+    trk_bounds = np.searchsorted(rows['scan'], np.arange(n_scans + 1))
+    return [(dets[det_bounds[k]:det_bounds[k + 1]],
+             rows[trk_bounds[k]:trk_bounds[k + 1]],
+             counts[k] if k < len(counts) else 0)
+            for k in range(n_scans)]
+
+class RdmAccumulator:
+    """Incremental max-hold range-Doppler map over detection chunks."""
+
+    def __init__(self, n_range, n_doppler):
+        self.n_range = n_range
+        self.n_doppler = n_doppler
+        self.rdm = np.zeros((n_doppler, n_range))
+        self.count = 0
+
+    def add(self, dets):
+        r, d, mag = dets[:, 0], dets[:, 1], dets[:, 2]
+        ok = (r >= 0) & (r < self.n_range) & (d >= 0) & (d < self.n_doppler)
+        np.maximum.at(self.rdm, (d[ok], r[ok]), mag[ok])
+        self.count += len(dets)
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+ADR_rdm_pyramid.py
+Multi-resolution range-Doppler map pyramid for fast zoom and pan
+Each scan's RDM is converted to dB once, max-pooled by 2 along range and
+Doppler independently and stored as fixed-size tiles in memory-mapped
+files, one per (Doppler level, range level) pair. A view request is served
+from the coarsest level on each axis that still has a cell per screen
+pixel, so a long range axis is reduced even when the short Doppler axis is
+not, and scrubbing through a run only touches the tiles that are on screen.
+"""
+
+import os
+import json
+import numpy as np
+from pathlib import Path
+
+from ADR_prefetch import load_scans
+
+# Tile edge (cells); levels stop once the whole map fits in one tile
+TILE = 64
+
+# dB of empty cells (20*log10(0 + 1)); also used to pad partial tiles
+FLOOR_DB = 0.0
+
+def rdm_db(dets, n_range, n_doppler):
+    """(doppler, range) max-hold map in dB from (N, 3) detections."""
+    rdm = np.zeros((n_doppler, n_range), dtype=np.float32)
+    if len(dets):
+        r, d, mag = dets[:, 0], dets[:, 1], dets[:, 2]
+        ok = (r >= 0) & (r < n_range) & (d >= 0) & (d < n_doppler)
+        np.maximum.at(rdm, (d[ok], r[ok]), mag[ok].astype(np.float32))
+    return 20 * np.log10(rdm + 1)
+
+def max_pool2(img, axis):
+    """Max pooling by 2 along one axis; an odd edge is padded with FLOOR_DB."""
+    n = img.shape[axis]
+    if n % 2:
+        pad = [(0, 0)] * img.ndim
+        pad[axis] = (0, 1)
+        img = np.pad(img, pad, constant_values=FLOOR_DB)
+    shape = list(img.shape)
+    shape[axis:axis + 1] = [shape[axis] // 2, 2]
+    return img.reshape(shape).max(axis=axis + 1)
+
+def level_sizes(n, tile=TILE):
+    """Axis length at every level, full resolution first; levels stop once
+    the axis fits in one tile."""
+    sizes = [n]
+    while sizes[-1] > tile:
+        sizes.append((sizes[-1] + 1) // 2)
+    return sizes
+
+def _axis_level(span, px, n_levels):
+    """Coarsest level of one axis that keeps at least one cell per pixel."""
+    k = 0
+    while k + 1 < n_levels and span / 2**(k + 1) >= px:
+        k += 1
+    return k
+
+class RdmPyramid:
+    """Memory-mapped tile store of per-scan RDM pyramids.
+
+    Level (kd, kr) pools Doppler 2**kd and range 2**kr times and lives in
+    <path>.L<kd>_<kr> with shape (n_entries, tiles_y, tiles_x, TILE, TILE),
+    float16 dB. Entry n_scans holds the max-hold of the whole run. Parameters are kept in
+    <path>.json, written by flush() only after the level files, so its
+    presence marks a complete store.
+    """
+
+    def __init__(self, path, n_range=None, n_doppler=None, n_scans=None, tile=TILE):
+        self.path = Path(path)
+        self.meta_path = self.path.with_suffix(self.path.suffix + '.json')
+        if n_scans is None:
+            self.meta = json.loads(self.meta_path.read_text())
+            mode = 'r'
+        else:
+            self.meta = dict(n_range=n_range, n_doppler=n_doppler, n_scans=n_scans, tile=tile,
+                             doppler_sizes=level_sizes(n_doppler, tile),
+                             range_sizes=level_sizes(n_range, tile))
+            # Invalidate any previous store before its levels are overwritten
+            self.meta_path.unlink(missing_ok=True)
+            mode = 'w+'
+
+        t = self.meta['tile']
+        # levels[kd][kr]
+        self.levels = []
+        for kd, h in enumerate(self.meta['doppler_sizes']):
+            row = []
+            for kr, w in enumerate(self.meta['range_sizes']):
+                shape = (self.meta['n_scans'] + 1, -(-h // t), -(-w // t), t, t)
+                row.append(np.memmap(self._level_path(kd, kr), dtype=np.float16,
+                                     mode=mode, shape=shape))
+            self.levels.append(row)
+
+    def _level_path(self, kd, kr):
+        return self.path.with_suffix(self.path.suffix + f'.L{kd}_{kr}')
+
+    @property
+    def n_levels(self):
+        """(Doppler levels, range levels)."""
+        return len(self.meta['doppler_sizes']), len(self.meta['range_sizes'])
+
+    def level_shape(self, level):
+        """(height, width) in cells of level (kd, kr)."""
+        kd, kr = level
+        return self.meta['doppler_sizes'][kd], self.meta['range_sizes'][kr]
+
+    @property
+    def n_scans(self):
+        return self.meta['n_scans']
+
+    @property
+    def run_entry(self):
+        """Entry index of the whole-run max-hold."""
+        return self.meta['n_scans']
+
+    def _write_level(self, entry, kd, kr, img):
+        t = self.meta['tile']
+        store = self.levels[kd][kr]
+        ty, tx = store.shape[1:3]
+        padded = np.full((ty * t, tx * t), FLOOR_DB, dtype=np.float32)
+        padded[:img.shape[0], :img.shape[1]] = img
+        store[entry] = padded.reshape(ty, t, tx, t).transpose(0, 2, 1, 3)
+
+    def write_scan(self, entry, db):
+        """Store every level of one (doppler, range) dB map."""
+        n_d, n_r = self.n_levels
+        col = db
+        for kd in range(n_d):
+            if kd:
+                col = max_pool2(col, axis=0)
+            img = col
+            for kr in range(n_r):
+                if kr:
+                    img = max_pool2(img, axis=1)
+                self._write_level(entry, kd, kr, img)
+
+    def flush(self):
+        for row in self.levels:
+            for store in row:
+                store.flush()
+        if self.levels[0][0].mode != 'r':
+            tmp = self.meta_path.with_suffix(self.meta_path.suffix + '.tmp')
+            tmp.write_text(json.dumps(self.meta, indent=2))
+            os.replace(tmp, self.meta_path)
+
+    def choose_level(self, r0, r1, d0, d1, px_w, px_h):
+        """(kd, kr): per axis, the coarsest level that keeps at least one
+        cell per screen pixel."""
+        n_d, n_r = self.n_levels
+        return (_axis_level(max(d1 - d0, 1), px_h, n_d),
+                _axis_level(max(r1 - r0, 1), px_w, n_r))
+
+    def view(self, entry, r0=0, r1=None, d0=0, d1=None, px_w=1200, px_h=600, level=None):
+        """Image covering range bins [r0, r1) x Doppler bins [d0, d1).
+
+        Returns (img, extent, level) where img is float32 dB rows=Doppler,
+        extent = (r_lo, r_hi, d_lo, d_hi) in full-resolution bins of the
+        cells actually returned (aligned to the level's cell size) and
+        level is (kd, kr).
+        """
+        n_range, n_doppler = self.meta['n_range'], self.meta['n_doppler']
+        r1 = n_range if r1 is None else r1
+        d1 = n_doppler if d1 is None else d1
+        r0, r1 = max(int(np.floor(r0)), 0), min(int(np.ceil(r1)), n_range)
+        d0, d1 = max(int(np.floor(d0)), 0), min(int(np.ceil(d1)), n_doppler)
+        if level is None:
+            level = self.choose_level(r0, r1, d0, d1, px_w, px_h)
+
+        kd, kr = level
+        fd, fr = 2**kd, 2**kr
+        t = self.meta['tile']
+        h, w = self.level_shape(level)
+        # Cell window at this level
+        cr0, cr1 = r0 // fr, min(-(-r1 // fr), w)
+        cd0, cd1 = d0 // fd, min(-(-d1 // fd), h)
+        # Tiles covering it
+        tr0, tr1 = cr0 // t, -(-cr1 // t)
+        td0, td1 = cd0 // t, -(-cd1 // t)
+        tiles = np.asarray(self.levels[kd][kr][entry, td0:td1, tr0:tr1])
+        ny, nx = tiles.shape[:2]
+        img = tiles.transpose(0, 2, 1, 3).reshape(ny * t, nx * t)
+        img = img[cd0 - td0 * t:cd1 - td0 * t, cr0 - tr0 * t:cr1 - tr0 * t]
+        extent = (cr0 * fr, min(cr1 * fr, n_range), cd0 * fd, min(cd1 * fd, n_doppler))
+        return img.astype(np.float32), extent, level
+
+def build_pyramid(path, det_file, trk_file=None, n_range=1024, n_doppler=128):
+    """Index a detection dump by scan and build its pyramid store."""
+    scans = load_scans(det_file, trk_file, n_doppler)
+    pyr = RdmPyramid(path, n_range, n_doppler, n_scans=len(scans))
+    run = np.zeros((n_doppler, n_range), dtype=np.float32)
+    for k, (dets, _, _) in enumerate(scans):
+        db = rdm_db(dets, n_range, n_doppler)
+        np.maximum(run, db, out=run)
+        pyr.write_scan(k, db)
+    pyr.write_scan(pyr.run_entry, run)
+    pyr.flush()
+    return pyr
+
+class PyramidViewer:
+    """matplotlib viewer that refetches tiles on zoom/pan and scan change.
+
+    Keys: left/right step one scan, up/down ten, 'a' toggles the
+    whole-run max-hold.
+    """
+
+    def __init__(self, pyr, ax=None):
+        import matplotlib.pyplot as plt
+        self.plt = plt
+        self.pyr = pyr
+        if ax is None:
+            _, ax = plt.subplots(figsize=(10, 6))
+        self.ax = ax
+        self.entry = pyr.run_entry
+        n_range, n_doppler = pyr.meta['n_range'], pyr.meta['n_doppler']
+        img, extent, _ = pyr.view(self.entry)
+        self.im = ax.imshow(img, aspect='auto', origin='lower', cmap='viridis',
+                            extent=extent, interpolation='nearest', vmin=0, vmax=20 * np.log10(2**17))
+        ax.set_xlim(0, n_range)
+        ax.set_ylim(0, n_doppler)
+        ax.set_xlabel('Range bin')
+        ax.set_ylabel('Doppler bin')
+        ax.figure.colorbar(self.im, ax=ax, label='dB')
+        self._busy = False
+        ax.callbacks.connect('xlim_changed', self._on_view)
+        ax.callbacks.connect('ylim_changed', self._on_view)
+        ax.figure.canvas.mpl_connect('key_press_event', self._on_key)
+        self.refresh()
+
+    def _title(self, level):
+        name = 'All scans' if self.entry == self.pyr.run_entry else f'Scan {self.entry}'
+        return f'{name} (level D{level[0]} R{level[1]})'
+
+    def refresh(self):
+        if self._busy:
+            return
+        self._busy = True
+        try:
+            (r0, r1), (d0, d1) = self.ax.get_xlim(), self.ax.get_ylim()
+            bbox = self.ax.get_window_extent()
+            img, extent, level = self.pyr.view(self.entry, min(r0, r1), max(r0, r1),
+                                               min(d0, d1), max(d0, d1),
+                                               px_w=max(bbox.width, 1), px_h=max(bbox.height, 1))
+            self.im.set_data(img)
+            self.im.set_extent(extent)
+            # set_extent resets the limits; put the requested view back
+            self.ax.set_xlim(r0, r1)
+            self.ax.set_ylim(d0, d1)
+            self.ax.set_title(self._title(level))
+            self.ax.figure.canvas.draw_idle()
+        finally:
+            self._busy = False
+
+    def _on_view(self, _ax):
+        self.refresh()
+
+    def _on_key(self, event):
+        last = self.pyr.n_scans - 1
+        cur = 0 if self.entry == self.pyr.run_entry else self.entry
+        if event.key == 'a':
+            self.entry = 0 if self.entry == self.pyr.run_entry else self.pyr.run_entry
+        elif event.key in ('right', 'left', 'up', 'down'):
+            step = {'right': 1, 'left': -1, 'up': 10, 'down': -10}[event.key]
+            self.entry = int(np.clip(cur + step, 0, last))
+        else:
+            return
+        self.refresh()
+
+def main():
+    import sys
+    import time
+
+    det_file = sys.argv[1] if len(sys.argv) > 1 else "tac_detections.txt"
+    trk_file = sys.argv[2] if len(sys.argv) > 2 else None
+    store = Path(det_file).with_suffix('.pyr')
+
+    is_quick = "quick" in det_file
+    n_range, n_doppler = (128, 32) if is_quick else (1024, 128)
+
+    meta = store.with_suffix(store.suffix + '.json')
+    # Stores written before the per-axis levels have no range_sizes
+    if (meta.exists() and meta.stat().st_mtime >= Path(det_file).stat().st_mtime
+            and 'range_sizes' in json.loads(meta.read_text())):
+        pyr = RdmPyramid(store)
+        print(f"Opened pyramid: {store}")
+    else:
+        t0 = time.perf_counter()
+        pyr = build_pyramid(store, det_file, trk_file, n_range, n_doppler)
+        print(f"Built pyramid: {store} ({pyr.n_scans} scans, "
+              f"{pyr.n_levels[0]} x {pyr.n_levels[1]} levels) "
+              f"in {time.perf_counter() - t0:.2f} s")
+
+    print(f"  range levels: {' '.join(map(str, pyr.meta['range_sizes']))} cells")
+    print(f"  Doppler levels: {' '.join(map(str, pyr.meta['doppler_sizes']))} cells")
+
+    import matplotlib.pyplot as plt
+    PyramidViewer(pyr)
+    plt.show()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+ADR_replay.py
+Real-time replay of recorded tactical scans
+Plays tac_detections.txt / tac_tracks.txt back as if live: scans are
+indexed up front, released on a monotonic schedule at SCAN_RATE (or N x
+speed) to a consumer running in its own thread, and the per-scan lag
+from scheduled release to completed processing is measured
+"""
+
+import sys
+import time
+import queue
+import threading
+import numpy as np
+from dataclasses import dataclass
+
+from ADR_prefetch import load_scans, RdmAccumulator
+from ADR_plot_extract import extract_plots
+from ADR_track_store import TrackStore
+
+# Radar parameters (match VHDL)
+N_RANGE = 1024
+N_DOPPLER = 128
+SCAN_RATE = 2.0  # Hz
+
+# Scans allowed to wait for the consumer before new ones are dropped
+MAX_BACKLOG = 2
+
+# Final stretch of each wait is spun rather than slept (s)
+SPIN_S = 0.001
+
+@dataclass
+class ScanTiming:
+    scan: int
+    t_sched: float            # scheduled release (monotonic s)
+    t_release: float = 0.0    # actual release
+    t_start: float = 0.0      # consumer picked it up
+    t_done: float = 0.0       # consumer finished
+    dropped: bool = False
+    failed: bool = False      # consumer raised on this scan
+
+    @property
+    def lag(self):
+        """Scheduled release -> processing complete."""
+        return self.t_done - self.t_sched
+
+class ReplayReport:
+    def __init__(self, timings, period, speed, error=None):
+        self.timings = timings
+        self.period = period
+        self.speed = speed
+        self.error = error
+        done = [t for t in timings if not t.dropped and not t.failed]
+        self.lag = np.array([t.lag for t in done])
+        self.jitter = np.array([t.t_release - t.t_sched for t in done])
+        self.wait = np.array([t.t_start - t.t_release for t in done])
+        self.work = np.array([t.t_done - t.t_start for t in done])
+        self.dropped = [t.scan for t in timings if t.dropped]
+        self.failed = [t.scan for t in timings if t.failed]
+        # Late: still being processed when the next scan was due
+        self.late = [t.scan for t in done if t.lag > period]
+
+    @property
+    def realtime(self):
+        return not self.dropped and not self.late and not self.failed
+
+    def percentile_ms(self, values, pct):
+        return 1e3 * float(np.percentile(values, pct)) if len(values) else 0.0
+
+    def histogram(self, n_bins=12, width=40):
+        """Text histogram of lag on log-spaced bins (ms)."""
+        if len(self.lag) == 0:
+            return ""
+        lag_ms = np.maximum(self.lag * 1e3, 1e-3)
+        edges = np.logspace(np.log10(lag_ms.min()), np.log10(lag_ms.max() * 1.0001), n_bins + 1)
+        counts, _ = np.histogram(lag_ms, edges)
+        peak = max(counts.max(), 1)
+        lines = []
+        for lo, hi, c in zip(edges[:-1], edges[1:], counts):
+            lines.append(f"  {lo:9.3f} - {hi:9.3f} ms |{'#' * int(round(width * c / peak)):<{width}}| {c}")
+        return "\n".join(lines)
+
+    def report(self):
+        period_ms = 1e3 * self.period
+        lines = [
+            "=== REPLAY LATENCY ===",
+            f"Scans: {len(self.timings)} at {self.speed:g}x "
+            f"(period {period_ms:.1f} ms)",
+            f"Lag (sched -> done):   p50 {self.percentile_ms(self.lag, 50):8.3f} ms, "
+            f"p99 {self.percentile_ms(self.lag, 99):8.3f} ms, "
+            f"max {self.percentile_ms(self.lag, 100):8.3f} ms",
+            f"  release jitter:      p50 {self.percentile_ms(self.jitter, 50):8.3f} ms, "
+            f"p99 {self.percentile_ms(self.jitter, 99):8.3f} ms",
+            f"  queue wait:          p50 {self.percentile_ms(self.wait, 50):8.3f} ms, "
+            f"p99 {self.percentile_ms(self.wait, 99):8.3f} ms",
+            f"  processing:          p50 {self.percentile_ms(self.work, 50):8.3f} ms, "
+            f"p99 {self.percentile_ms(self.work, 99):8.3f} ms",
+            f"Dropped scans: {len(self.dropped)} {self.dropped[:20]}",
+            f"Late scans (lag > period): {len(self.late)} {self.late[:20]}",
+        ]
+        if self.error is not None:
+            lines.append(f"Consumer failed on scan {self.failed[0]}: "
+                         f"{type(self.error).__name__}: {self.error}")
+        lines += [
+            f"Real time: {'HELD' if self.realtime else 'NOT HELD'}",
+            "",
+            "Lag histogram:",
+            self.histogram(),
+        ]
+        return "\n".join(lines)
+
+class Replayer:
+    """Release pre-indexed scans to consumer(scan_idx, dets, rows, active).
+
+    The consumer runs in a worker thread fed by a queue of MAX_BACKLOG
+    scans. A scan whose release finds the queue full is dropped, as a live
+    feed would overwrite it. If the consumer raises, that scan is marked
+    failed, the replay stops and the exception is kept in report.error.
+    """
+
+    def __init__(self, scans, consumer, scan_rate=SCAN_RATE, speed=1.0,
+                 max_backlog=MAX_BACKLOG):
+        if speed <= 0:
+            raise ValueError("speed must be positive")
+        self.scans = scans
+        self.consumer = consumer
+        self.period = 1.0 / (scan_rate * speed)
+        self.speed = speed
+        self.max_backlog = max_backlog
+        self.error = None
+
+    def _worker(self, q):
+        while True:
+            item = q.get()
+            if item is None:
+                break
+            timing, scan = item
+            timing.t_start = time.monotonic()
+            try:
+                self.consumer(timing.scan, *scan)
+            except Exception as e:
+                timing.failed = True
+                self.error = e
+                break
+            timing.t_done = time.monotonic()
+
+    def run(self):
+        q = queue.Queue(maxsize=self.max_backlog)
+        worker = threading.Thread(target=self._worker, args=(q,), daemon=True)
+        worker.start()
+        self.error = None
+
+        timings = []
+        t0 = time.monotonic() + self.period  # first release one period out
+        for k, scan in enumerate(self.scans):
+            if not worker.is_alive():
+                break
+            t = ScanTiming(scan=k, t_sched=t0 + k * self.period)
+            _sleep_until(t.t_sched)
+            t.t_release = time.monotonic()
+            try:
+                q.put_nowait((t, scan))
+            except queue.Full:
+                t.dropped = True
+            timings.append(t)
+
+        # A worker that stopped on a consumer error never takes the sentinel
+        while worker.is_alive():
+            try:
+                q.put(None, timeout=0.1)
+                break
+            except queue.Full:
+                pass
+        worker.join()
+        # Scans still queued when the consumer failed were never processed
+        for t in timings:
+            if not t.t_done and not t.failed:
+                t.dropped = True
+        return ReplayReport(timings, self.period, self.speed, self.error)
+
+def _sleep_until(deadline):
+    while True:
+        dt = deadline - time.monotonic()
+        if dt <= 0:
+            return
+        if dt > SPIN_S:
+            time.sleep(dt - SPIN_S)
+
+class AnalysisConsumer:
+    """The per-scan share of the ADR_visualize analysis stack.
+
+    Max-hold RDM, plot extraction and track history, updated scan by scan.
+    """
+
+    def __init__(self, n_range=N_RANGE, n_doppler=N_DOPPLER):
+        self.n_range = n_range
+        self.n_doppler = n_doppler
+        self.rdm = RdmAccumulator(n_range, n_doppler)
+        self.n_plots = 0
+        self.tracks = TrackStore()
+
+    def __call__(self, scan, dets, rows, active):
+        if len(dets):
+            self.rdm.add(dets)
+            plots = extract_plots(dets, self.n_range, self.n_doppler,
+                                  scans=np.full(len(dets), scan, dtype=np.int32))
+            self.n_plots += len(plots)
+        self.tracks.extend(rows)
+        self.tracks.end_scan(active)
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    opts = dict(a[2:].split('=', 1) for a in sys.argv[1:] if a.startswith('--') and '=' in a)
+
+    det_file = args[0] if len(args) > 0 else "tac_detections.txt"
+    trk_file = args[1] if len(args) > 1 else "tac_tracks.txt"
+    speed = float(opts.get('speed', 1.0))
+    work_ms = float(opts.get('work-ms', 0.0))
+
+    is_quick = "quick" in det_file or "quick" in trk_file
+    n_range, n_doppler = (128, 32) if is_quick else (N_RANGE, N_DOPPLER)
+
+    t0 = time.perf_counter()
+    scans = load_scans(det_file, trk_file, n_doppler)
+    if not scans:
+        print(f"No scans found in {det_file} / {trk_file}")
+        return
+    n_dets = sum(len(s[0]) for s in scans)
+    print(f"Indexed {len(scans)} scans, {n_dets} detections "
+          f"in {time.perf_counter() - t0:.2f} s")
+
+    analysis = AnalysisConsumer(n_range, n_doppler)
+
+    def consumer(scan, dets, rows, active):
+        analysis(scan, dets, rows, active)
+        if work_ms:
+            # Stand-in for extra downstream load
+            time.sleep(work_ms / 1e3)
+
+    print(f"Replaying at {speed:g}x SCAN_RATE "
+          f"({len(scans) / (SCAN_RATE * speed):.1f} s)...")
+    report = Replayer(scans, consumer, speed=speed).run()
+    print()
+    print(report.report())
+    print(f"\nPlots extracted: {analysis.n_plots}, tracks seen: {len(analysis.tracks)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+ADR_scaling.py
+Target-count scaling benchmark for the detector, tracker and analytics
+Builds range-Doppler magnitude scans with 10 to 10,000 moving point
+targets over Rayleigh noise and spiky clutter, then times each stage per
+scan: os_cfar_2d (detection), the bit-exact tws_tracker model
+(association, with its MAX_DETS=64 detection buffer and MAX_TRACKS=32
+track file) and the analysis stack's ingest (max-hold RDM, columnar
+track store). Reports latency percentiles, throughput and peak memory
+per stage, and the fraction of real targets the tracker still holds, so
+the target count where the RTL limits start dropping targets shows up
+directly.
+
+  python ADR_scaling.py [--targets=10,100,1000] [--clutter=none,heavy]
+                        [--scans=N] [--full-map] [--quick]
+"""
+
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+from ADR_blocks import os_cfar_2d, MAG_WIDTH
+from ADR_tws_tracker import TwsTracker, MAX_TRACKS, MAX_DETS, TRK_FIRM, TRK_COAST
+from ADR_prefetch import RdmAccumulator, TRACK_ROW_DTYPE
+from ADR_track_store import TrackStore
+
+# Radar parameters (match VHDL)
+N_RANGE = 1024
+N_DOPPLER = 128
+
+# Target counts and clutter levels (fraction of cells holding a clutter spike)
+TARGET_COUNTS = (10, 16, 24, 32, 48, 64, 100, 200, 500, 1000, 2000, 5000, 10000)
+CLUTTER = {'none': 0.0, 'light': 0.0002, 'heavy': 0.002}
+N_SCANS = 16
+
+# Signal levels: Rayleigh noise scale, target and clutter-spike amplitudes
+NOISE_SCALE = 200.0
+TARGET_AMPLITUDE = 4000.0
+CLUTTER_AMPLITUDE = 3000.0     # mean of the exponential spike amplitude
+
+# tws_tracker gates unsigned Q2 detections against signed 12/9-bit Q2
+# positions, so only range < 512 and Doppler < 64 ever associate. Targets
+# go in that quadrant unless full_map=True, which measures the wrap too
+ASSOC_RANGE = 512
+ASSOC_DOPPLER = 64
+
+# A target counts as held when a firm/coast track is this close (bins)
+HOLD_GATE_R = 2.0
+HOLD_GATE_D = 1.0
+# Coverage below this marks saturation
+HOLD_FRACTION = 0.9
+
+SEED = 0
+
+class Scenario:
+    """n_targets constant-velocity point targets plus per-scan clutter."""
+
+    def __init__(self, n_targets, clutter=0.0, n_range=N_RANGE, n_doppler=N_DOPPLER,
+                 full_map=False, seed=SEED):
+        self.rng = np.random.default_rng([seed, n_targets, int(1e6 * clutter)])
+        rng = self.rng
+        self.n_range = n_range
+        self.n_doppler = n_doppler
+        self.clutter = clutter
+        r_hi = n_range if full_map else min(n_range, ASSOC_RANGE)
+        d_hi = n_doppler if full_map else min(n_doppler, ASSOC_DOPPLER)
+        self.range0 = rng.uniform(0.1 * r_hi, 0.9 * r_hi, n_targets)
+        self.rate = rng.uniform(-1.5, 1.5, n_targets)       # bins/scan
+        self.doppler = rng.integers(1, d_hi, n_targets)
+
+    def truth(self, k):
+        """(range, doppler) bins of the targets still on the map at scan k."""
+        r = self.range0 + k * self.rate
+        on = (r >= 0) & (r < self.n_range - 0.5)
+        return r[on], self.doppler[on]
+
+    def magnitudes(self, k):
+        """(range, doppler) int64 magnitude map for scan k."""
+        rng = self.rng
+        mag = rng.rayleigh(NOISE_SCALE, (self.n_range, self.n_doppler))
+        if self.clutter:
+            spikes = rng.random(mag.shape) < self.clutter
+            mag[spikes] += rng.exponential(CLUTTER_AMPLITUDE, int(spikes.sum()))
+        r, d = self.truth(k)
+        np.add.at(mag, (np.rint(r).astype(np.int64), d), TARGET_AMPLITUDE)
+        return np.minimum(mag, 2**MAG_WIDTH - 1).astype(np.int64)
+
+def held_targets(rows, r_true, d_true, n_doppler=N_DOPPLER):
+    """Number of truth targets with a firm/coast track inside the hold gate."""
+    rows = rows[(rows['status'] == TRK_FIRM) | (rows['status'] == TRK_COAST)]
+    if len(rows) == 0 or len(r_true) == 0:
+        return 0
+    # trk_range/trk_doppler are signed 12/9-bit Q2 ports
+    tr = (rows['range'] & 0xFFF) / 4.0
+    td = (rows['doppler'] & 0x1FF) / 4.0
+    dr = np.abs(r_true[:, None] - tr[None, :])
+    dd = np.abs(d_true[:, None] - td[None, :])
+    dd = np.minimum(dd, n_doppler - dd)
+    return int(((dr <= HOLD_GATE_R) & (dd <= HOLD_GATE_D)).any(axis=1).sum())
+
+def _rows_for_store(rows):
+    out = np.zeros(len(rows), dtype=TRACK_ROW_DTYPE)
+    for name in TRACK_ROW_DTYPE.names:
+        out[name] = rows[name]
+    return out
+
+def _peak_mb(fn, *args):
+    tracemalloc.start()
+    try:
+        res = fn(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return res, peak / 2**20
+
+def run_point(n_targets, clutter=0.0, n_scans=N_SCANS, max_tracks=MAX_TRACKS, full_map=False):
+    """Benchmark one (target count, clutter) point; returns a result dict."""
+    sc = Scenario(n_targets, clutter, full_map=full_map)
+    trk = TwsTracker(max_tracks=max_tracks)
+    rdm = RdmAccumulator(sc.n_range, sc.n_doppler)
+    store = TrackStore()
+    t_det, t_trk, t_ana, t_gen = [], [], [], []
+    n_dets, n_seen, held, active = [], [], [], []
+    for k in range(n_scans):
+        t0 = time.perf_counter()
+        mag = sc.magnitudes(k)
+        t1 = time.perf_counter()
+        hits = os_cfar_2d(mag)
+        r, d = np.nonzero(hits)
+        dets = np.column_stack([r, d, hits[r, d]])
+        t2 = time.perf_counter()
+        rows, n_active = trk.scan(dets)
+        t3 = time.perf_counter()
+        rdm.add(dets)
+        store.extend(_rows_for_store(rows))
+        store.end_scan(n_active)
+        t4 = time.perf_counter()
+        t_gen.append(t1 - t0)
+        t_det.append(t2 - t1)
+        t_trk.append(t3 - t2)
+        t_ana.append(t4 - t3)
+        n_dets.append(len(dets))
+        n_seen.append(min(len(dets), MAX_DETS))
+        rt, dt = sc.truth(k)
+        held.append((held_targets(rows, rt, dt), len(rt)))
+        active.append(n_active)
+
+    # Peak memory of one scan per stage, measured outside the timed loop
+    mag = sc.magnitudes(n_scans)
+    hits, mem_det = _peak_mb(os_cfar_2d, mag)
+    r, d = np.nonzero(hits)
+    dets = np.column_stack([r, d, hits[r, d]])
+    (rows, n_active), mem_trk = _peak_mb(trk.scan, dets)
+    _, mem_ana = _peak_mb(lambda: (rdm.add(dets), store.extend(_rows_for_store(rows))))
+
+    # Coverage over the second half, once tracks have had time to confirm
+    tail = held[n_scans // 2:]
+    n_held = sum(h for h, _ in tail)
+    n_true = sum(n for _, n in tail)
+    ms = lambda t, p: 1e3 * float(np.percentile(t, p))
+    return dict(
+        targets=n_targets, clutter=clutter, scans=n_scans,
+        dets_per_scan=float(np.mean(n_dets)),
+        dets_dropped=1.0 - sum(n_seen) / max(sum(n_dets), 1),
+        active=float(np.mean(active[n_scans // 2:])),
+        max_active=int(max(active)),
+        coverage=n_held / max(n_true, 1),
+        held=n_held / max(len(tail), 1),
+        det_ms=(ms(t_det, 50), ms(t_det, 99)),
+        trk_ms=(ms(t_trk, 50), ms(t_trk, 99)),
+        ana_ms=(ms(t_ana, 50), ms(t_ana, 99)),
+        gen_ms=ms(t_gen, 50),
+        scans_per_s=n_scans / (sum(t_det) + sum(t_trk) + sum(t_ana)),
+        mem_mb=(mem_det, mem_trk, mem_ana),
+    )
+
+def saturation_onset(results, fraction=HOLD_FRACTION):
+    """First target count whose coverage falls below fraction, with the
+    binding limit ('MAX_DETS', 'MAX_TRACKS' or 'gating'); None if never."""
+    for r in sorted(results, key=lambda r: r['targets']):
+        if r['coverage'] < fraction:
+            if r['dets_dropped'] > 0:
+                cause = 'MAX_DETS'
+            elif r['max_active'] >= MAX_TRACKS:
+                cause = 'MAX_TRACKS'
+            else:
+                cause = 'gating'
+            return r['targets'], cause
+    return None
+
+def main():
+    opts = dict(a[2:].split('=', 1) if '=' in a else (a[2:], '1')
+                for a in sys.argv[1:] if a.startswith('--'))
+    quick = 'quick' in opts
+    counts = (tuple(int(x) for x in opts['targets'].split(',')) if 'targets' in opts
+              else TARGET_COUNTS[::2] if quick else TARGET_COUNTS)
+    levels = (opts['clutter'].split(',') if 'clutter' in opts
+              else ('none', 'heavy') if quick else tuple(CLUTTER))
+    n_scans = int(opts.get('scans', 8 if quick else N_SCANS))
+    full_map = 'full-map' in opts
+
+    print("\n=== TARGET-COUNT SCALING ===")
+    print(f"{N_RANGE}x{N_DOPPLER} cells, {n_scans} scans per point, "
+          f"MAX_DETS={MAX_DETS}, MAX_TRACKS={MAX_TRACKS}, targets "
+          f"{'over the whole map' if full_map else f'in range < {ASSOC_RANGE}, Doppler < {ASSOC_DOPPLER}'}")
+    t0 = time.perf_counter()
+    results = {}
+    for level in levels:
+        print(f"\nClutter '{level}' ({100 * CLUTTER[level]:g}% of cells):")
+        print(f"  {'targets':>7s} {'det/scan':>8s} {'lost':>6s} {'active':>6s} {'held':>6s} "
+              f"{'cover':>6s} {'CFAR ms':>13s} {'track ms':>13s} {'ana ms':>11s} "
+              f"{'scan/s':>6s} {'peak MB':>16s}")
+        results[level] = []
+        for n in counts:
+            r = run_point(n, CLUTTER[level], n_scans, full_map=full_map)
+            results[level].append(r)
+            print(f"  {n:7d} {r['dets_per_scan']:8.0f} {100 * r['dets_dropped']:5.1f}% "
+                  f"{r['active']:6.1f} {r['held']:6.1f} {100 * r['coverage']:5.1f}% "
+                  f"{r['det_ms'][0]:6.1f}/{r['det_ms'][1]:6.1f} "
+                  f"{r['trk_ms'][0]:6.1f}/{r['trk_ms'][1]:6.1f} "
+                  f"{r['ana_ms'][0]:5.2f}/{r['ana_ms'][1]:5.2f} {r['scans_per_s']:6.1f} "
+                  f"{r['mem_mb'][0]:5.1f}/{r['mem_mb'][1]:4.2f}/{r['mem_mb'][2]:4.2f}")
+    print(f"\n(ms: p50/p99 per scan; peak MB: CFAR/tracker/analytics for one scan; "
+          f"lost: detections beyond MAX_DETS; done in {time.perf_counter() - t0:.0f} s)")
+
+    print(f"\nSaturation (coverage < {100 * HOLD_FRACTION:.0f}% of targets held):")
+    for level, res in results.items():
+        onset = saturation_onset(res)
+        if onset is None:
+            print(f"  {level:6s}: not reached up to {max(counts)} targets")
+        else:
+            print(f"  {level:6s}: from {onset[0]} targets, limited by {onset[1]}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+ADR_scan_index.py
+Per-scan byte-offset index for detection and track dump files
+Records where every scan starts and how many rows it holds, in a sidecar
+<file>.idx.npz next to the dump, so any scan or scan range is read with one
+seek and a read proportional to its own size
+"""
+
+import numpy as np
+from pathlib import Path
+
+from ADR_prefetch import (read_line_chunks, parse_detection_block, detection_row,
+                          has_scan_marks, parse_track_block, CHUNK_BYTES)
+
+KIND_DETECTIONS = 'detections'
+KIND_TRACKS = 'tracks'
+
+def _guess_kind(filepath):
+    with open(filepath, 'rb') as f:
+        head = f.read(4096)
+    # Detection files carry bare SCAN_END markers; only track logs have ACTIVE=
+    return KIND_TRACKS if (b'TRK' in head or b'ACTIVE=' in head) else KIND_DETECTIONS
+
+def _line_starts(block):
+    """Byte offset of every line start in a block of whole lines."""
+    nl = np.flatnonzero(np.frombuffer(block, dtype=np.uint8) == ord('\n'))
+    starts = np.empty(len(nl) + (0 if block.endswith(b'\n') else 1), dtype=np.int64)
+    starts[0] = 0
+    starts[1:] = nl[:len(starts) - 1] + 1
+    return starts
+
+def _detection_rows(block):
+    """(line start, range, doppler) of every detection line in a block."""
+    starts = _line_starts(block)
+    dets = parse_detection_block(block)
+    if len(dets) == len(starts):
+        return starts, dets
+    keep = [i for i, line in enumerate(block.splitlines()) if detection_row(line) is not None]
+    return starts[keep], dets
+
+def _scan_marked_detections(filepath, chunk_bytes):
+    """A detection scan runs up to and including its SCAN_END marker."""
+    offsets, rows = [0], [0]
+    base = 0
+    for block in read_line_chunks(filepath, chunk_bytes):
+        starts = _line_starts(block)
+        for start, line in zip(starts.tolist(), block.splitlines()):
+            if line.strip().startswith(b'SCAN_END'):
+                offsets.append(base + start + len(line) + 1)
+                rows.append(0)
+            elif detection_row(line) is not None:
+                rows[-1] += 1
+        base += len(block)
+    if len(offsets) > 1 and rows[-1] == 0 and offsets[-1] >= base:
+        offsets.pop()
+        rows.pop()
+    return offsets, rows
+
+def _scan_detections(filepath, n_doppler, chunk_bytes):
+    """Scans end at SCAN_END markers; files without them follow the
+    raster-order rule of scan_ids()."""
+    if has_scan_marks(filepath, chunk_bytes):
+        return _scan_marked_detections(filepath, chunk_bytes)
+    offsets, rows = [0], [0]
+    prev = None
+    base = 0
+    for block in read_line_chunks(filepath, chunk_bytes):
+        starts, dets = _detection_rows(block)
+        if len(dets):
+            cell = dets[:, 0] * n_doppler + dets[:, 1]
+            prev_cell = np.r_[cell[0] if prev is None else prev, cell[:-1]]
+            new = cell <= prev_cell
+            if prev is None:
+                new[0] = False
+            cuts = np.flatnonzero(new)
+            counts = np.diff(np.r_[0, cuts, len(dets)])
+            rows[-1] += int(counts[0])
+            for c, n in zip(cuts, counts[1:]):
+                offsets.append(base + int(starts[c]))
+                rows.append(int(n))
+            prev = int(cell[-1])
+        base += len(block)
+    return offsets, rows
+
+def _scan_tracks(filepath, chunk_bytes):
+    """A track scan runs up to and including its SCAN_END line."""
+    offsets, rows = [0], [0]
+    base = 0
+    for block in read_line_chunks(filepath, chunk_bytes):
+        starts = _line_starts(block)
+        lines = block.splitlines()
+        for start, line in zip(starts.tolist(), lines):
+            if line.startswith(b'TRK'):
+                rows[-1] += 1
+            elif line.startswith(b'SCAN_END'):
+                offsets.append(base + start + len(line) + 1)
+                rows.append(0)
+        base += len(block)
+    # Drop the empty scan opened by a final SCAN_END
+    if len(offsets) > 1 and rows[-1] == 0 and offsets[-1] >= base:
+        offsets.pop()
+        rows.pop()
+    return offsets, rows
+
+class ScanIndex:
+    """Byte offsets and row counts of every scan in one dump file.
+
+    offsets has n_scans + 1 entries; scan k occupies bytes
+    [offsets[k], offsets[k + 1]) and holds rows[k] data rows.
+    """
+
+    def __init__(self, filepath, kind, offsets, rows, n_doppler=128,
+                 source_size=0, source_mtime_ns=0):
+        self.filepath = Path(filepath)
+        self.kind = kind
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.rows = np.asarray(rows, dtype=np.int64)
+        self.n_doppler = n_doppler
+        self.source_size = source_size
+        self.source_mtime_ns = source_mtime_ns
+
+    @staticmethod
+    def index_path(filepath):
+        p = Path(filepath)
+        return p.with_suffix(p.suffix + '.idx.npz')
+
+    @classmethod
+    def build(cls, filepath, kind=None, n_doppler=128, chunk_bytes=CHUNK_BYTES, save=True):
+        kind = kind or _guess_kind(filepath)
+        if kind == KIND_TRACKS:
+            offsets, rows = _scan_tracks(filepath, chunk_bytes)
+        else:
+            offsets, rows = _scan_detections(filepath, n_doppler, chunk_bytes)
+        st = Path(filepath).stat()
+        offsets.append(st.st_size)
+        idx = cls(filepath, kind, offsets, rows, n_doppler, st.st_size, st.st_mtime_ns)
+        if save:
+            idx.save()
+        return idx
+
+    def save(self):
+        np.savez(self.index_path(self.filepath), offsets=self.offsets, rows=self.rows,
+                 kind=self.kind, n_doppler=self.n_doppler,
+                 source_size=self.source_size, source_mtime_ns=self.source_mtime_ns)
+
+    @classmethod
+    def load(cls, filepath):
+        with np.load(cls.index_path(filepath)) as z:
+            return cls(filepath, str(z['kind']), z['offsets'], z['rows'],
+                       int(z['n_doppler']), int(z['source_size']), int(z['source_mtime_ns']))
+
+    @classmethod
+    def open(cls, filepath, kind=None, n_doppler=128):
+        """Load the sidecar index, rebuilding it if missing or stale."""
+        if cls.index_path(filepath).exists():
+            idx = cls.load(filepath)
+            st = Path(filepath).stat()
+            if ((kind is None or idx.kind == kind) and idx.n_doppler == n_doppler and
+                    idx.source_size == st.st_size and idx.source_mtime_ns == st.st_mtime_ns):
+                return idx
+        return cls.build(filepath, kind, n_doppler)
+
+    @property
+    def n_scans(self):
+        return len(self.rows)
+
+    def __len__(self):
+        return self.n_scans
+
+    def read_bytes(self, lo, hi=None):
+        """Raw text of scans [lo, hi)."""
+        hi = lo + 1 if hi is None else hi
+        if not 0 <= lo < hi <= self.n_scans:
+            raise IndexError(f"scan range [{lo}, {hi}) outside 0..{self.n_scans}")
+        with open(self.filepath, 'rb') as f:
+            f.seek(self.offsets[lo])
+            return f.read(self.offsets[hi] - self.offsets[lo])
+
+    def load_detections(self, lo, hi=None):
+        """(N, 3) detections of scans [lo, hi) and the scan number of each row."""
+        hi = lo + 1 if hi is None else hi
+        dets = parse_detection_block(self.read_bytes(lo, hi))
+        scans = np.repeat(np.arange(lo, hi, dtype=np.int32), self.rows[lo:hi])
+        return dets, scans
+
+    def load_tracks(self, lo, hi=None):
+        """TRACK_ROW_DTYPE rows and ACTIVE counts of scans [lo, hi)."""
+        return parse_track_block(self.read_bytes(lo, hi), lo)
+
+def main():
+    import sys
+    import time
+
+    files = sys.argv[1:] or ["tac_detections.txt", "tac_tracks.txt"]
+    for fname in files:
+        if not Path(fname).exists():
+            print(f"Not found: {fname}")
+            continue
+        n_doppler = 32 if "quick" in fname else 128
+        t0 = time.perf_counter()
+        idx = ScanIndex.build(fname, n_doppler=n_doppler)
+        dt = time.perf_counter() - t0
+        print(f"{fname}: {idx.kind}, {idx.n_scans} scans, {int(idx.rows.sum())} rows, "
+              f"indexed in {dt:.2f} s -> {ScanIndex.index_path(fname)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+ADR_shm_ring.py
+Shared-memory scan ring between pipeline processes
+One producer (ingest/parsing) publishes whole scans, detections plus
+track rows in fixed-layout slots, into a multiprocessing.shared_memory
+block; any number of consumer processes (analytics, the visualizer) read
+them as zero-copy NumPy views with their own cursors. Nothing is pickled
+and nobody takes a lock: each slot carries a sequence word the producer
+sets odd while writing and even when done (a seqlock), so a consumer
+that falls more than a ring behind, or is lapped mid-read, sees the
+mismatch and counts the scans as overrun instead of reading torn data.
+
+  python ADR_shm_ring.py [det_file [trk_file]] [--slots=N] [--slow-ms=T]
+"""
+
+import sys
+import time
+import numpy as np
+from multiprocessing import shared_memory
+
+from ADR_prefetch import TRACK_ROW_DTYPE
+from ADR_ingest import DET_WIRE_DTYPE, MAX_TRACKS, scans_from_files, synthetic_scans
+
+MAGIC = 0x52494E47  # 'RING'
+VERSION = 1
+
+# Ring geometry defaults
+N_SLOTS = 32
+DET_CAPACITY = 4096
+MAX_CONSUMERS = 8
+
+# Detection rows as load_detections returns them (range, doppler, mag)
+DET_ROW_DTYPE = DET_WIRE_DTYPE
+
+_HEADER_DTYPE = np.dtype([
+    ('magic', '<u4'),
+    ('version', '<u4'),
+    ('n_slots', '<u4'),
+    ('det_capacity', '<u4'),
+    ('trk_capacity', '<u4'),
+    ('max_consumers', '<u4'),
+    ('head', '<u8'),                       # scans published
+    ('closed', '<u8'),                     # producer finished
+    ('cursor', '<u8', (MAX_CONSUMERS,)),   # next scan per consumer (its own word)
+    ('dropped', '<u8', (MAX_CONSUMERS,)),
+], align=True)
+
+_HEADER_BYTES = -(-_HEADER_DTYPE.itemsize // 64) * 64
+
+def _slot_dtype(det_capacity, trk_capacity):
+    return np.dtype([
+        ('seq', '<u8'),            # 2k+1 while scan k is written, 2k+2 once complete
+        ('scan', '<i8'),
+        ('active', '<i4'),
+        ('n_dets', '<u4'),
+        ('n_tracks', '<u4'),
+        ('truncated', '<u4'),      # detections beyond det_capacity
+        ('t_pub_ns', '<u8'),
+        ('dets', DET_ROW_DTYPE, (det_capacity,)),
+        ('tracks', TRACK_ROW_DTYPE, (trk_capacity,)),
+    ], align=True)
+
+class ScanRing:
+    """Fixed-layout scan slots in a named shared-memory block.
+
+    The creating process is the producer (publish()); others attach() by
+    name and read through RingReader. Stores are plain aligned 8-byte
+    writes, which x86-64 and AArch64 commit in program order for this
+    single-writer pattern as far as the readers' seq checks need.
+    """
+
+    def __init__(self, shm, owner):
+        self.shm = shm
+        self.owner = owner
+        self.header = np.ndarray((), dtype=_HEADER_DTYPE, buffer=shm.buf)
+        h = self.header
+        if int(h['magic']) != MAGIC or int(h['version']) != VERSION:
+            raise ValueError(f"{shm.name}: not a scan ring (version {VERSION})")
+        self.n_slots = int(h['n_slots'])
+        self.det_capacity = int(h['det_capacity'])
+        self.trk_capacity = int(h['trk_capacity'])
+        self.slots = np.ndarray(self.n_slots, dtype=_slot_dtype(self.det_capacity,
+                                                                self.trk_capacity),
+                                buffer=shm.buf, offset=_HEADER_BYTES)
+
+    @classmethod
+    def create(cls, name=None, n_slots=N_SLOTS, det_capacity=DET_CAPACITY,
+               trk_capacity=MAX_TRACKS):
+        size = _HEADER_BYTES + n_slots * _slot_dtype(det_capacity, trk_capacity).itemsize
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        header = np.ndarray((), dtype=_HEADER_DTYPE, buffer=shm.buf)
+        header[()] = 0
+        header['n_slots'] = n_slots
+        header['det_capacity'] = det_capacity
+        header['trk_capacity'] = trk_capacity
+        header['max_consumers'] = MAX_CONSUMERS
+        header['version'] = VERSION
+        header['magic'] = MAGIC
+        del header
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        return cls(shared_memory.SharedMemory(name=name), owner=False)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def head(self):
+        return int(self.header['head'])
+
+    @property
+    def closed(self):
+        return bool(self.header['closed'])
+
+    @property
+    def nbytes(self):
+        return self.shm.size
+
+    # ---- producer -----------------------------------------------------------
+
+    def publish(self, scan, active, dets, tracks):
+        """Write one scan into the next slot; never waits for consumers.
+
+        dets: records with range/doppler/mag fields, tracks: records with
+        TRACK_ROW_DTYPE fields (missing ones are left zero).
+        """
+        k = self.head
+        slot = self.slots[k % self.n_slots]
+        slot['seq'] = 2 * k + 1
+        n_d = min(len(dets), self.det_capacity)
+        n_t = min(len(tracks), self.trk_capacity)
+        for name in DET_ROW_DTYPE.names:
+            slot['dets'][name][:n_d] = dets[name][:n_d]
+        trk = slot['tracks']
+        trk[:n_t] = np.zeros(1, dtype=TRACK_ROW_DTYPE)
+        for name in tracks.dtype.names:
+            if name in TRACK_ROW_DTYPE.names:
+                trk[name][:n_t] = tracks[name][:n_t]
+        trk['scan'][:n_t] = scan
+        slot['scan'] = scan
+        slot['active'] = active
+        slot['n_dets'] = n_d
+        slot['n_tracks'] = n_t
+        slot['truncated'] = len(dets) - n_d
+        slot['t_pub_ns'] = time.monotonic_ns()
+        slot['seq'] = 2 * k + 2
+        self.header['head'] = k + 1
+
+    def close_stream(self):
+        """Tell consumers no more scans will come."""
+        self.header['closed'] = 1
+
+    # ---- consumers ----------------------------------------------------------
+
+    def reader(self, cid, start='oldest'):
+        return RingReader(self, cid, start)
+
+    def consumer_stats(self):
+        """{cid: (cursor, lag, dropped)} for every consumer that has read."""
+        head = self.head
+        cursor = self.header['cursor'].astype(np.int64) - 1
+        return {c: (int(cursor[c]), head - int(cursor[c]), int(self.header['dropped'][c]))
+                for c in range(MAX_CONSUMERS) if cursor[c] >= 0}
+
+    def close(self):
+        """Detach; the producer also removes the block."""
+        self.header = self.slots = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+class RingScan:
+    """Zero-copy view of scan number seq in a ring slot.
+
+    dets/tracks alias shared memory: check valid() after using them (or
+    take copy()) to know the producer did not reuse the slot meanwhile.
+    """
+
+    def __init__(self, slot, seq):
+        self._slot = slot
+        self.seq = seq
+        self.scan = int(slot['scan'])
+        self.active = int(slot['active'])
+        self.truncated = int(slot['truncated'])
+        self.t_pub_ns = int(slot['t_pub_ns'])
+        self.dets = slot['dets'][:int(slot['n_dets'])]
+        self.tracks = slot['tracks'][:int(slot['n_tracks'])]
+
+    def valid(self):
+        return int(self._slot['seq']) == 2 * self.seq + 2
+
+    def copy(self):
+        """(dets, tracks) private copies, or None if the slot was overrun."""
+        d, t = self.dets.copy(), self.tracks.copy()
+        return (d, t) if self.valid() else None
+
+class RingReader:
+    """One consumer's cursor (header word cid, written only by this reader).
+
+    start='oldest' begins at the oldest scan still in the ring, 'latest'
+    at the next scan published.
+    """
+
+    def __init__(self, ring, cid, start='oldest'):
+        if not 0 <= cid < MAX_CONSUMERS:
+            raise ValueError(f"consumer id must be 0..{MAX_CONSUMERS - 1}")
+        self.ring = ring
+        self.cid = cid
+        head = ring.head
+        self.cursor = head if start == 'latest' else max(0, head - ring.n_slots + 1)
+        self.dropped = 0
+        self.received = 0
+        self._sync()
+
+    def _sync(self):
+        # +1 so a cursor at scan 0 still marks the consumer as present
+        self.ring.header['cursor'][self.cid] = self.cursor + 1
+        self.ring.header['dropped'][self.cid] = self.dropped
+
+    def _skip_to(self, k):
+        if k > self.cursor:
+            self.dropped += k - self.cursor
+            self.cursor = k
+
+    def poll(self):
+        """Next scan as a RingScan, or None if nothing new is published."""
+        ring = self.ring
+        while True:
+            head = ring.head
+            if self.cursor >= head:
+                return None
+            # The slot after the oldest may be the one being rewritten
+            self._skip_to(head - ring.n_slots + 1)
+            k = self.cursor
+            slot = ring.slots[k % ring.n_slots]
+            if int(slot['seq']) != 2 * k + 2:
+                self._skip_to(k + 1)
+                continue
+            view = RingScan(slot, k)
+            if not view.valid():
+                self._skip_to(k + 1)
+                continue
+            self.cursor = k + 1
+            self.received += 1
+            self._sync()
+            return view
+
+    def latest(self):
+        """Newest complete scan, skipping (and counting) anything older."""
+        self._skip_to(self.ring.head - 1)
+        return self.poll()
+
+    def wait(self, timeout=None, interval=0.0005):
+        """poll() until a scan arrives, the producer closes, or timeout."""
+        t_end = None if timeout is None else time.monotonic() + timeout
+        while True:
+            view = self.poll()
+            if view is not None:
+                return view
+            if self.ring.closed and self.cursor >= self.ring.head:
+                return None
+            if t_end is not None and time.monotonic() > t_end:
+                return None
+            time.sleep(interval)
+
+    def __iter__(self):
+        while True:
+            view = self.wait()
+            if view is None:
+                return
+            yield view
+
+# =============================================================================
+# Demo: producer + analytics + slow display, one process each
+# =============================================================================
+
+def _consumer(name, cid, slow_s, out):
+    ring = ScanRing.attach(name)
+    reader = ring.reader(cid)
+    n_dets = torn = 0
+    latency = []
+    view = None
+    for view in reader:
+        n = len(view.dets)
+        if slow_s:
+            # Display: build the max-hold image straight from the shared views
+            img = np.zeros((128, 1024), dtype=np.uint32)
+            np.maximum.at(img, (view.dets['doppler'] & 127, view.dets['range'] & 1023),
+                          view.dets['mag'])
+        if not view.valid():
+            torn += 1
+            continue
+        n_dets += n
+        latency.append(time.monotonic_ns() - view.t_pub_ns)
+        # Rendering works on img only; the slot can be reused meanwhile
+        time.sleep(slow_s)
+    out.put((cid, reader.received, reader.dropped, torn, n_dets,
+             float(np.percentile(latency, 50)) / 1e6 if latency else 0.0))
+    view = reader = None
+    ring.close()
+
+def main():
+    import multiprocessing as mp
+
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    opts = dict(a[2:].split('=', 1) if '=' in a else (a[2:], '1')
+                for a in sys.argv[1:] if a.startswith('--'))
+    n_slots = int(opts.get('slots', N_SLOTS))
+    slow_s = float(opts.get('slow-ms', 20)) / 1e3
+
+    if args:
+        scans = list(scans_from_files(args[0], args[1] if len(args) > 1 else None))
+        source = args[0]
+    else:
+        scans = list(synthetic_scans(2000, dets_per_scan=2048))
+        source = "synthetic (2000 scans x 2048 detections)"
+
+    ring = ScanRing.create(n_slots=n_slots)
+    out = mp.Queue()
+    procs = [mp.Process(target=_consumer, args=(ring.name, cid, s, out))
+             for cid, s in ((0, 0.0), (1, slow_s))]
+    for p in procs:
+        p.start()
+    time.sleep(0.3)
+
+    n_dets = sum(len(d) for d, _, _ in scans)
+    t0 = time.perf_counter()
+    for k, (dets, tracks, active) in enumerate(scans):
+        ring.publish(k, active, dets, tracks)
+    elapsed = time.perf_counter() - t0
+    ring.close_stream()
+    results = sorted(out.get() for _ in procs)
+    for p in procs:
+        p.join()
+
+    print("\n=== SHARED-MEMORY SCAN RING ===")
+    print(f"Source: {source}")
+    print(f"Ring: {ring.n_slots} slots x {ring.det_capacity} dets/{ring.trk_capacity} tracks "
+          f"({ring.nbytes / 1e6:.1f} MB)")
+    print(f"Producer: {len(scans)} scans in {elapsed:.2f} s "
+          f"({len(scans) / elapsed:.0f} scans/s, {n_dets / elapsed / 1e6:.1f} M det/s)")
+    for (cid, received, dropped, torn, dets, p50), name in zip(results, ('analytics', 'display')):
+        print(f"  {name:9s} received {received}, overrun {dropped}, torn {torn}, "
+              f"{dets} dets, latency p50 {p50:.3f} ms")
+    ring.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+ADR_sparse.py
+Sparse per-scan detection store
+Keeps detections as CSR-by-scan arrays (scan pointer, int16 range, int16
+doppler, uint32 magnitude) in a directory of .npy files that open
+memory-mapped. Converts from the dense 5-column cell dump
+(data/radar_output.txt) and the 3-column detection files, and materializes
+dense cells only for the window being shown.
+"""
+
+import json
+import numpy as np
+from pathlib import Path
+
+from ADR_prefetch import read_line_chunks, iter_detection_scans, parse_int_rows
+from ADR_plot_extract import scan_ids
+from ADR_blocks import os_cfar_2d
+
+# Radar parameters (match VHDL)
+N_RANGE = 1024
+N_DOPPLER = 128
+
+# Dense dump columns: range, doppler, (unused), (unused), magnitude
+DENSE_COLUMNS = 5
+
+class SparseDetections:
+    """CSR-by-scan detection arrays.
+
+    Scan k holds rows indptr[k]:indptr[k + 1] of range/doppler/mag.
+    """
+
+    def __init__(self, indptr, rng, dop, mag, n_range=N_RANGE, n_doppler=N_DOPPLER):
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.range = np.asarray(rng, dtype=np.int16)
+        self.doppler = np.asarray(dop, dtype=np.int16)
+        self.mag = np.asarray(mag, dtype=np.uint32)
+        self.n_range = n_range
+        self.n_doppler = n_doppler
+
+    # ---- construction -------------------------------------------------------
+
+    @classmethod
+    def from_detections(cls, detections, scans=None, n_range=N_RANGE, n_doppler=N_DOPPLER):
+        """From (N, 3) [range, doppler, mag] rows and optional scan numbers."""
+        detections = np.asarray(detections).reshape(-1, 3)
+        if scans is None:
+            scans = scan_ids(detections, n_doppler)
+        scans = np.asarray(scans)
+        order = np.argsort(scans, kind='stable')
+        n_scans = int(scans.max()) + 1 if len(scans) else 0
+        indptr = np.zeros(n_scans + 1, dtype=np.int64)
+        np.cumsum(np.bincount(scans, minlength=n_scans), out=indptr[1:])
+        d = detections[order]
+        return cls(indptr, d[:, 0], d[:, 1], d[:, 2], n_range, n_doppler)
+
+    @classmethod
+    def from_detection_file(cls, filepath, n_range=N_RANGE, n_doppler=N_DOPPLER):
+        """From a 3-column detection file, scans split at its SCAN_END
+        markers (by scan_ids() for files without them)."""
+        b = _Builder(n_range, n_doppler)
+        for dets, ends in iter_detection_scans(filepath, n_doppler):
+            b.add(dets[:, 0], dets[:, 1], dets[:, 2], ends)
+        return b.finish()
+
+    @classmethod
+    def from_dense_file(cls, filepath, threshold=None, n_range=N_RANGE, n_doppler=N_DOPPLER,
+                        cfar=None):
+        """From a dense 5-column cell dump, one frame per n_range*n_doppler rows.
+
+        threshold=None runs os_cfar_2d on each frame and keeps its hits (the
+        radar_core detector); otherwise cells with mag > threshold are kept.
+        Frames are converted one at a time. Lines that are not five integer
+        fields, and cells outside the map, are skipped and do not count
+        towards a frame.
+        """
+        frame_cells = n_range * n_doppler
+        b = _Builder(n_range, n_doppler)
+        frame = np.zeros((n_range, n_doppler), dtype=np.int64)
+        filled = 0
+
+        def emit(frame):
+            if threshold is None:
+                hits = os_cfar_2d(frame, **(cfar or {}))
+            else:
+                hits = np.where(frame > threshold, frame, 0)
+            r, d = np.nonzero(hits)
+            b.add(r, d, hits[r, d], new_scan=True)
+
+        for block in read_line_chunks(filepath):
+            vals = parse_int_rows(block, DENSE_COLUMNS)
+            vals = vals[(vals[:, 0] >= 0) & (vals[:, 0] < n_range) &
+                        (vals[:, 1] >= 0) & (vals[:, 1] < n_doppler)]
+            pos = 0
+            while pos < len(vals):
+                take = min(frame_cells - filled, len(vals) - pos)
+                rows = vals[pos:pos + take]
+                frame[rows[:, 0], rows[:, 1]] = rows[:, 4]
+                filled += take
+                pos += take
+                if filled == frame_cells:
+                    emit(frame)
+                    frame[:] = 0
+                    filled = 0
+        if filled:
+            emit(frame)
+        return b.finish()
+
+    # ---- storage ------------------------------------------------------------
+
+    def save(self, path):
+        """Write to directory path (one .npy per array + meta.json)."""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        for name in ('indptr', 'range', 'doppler', 'mag'):
+            np.save(path / f'{name}.npy', getattr(self, name))
+        (path / 'meta.json').write_text(json.dumps(
+            dict(n_range=self.n_range, n_doppler=self.n_doppler,
+                 n_scans=self.n_scans, n_dets=len(self)), indent=2))
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        path = Path(path)
+        meta = json.loads((path / 'meta.json').read_text())
+        mode = 'r' if mmap else None
+        arrays = [np.load(path / f'{name}.npy', mmap_mode=mode)
+                  for name in ('indptr', 'range', 'doppler', 'mag')]
+        return cls(*arrays, n_range=meta['n_range'], n_doppler=meta['n_doppler'])
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.indptr, self.range, self.doppler, self.mag))
+
+    # ---- access -------------------------------------------------------------
+
+    @property
+    def n_scans(self):
+        return len(self.indptr) - 1
+
+    def __len__(self):
+        return int(self.indptr[-1]) if len(self.indptr) else 0
+
+    def scan(self, k):
+        """(range, doppler, mag) views of scan k."""
+        lo, hi = self.indptr[k], self.indptr[k + 1]
+        return self.range[lo:hi], self.doppler[lo:hi], self.mag[lo:hi]
+
+    def scans(self, lo, hi):
+        """(range, doppler, mag, scan) of scans [lo, hi); arrays are views."""
+        a, b = self.indptr[lo], self.indptr[hi]
+        scan = np.repeat(np.arange(lo, hi, dtype=np.int32), np.diff(self.indptr[lo:hi + 1]))
+        return self.range[a:b], self.doppler[a:b], self.mag[a:b], scan
+
+    def to_detections(self, lo=0, hi=None):
+        """(N, 3) int64 rows as load_detections() returns them."""
+        hi = self.n_scans if hi is None else hi
+        r, d, m, _ = self.scans(lo, hi)
+        return np.column_stack([r, d, m]).astype(np.int64)
+
+    def window(self, lo=0, hi=None, r0=0, r1=None, d0=0, d1=None):
+        """Dense (doppler, range) max-hold of scans [lo, hi) over a window.
+
+        Only the [d0, d1) x [r0, r1) cells are allocated.
+        """
+        hi = self.n_scans if hi is None else hi
+        r1 = self.n_range if r1 is None else r1
+        d1 = self.n_doppler if d1 is None else d1
+        r, d, m, _ = self.scans(lo, hi)
+        out = np.zeros((d1 - d0, r1 - r0), dtype=np.uint32)
+        keep = (r >= r0) & (r < r1) & (d >= d0) & (d < d1)
+        np.maximum.at(out, (d[keep] - d0, r[keep] - r0), m[keep])
+        return out
+
+class _Builder:
+    """Growable CSR arrays; rows arrive in scan order."""
+
+    def __init__(self, n_range, n_doppler):
+        self.n_range = n_range
+        self.n_doppler = n_doppler
+        self.parts = []
+        self.scan_len = [0]
+        # The open scan was only opened by a closing end (may stay empty)
+        self._tail_open = False
+
+    def add(self, r, d, mag, ends=(), new_scan=False):
+        """Append rows; each entry of ends closes the open scan after that
+        many of these rows (repeats give scans without rows).
+
+        new_scan=True opens a scan before these rows even if they are empty
+        (one call per frame).
+        """
+        if new_scan and (self.parts or self.scan_len != [0]):
+            self.scan_len.append(0)
+        if len(r) or len(ends):
+            counts = np.diff(np.r_[0, np.asarray(ends, dtype=np.int64), len(r)])
+            self.scan_len[-1] += int(counts[0])
+            self.scan_len += counts[1:].tolist()
+            self._tail_open = len(ends) > 0 and ends[-1] == len(r)
+        if len(r):
+            self.parts.append((np.asarray(r, dtype=np.int16), np.asarray(d, dtype=np.int16),
+                               np.asarray(mag, dtype=np.uint32)))
+        else:
+            self.parts.append((np.zeros(0, np.int16), np.zeros(0, np.int16),
+                               np.zeros(0, np.uint32)))
+
+    def finish(self):
+        if self._tail_open and self.scan_len[-1] == 0:
+            self.scan_len.pop()
+        indptr = np.zeros(len(self.scan_len) + 1, dtype=np.int64)
+        np.cumsum(self.scan_len, out=indptr[1:])
+        cols = [np.concatenate([p[i] for p in self.parts]) if self.parts
+                else np.zeros(0) for i in range(3)]
+        if not self.parts:
+            indptr = np.zeros(1, dtype=np.int64)
+        return SparseDetections(indptr, *cols, n_range=self.n_range, n_doppler=self.n_doppler)
+
+def main():
+    import sys
+
+    src = sys.argv[1] if len(sys.argv) > 1 else "../data/radar_output.txt"
+    dst = sys.argv[2] if len(sys.argv) > 2 else str(Path(src).with_suffix('.sparse'))
+
+    with open(src) as f:
+        n_cols = len(f.readline().split())
+    if n_cols == DENSE_COLUMNS:
+        store = SparseDetections.from_dense_file(src)
+        kind = "dense cell dump (OS-CFAR hits kept)"
+    else:
+        store = SparseDetections.from_detection_file(src)
+        kind = "detection list"
+    store.save(dst)
+
+    src_bytes = Path(src).stat().st_size
+    dst_bytes = sum(p.stat().st_size for p in Path(dst).iterdir())
+    dense_bytes = store.n_scans * store.n_range * store.n_doppler * 8
+
+    print("\n=== SPARSE DETECTION STORE ===")
+    print(f"Source: {src} ({kind})")
+    print(f"Scans: {store.n_scans}, detections: {len(store)}")
+    print(f"Disk: {src_bytes / 1e6:.2f} MB -> {dst_bytes / 1e6:.3f} MB ({dst})")
+    print(f"RAM:  {dense_bytes / 1e6:.2f} MB dense float64 RDMs -> "
+          f"{store.nbytes / 1e6:.3f} MB sparse")
+
+if __name__ == "__main__":
+    main()
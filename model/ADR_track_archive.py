@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+ADR_track_archive.py
+Chunked, delta-encoded archive for long track logs
+Stores tws_tracker reports (TRACK_ROW_DTYPE rows plus the SCAN_END
+ACTIVE= counts) in chunks of consecutive scans. Inside a chunk rows are
+grouped by track id; scan, range, doppler and vel_r are delta-coded along
+each track (they change slowly), zigzagged into the narrowest unsigned
+width that fits, quality and status share one byte, and each chunk is
+zlib-compressed on its own. A chunk index at the end of the file (each
+chunk also carries its own header, so a file whose writer died can still
+be read) gives random access by scan range or by track id without
+touching the rest of the file.
+
+  python ADR_track_archive.py <tracks.txt> [out.trka] [--chunk=SCANS] [--verify]
+"""
+
+import sys
+import time
+import zlib
+import struct
+import numpy as np
+from pathlib import Path
+
+from ADR_prefetch import TRACK_ROW_DTYPE, iter_track_chunks
+from ADR_track_store import TrackStore
+
+MAGIC = b'TRKA'
+VERSION = 1
+FILE_HDR = struct.Struct('<4sHH')              # magic, version, chunk_scans
+CHUNK_HDR = struct.Struct('<4sIIIIQ')           # b'CHNK', first_scan, n_scans, n_rows, nbytes, id_mask
+FOOTER = struct.Struct('<QI4s')                 # index offset, n_chunks, magic
+CHUNK_MAGIC = b'CHNK'
+
+# Scans per chunk (random access granularity)
+CHUNK_SCANS = 256
+# zlib level: 6 is within a few percent of 9 at a fraction of the time
+ZLIB_LEVEL = 6
+# Decoded chunks kept by the reader
+CACHE_CHUNKS = 8
+
+INDEX_DTYPE = np.dtype([
+    ('first_scan', '<u4'),
+    ('n_scans', '<u4'),
+    ('n_rows', '<u4'),
+    ('offset', '<u8'),       # file offset of the compressed payload
+    ('nbytes', '<u4'),
+    ('id_mask', '<u8'),      # bit i set when track id i occurs (all set if any id >= 64)
+])
+
+# Delta-coded columns, in payload order after the id table
+_DELTA_FIELDS = ('scan', 'range', 'doppler', 'vel_r')
+_WIDTHS = (np.uint8, np.uint16, np.uint32, np.uint64)
+
+def _zigzag(x):
+    x = np.asarray(x, dtype=np.int64)
+    return ((x << 1) ^ (x >> 63)).astype(np.uint64)
+
+def _unzigzag(u):
+    u = np.asarray(u, dtype=np.uint64)
+    return ((u >> np.uint64(1)).astype(np.int64)) ^ -((u & np.uint64(1)).astype(np.int64))
+
+def _narrow(u):
+    """(width code, bytes) of unsigned values in the smallest dtype."""
+    top = int(u.max()) if len(u) else 0
+    code = next(k for k, dt in enumerate(_WIDTHS) if top <= np.iinfo(dt).max)
+    return code, u.astype(_WIDTHS[code]).tobytes()
+
+def _id_mask(ids):
+    ids = np.unique(ids)
+    if len(ids) and (ids.min() < 0 or ids.max() >= 64):
+        return (1 << 64) - 1
+    return int(np.bitwise_or.reduce(np.left_shift(np.uint64(1), ids.astype(np.uint64)),
+                                    initial=np.uint64(0)))
+
+def encode_chunk(rows, first_scan, active):
+    """Compressed payload for TRACK_ROW_DTYPE rows of scans
+    [first_scan, first_scan + len(active))."""
+    order = np.lexsort((rows['scan'], rows['id']))
+    r = rows[order]
+    ids, counts = np.unique(r['id'], return_counts=True)
+    start = (np.cumsum(counts) - counts).astype(np.int64)
+    parts = [struct.pack('<III', len(ids), len(r), len(active)),
+             ids.astype('<i2').tobytes(), counts.astype('<u4').tobytes()]
+    widths = []
+    for name in _DELTA_FIELDS:
+        v = r[name].astype(np.int64)
+        d = np.diff(v, prepend=0)
+        # First row of each track: scan relative to the chunk, others absolute
+        d[start] = v[start] - (first_scan if name == 'scan' else 0)
+        code, data = _narrow(_zigzag(d))
+        widths.append(code)
+        parts.append(data)
+    qs = ((r['quality'].astype(np.uint8) & 0x3F) << 2) | (r['status'].astype(np.uint8) & 3)
+    parts.append(qs.tobytes())
+    code, data = _narrow(_zigzag(np.asarray(active, dtype=np.int64)))
+    widths.append(code)
+    parts.append(data)
+    body = bytes(widths) + b''.join(parts)
+    return zlib.compress(body, ZLIB_LEVEL)
+
+def decode_chunk(payload, first_scan):
+    """(rows in (scan, id) order, active counts) of one chunk."""
+    body = zlib.decompress(payload)
+    widths = body[:len(_DELTA_FIELDS) + 1]
+    pos = len(widths)
+    n_ids, n_rows, n_scans = struct.unpack_from('<III', body, pos)
+    pos += 12
+
+    def take(dtype, n):
+        nonlocal pos
+        a = np.frombuffer(body, dtype=dtype, count=n, offset=pos)
+        pos += a.nbytes
+        return a
+
+    ids = take('<i2', n_ids)
+    counts = take('<u4', n_ids).astype(np.int64)
+    start = np.cumsum(counts) - counts
+    track = np.repeat(np.arange(n_ids), counts)
+    rows = np.zeros(n_rows, dtype=TRACK_ROW_DTYPE)
+    rows['id'] = ids[track]
+    for name, code in zip(_DELTA_FIELDS, widths):
+        d = _unzigzag(take(_WIDTHS[code], n_rows))
+        if name == 'scan':
+            d[start] += first_scan
+        # Running sum restarted at each track's first row
+        c = np.cumsum(d)
+        if n_rows:
+            c -= np.repeat(c[start] - d[start], counts)
+        rows[name] = c
+    qs = take(np.uint8, n_rows)
+    rows['quality'] = qs >> 2
+    rows['status'] = qs & 3
+    active = _unzigzag(take(_WIDTHS[widths[-1]], n_scans))
+    return rows[np.lexsort((rows['id'], rows['scan']))], active
+
+class TrackArchiveWriter:
+    """Streaming writer: add scans (or parsed chunks) in scan order.
+
+    A chunk is compressed and written as soon as chunk_scans scans are
+    buffered; close() writes the remainder, the index and the footer.
+    TRK rows after the last SCAN_END go out as a final partial scan: it
+    counts in the chunk's n_scans but has no ACTIVE count, as in
+    TrackStore.from_file.
+    """
+
+    def __init__(self, path, chunk_scans=CHUNK_SCANS):
+        self.path = Path(path)
+        self.chunk_scans = chunk_scans
+        self._f = open(self.path, 'wb')
+        self._f.write(FILE_HDR.pack(MAGIC, VERSION, chunk_scans))
+        self._rows = []
+        self._active = []
+        self._first = 0
+        self.index = []
+        self.n_rows = 0
+
+    @property
+    def n_scans(self):
+        return self._first + len(self._active)
+
+    def add_scan(self, rows, active):
+        """One scan's rows (any scan numbers are replaced) and ACTIVE count."""
+        rows = np.array(rows, dtype=TRACK_ROW_DTYPE)
+        rows['scan'] = self.n_scans
+        self.extend(rows, [active])
+
+    def extend(self, rows, counts):
+        """Parsed (rows, scan_counts) as iter_track_chunks yields them."""
+        if len(rows):
+            self._rows.append(np.asarray(rows, dtype=TRACK_ROW_DTYPE))
+        self._active += list(counts)
+        while len(self._active) >= self.chunk_scans:
+            self._flush(self.chunk_scans)
+
+    def _flush(self, n, partial=False):
+        rows = (np.concatenate(self._rows) if self._rows
+                else np.zeros(0, dtype=TRACK_ROW_DTYPE))
+        end = self._first + n
+        if partial and len(rows):
+            # Keep every buffered row; scans past the counts have none
+            cut = len(rows)
+            n_scans = max(n, int(rows['scan'][-1]) + 1 - self._first)
+        else:
+            cut = int(np.searchsorted(rows['scan'], end))
+            n_scans = n
+        chunk, rest = rows[:cut], rows[cut:]
+        self._rows = [rest] if len(rest) else []
+        payload = encode_chunk(chunk, self._first, self._active[:n])
+        mask = _id_mask(chunk['id'])
+        self._f.write(CHUNK_HDR.pack(CHUNK_MAGIC, self._first, n_scans, len(chunk),
+                                     len(payload), mask))
+        self.index.append((self._first, n_scans, len(chunk), self._f.tell(), len(payload),
+                           mask))
+        self._f.write(payload)
+        self.n_rows += len(chunk)
+        self._first = end
+        del self._active[:n]
+
+    def close(self):
+        if self._active or self._rows:
+            self._flush(len(self._active), partial=True)
+        offset = self._f.tell()
+        self._f.write(np.array(self.index, dtype=INDEX_DTYPE).tobytes())
+        self._f.write(FOOTER.pack(offset, len(self.index), MAGIC))
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class TrackArchive:
+    """Random-access reader; decodes only the chunks a query touches."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._f = open(self.path, 'rb')
+        magic, version, self.chunk_scans = FILE_HDR.unpack(self._f.read(FILE_HDR.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}: not a track archive (version {VERSION})")
+        self.index = self._read_index()
+        self._starts = self.index['first_scan'].astype(np.int64)
+        self._cache = {}
+
+    def _read_index(self):
+        size = self.path.stat().st_size
+        if size >= FILE_HDR.size + FOOTER.size:
+            self._f.seek(size - FOOTER.size)
+            offset, n, magic = FOOTER.unpack(self._f.read(FOOTER.size))
+            if magic == MAGIC and offset + n * INDEX_DTYPE.itemsize + FOOTER.size == size:
+                self._f.seek(offset)
+                return np.frombuffer(self._f.read(n * INDEX_DTYPE.itemsize), dtype=INDEX_DTYPE)
+        # No footer (writer did not close): walk the chunk headers
+        entries = []
+        pos = FILE_HDR.size
+        while pos + CHUNK_HDR.size <= size:
+            self._f.seek(pos)
+            magic, first, n_scans, n_rows, nbytes, mask = CHUNK_HDR.unpack(
+                self._f.read(CHUNK_HDR.size))
+            if magic != CHUNK_MAGIC or pos + CHUNK_HDR.size + nbytes > size:
+                break
+            entries.append((first, n_scans, n_rows, pos + CHUNK_HDR.size, nbytes, mask))
+            pos += CHUNK_HDR.size + nbytes
+        return np.array(entries, dtype=INDEX_DTYPE)
+
+    @property
+    def n_scans(self):
+        return int(self.index['first_scan'][-1] + self.index['n_scans'][-1]) if len(self.index) else 0
+
+    @property
+    def n_rows(self):
+        return int(self.index['n_rows'].sum())
+
+    def __len__(self):
+        return self.n_rows
+
+    def chunk(self, k):
+        """Decoded (rows, active) of chunk k (cached)."""
+        if k not in self._cache:
+            e = self.index[k]
+            self._f.seek(int(e['offset']))
+            payload = self._f.read(int(e['nbytes']))
+            if len(self._cache) >= CACHE_CHUNKS:
+                self._cache.pop(next(iter(self._cache)))
+            self._cache[k] = decode_chunk(payload, int(e['first_scan']))
+        return self._cache[k]
+
+    def scans(self, lo=0, hi=None):
+        """(rows, active counts) of scans [lo, hi)."""
+        hi = self.n_scans if hi is None else min(hi, self.n_scans)
+        if lo >= hi:
+            return np.zeros(0, dtype=TRACK_ROW_DTYPE), np.zeros(0, dtype=np.int64)
+        k0 = int(np.searchsorted(self._starts, lo, side='right')) - 1
+        k1 = int(np.searchsorted(self._starts, hi, side='left'))
+        rows, active = [], []
+        for k in range(k0, k1):
+            r, a = self.chunk(k)
+            first = int(self._starts[k])
+            a0, a1 = max(lo - first, 0), min(hi - first, len(a))
+            active.append(a[a0:a1])
+            rows.append(r[(r['scan'] >= lo) & (r['scan'] < hi)])
+        return np.concatenate(rows), np.concatenate(active)
+
+    def scan(self, k):
+        return self.scans(k, k + 1)[0]
+
+    def track(self, trk_id):
+        """All rows of track id trk_id, in scan order."""
+        bit = (1 << trk_id) if 0 <= trk_id < 64 else 0
+        out = [self.chunk(k)[0] for k in range(len(self.index))
+               if not bit or int(self.index['id_mask'][k]) & bit]
+        rows = np.concatenate(out) if out else np.zeros(0, dtype=TRACK_ROW_DTYPE)
+        return rows[rows['id'] == trk_id]
+
+    @property
+    def scan_counts(self):
+        return self.scans()[1]
+
+    def to_store(self, lo=0, hi=None):
+        """TrackStore of scans [lo, hi), for the existing analysis code."""
+        rows, active = self.scans(lo, hi)
+        store = TrackStore(max(len(rows), 1))
+        store.extend(rows)
+        store.scan_counts = active.tolist()
+        return store
+
+    def close(self):
+        self._f.close()
+
+def convert(src, dst, chunk_scans=CHUNK_SCANS):
+    """Stream a TRK/SCAN_END text log into an archive; returns the writer."""
+    with TrackArchiveWriter(dst, chunk_scans) as w:
+        for rows, counts in iter_track_chunks(src):
+            w.extend(rows, counts)
+    return w
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    opts = dict(a[2:].split('=', 1) if '=' in a else (a[2:], '1')
+                for a in sys.argv[1:] if a.startswith('--'))
+    src = args[0] if args else "ADR_tracks.txt"
+    dst = args[1] if len(args) > 1 else str(Path(src).with_suffix('.trka'))
+
+    t0 = time.perf_counter()
+    w = convert(src, dst, int(opts.get('chunk', CHUNK_SCANS)))
+    t_conv = time.perf_counter() - t0
+
+    arc = TrackArchive(dst)
+    t0 = time.perf_counter()
+    rows, active = arc.scans()
+    t_read = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    text_rows = [r for r, _ in iter_track_chunks(src)]
+    t_parse = time.perf_counter() - t0
+    mid = arc.n_scans // 2
+    arc._cache.clear()
+    t0 = time.perf_counter()
+    arc.scan(mid)
+    t_scan = time.perf_counter() - t0
+    ids = np.unique(rows['id'])
+    arc._cache.clear()
+    t0 = time.perf_counter()
+    if len(ids):
+        arc.track(int(ids[len(ids) // 2]))
+    t_track = time.perf_counter() - t0
+
+    src_bytes = Path(src).stat().st_size
+    dst_bytes = Path(dst).stat().st_size
+    print("\n=== TRACK ARCHIVE ===")
+    print(f"Source: {src} ({src_bytes / 1e6:.2f} MB, {arc.n_scans} scans, {arc.n_rows} rows)")
+    print(f"Archive: {dst} ({dst_bytes / 1e6:.3f} MB, {len(arc.index)} chunks of "
+          f"{arc.chunk_scans} scans, {src_bytes / max(dst_bytes, 1):.1f}x smaller, "
+          f"{8 * dst_bytes / max(arc.n_rows, 1):.1f} bits/row)")
+    print(f"Convert: {t_conv:.2f} s; full read: archive {1e3 * t_read:.1f} ms vs "
+          f"text parse {1e3 * t_parse:.1f} ms")
+    print(f"Random access: scan {mid} {1e3 * t_scan:.2f} ms, one track {1e3 * t_track:.2f} ms")
+    if 'verify' in opts:
+        ref = np.concatenate(text_rows) if text_rows else np.zeros(0, dtype=TRACK_ROW_DTYPE)
+        ref = ref[np.lexsort((ref['id'], ref['scan']))]
+        counts = [c for _, cs in iter_track_chunks(src) for c in cs]
+        ok = np.array_equal(ref, rows) and list(active) == counts
+        print(f"Round trip: {'OK' if ok else 'MISMATCH'}")
+        if not ok:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,476 @@
+#!/usr/bin/env python3
+"""
+ADR_track_score.py
+Truth-based track scoring for the tactical scenario
+Rebuilds the tb_tactical fighter/attacker trajectories (or those of
+rtl/old/ADR_tb_quick.vhd for its ADR_quick_* dumps) and scores track
+tables against them: per-scan GOSPA and OSPA, and per-target coverage,
+fragmentation, ID swaps and latency to confirm. The optimal assignment
+of every scan of every run is solved in one batched Hungarian pass, so
+hundreds of runs are scored together.
+"""
+
+import sys
+import time
+import numpy as np
+from pathlib import Path
+
+from ADR_track_store import TrackStore
+
+# Scenario parameters (match tb_tactical.vhd)
+MAX_RANGE_M = 120000.0
+WAVELENGTH_M = 0.1
+MACH_MPS = 340.29
+NM_TO_M = 1852.0
+SCAN_RATE = 2.0
+PRF_HZ = [8000.0, 9000.0, 10000.0]
+MIN_RANGE_M = 5000.0
+FTR_OFFSET = [0.0, -50.0, -50.0, -100.0, -100.0, -150.0]
+FULL = dict(n_range=1024, n_doppler=128, n_fighters=6, n_attackers=4, num_scans=120)
+QUICK = dict(n_range=128, n_doppler=32, n_fighters=2, n_attackers=1, num_scans=5)
+
+# rtl/old/ADR_tb_quick.vhd (writes ADR_quick_det.txt / ADR_quick_trk.txt):
+# one PRF, a one-scan notch and its own start geometry (match VHDL)
+TB_QUICK = dict(n_range=128, n_doppler=32, n_fighters=2, num_scans=5, notch_scan=3,
+                prf=10000.0, mach=340.0, range_m=(80000.0, 82000.0, 70000.0),
+                vel=(-340.0, -340.0, -220.0))
+
+SCENARIOS = ('tactical', 'tb_quick')
+
+# tws_tracker output widths (trk_range/trk_doppler are signed Q2)
+POS_R_BITS = 12
+POS_D_BITS = 9
+
+# Default GOSPA/OSPA parameters: cutoff in bins, order
+CUTOFF = 10.0
+ORDER = 2
+
+SCAN_SCORE_DTYPE = np.dtype([
+    ('run', np.int32),
+    ('scan', np.int32),
+    ('gospa', np.float64),
+    ('ospa', np.float64),
+    ('loc', np.float64),      # GOSPA^p localization part
+    ('missed', np.int16),     # truths with no track within the cutoff
+    ('false', np.int16),      # tracks with no truth within the cutoff
+    ('n_truth', np.int16),
+    ('n_tracks', np.int16),
+])
+
+TRUTH_SCORE_DTYPE = np.dtype([
+    ('run', np.int32),
+    ('target', np.int16),
+    ('first_scan', np.int32),     # first scan the target is active
+    ('confirm_scan', np.int32),   # first scan a track is assigned, -1 never
+    ('latency', np.int32),        # confirm_scan - first_scan, -1 never
+    ('coverage', np.float64),     # fraction of active scans with a track
+    ('tracks', np.int16),         # distinct tracks assigned over the run
+    ('fragments', np.int16),      # track-to-no-track interruptions
+    ('swaps', np.int16),          # assigned track changed between scans
+])
+
+class Truth:
+    """Per-scan target positions in track units (bins); index 0 = scan 1.
+
+    range_bin, doppler_bin and active are (num_scans, n_targets) arrays;
+    Doppler is the aliased bin at that scan's PRF.
+    """
+
+    def __init__(self, range_m, vel, active, n_range, n_doppler, names, notch_scan,
+                 notch_len=3, prf=None):
+        self.range_m = range_m
+        self.vel = vel
+        self.active = active
+        self.n_range = n_range
+        self.n_doppler = n_doppler
+        self.names = names
+        self.notch_scan = notch_scan
+        self.notch_len = notch_len
+        if prf is None:
+            prf = np.array(PRF_HZ)[np.arange(len(range_m)) % 3]
+        prf = np.broadcast_to(np.asarray(prf, dtype=np.float64), (len(range_m),))[:, None]
+        self.range_bin = range_m / MAX_RANGE_M * n_range
+        self.doppler_bin = (2.0 * vel / WAVELENGTH_M / prf * n_doppler + n_doppler // 2) % n_doppler
+
+    @property
+    def n_scans(self):
+        return self.active.shape[0]
+
+    @property
+    def n_targets(self):
+        return self.active.shape[1]
+
+def scenario_for_file(path):
+    """'tb_quick' for the ADR_quick_* dumps of ADR_tb_quick.vhd, else 'tactical'."""
+    return 'tb_quick' if Path(path or '').name.startswith('ADR_quick') else 'tactical'
+
+def scenario_truth(quick=False, num_scans=None, scenario='tactical'):
+    """tb_tactical kinematics: fighters notch at NUM_SCANS/2 for 3 scans.
+
+    Positions are taken after each scan's kinematics update, as the
+    testbench generates that scan's returns from them. scenario='tb_quick'
+    returns tb_quick_truth() instead (quick is implied).
+    """
+    if scenario not in SCENARIOS:
+        raise ValueError(f"scenario must be one of {SCENARIOS}, got {scenario!r}")
+    if scenario == 'tb_quick':
+        return tb_quick_truth(num_scans)
+    p = QUICK if quick else FULL
+    num_scans = num_scans or p['num_scans']
+    notch = p['num_scans'] // 2
+    nf, na = p['n_fighters'], p['n_attackers']
+    rng = np.array([45.0 * NM_TO_M + FTR_OFFSET[i % 6] for i in range(nf)] +
+                   [39.0 * NM_TO_M] * na)
+    vel = np.array([-MACH_MPS] * nf + [-0.65 * MACH_MPS] * na)
+    act = np.ones(nf + na, dtype=bool)
+    out_r = np.zeros((num_scans, nf + na))
+    out_v = np.zeros((num_scans, nf + na))
+    out_a = np.zeros((num_scans, nf + na), dtype=bool)
+    for k, scan in enumerate(range(1, num_scans + 1)):
+        if scan == notch:
+            vel[:nf] = 0.0
+        elif scan == notch + 3:
+            vel[:nf] = -MACH_MPS
+        rng = np.where(act, rng + vel / SCAN_RATE, rng)
+        act &= rng >= MIN_RANGE_M
+        out_r[k], out_v[k], out_a[k] = rng, vel, act
+    names = [f"F{i + 1}" for i in range(nf)] + [f"A{i + 1}" for i in range(na)]
+    return Truth(out_r, out_v, out_a, p['n_range'], p['n_doppler'], names, notch - 1)
+
+def tb_quick_truth(num_scans=None):
+    """ADR_tb_quick kinematics: 2 fighters and 1 attacker at a fixed PRF,
+    fighters notching on NOTCH_SCAN only.
+
+    That testbench moves the targets before applying the scan's velocity
+    change, so the notch scan keeps its range step but shows zero Doppler.
+    """
+    p = TB_QUICK
+    num_scans = num_scans or p['num_scans']
+    notch = p['notch_scan']
+    nf = p['n_fighters']
+    rng = np.array(p['range_m'])
+    vel = np.array(p['vel'])
+    out_r = np.zeros((num_scans, len(rng)))
+    out_v = np.zeros((num_scans, len(rng)))
+    for k, scan in enumerate(range(1, num_scans + 1)):
+        rng = rng + vel / SCAN_RATE
+        if scan == notch:
+            vel[:nf] = 0.0
+        elif scan == notch + 1:
+            vel[:nf] = -p['mach']
+        out_r[k], out_v[k] = rng, vel
+    names = [f"F{i + 1}" for i in range(nf)] + [f"A{i + 1}" for i in range(len(rng) - nf)]
+    return Truth(out_r, out_v, np.ones(out_r.shape, dtype=bool), p['n_range'], p['n_doppler'],
+                 names, notch - 1, notch_len=1, prf=p['prf'])
+
+# ---- track tables -----------------------------------------------------------
+
+def _track_columns(tracks):
+    """(scan, id, range_q2, doppler_q2) from a TrackStore or TRACK_ROW_DTYPE rows."""
+    if isinstance(tracks, TrackStore):
+        return (tracks.column('scan'), tracks.column('track_id'),
+                tracks.column('range_q2'), tracks.column('doppler_q2'))
+    return tracks['scan'], tracks['id'], tracks['range'], tracks['doppler']
+
+def track_labels(scan, ids):
+    """Label each report with its track incarnation.
+
+    tws_tracker reuses slot ids, so a gap in an id's reports starts a new
+    track. Returns labels 0..n-1 in row order.
+    """
+    order = np.lexsort((scan, ids))
+    s, i = scan[order], ids[order]
+    new = np.ones(len(order), dtype=bool)
+    new[1:] = (i[1:] != i[:-1]) | (s[1:] != s[:-1] + 1)
+    labels = np.empty(len(order), dtype=np.int64)
+    labels[order] = np.cumsum(new) - 1
+    return labels
+
+def _pack_runs(runs, truth):
+    """Scatter every run's reports into padded (runs*scans, width) arrays."""
+    S = truth.n_scans
+    per_run = []
+    width = 1
+    for tracks in runs:
+        scan, ids, r, d = _track_columns(tracks)
+        keep = scan < S
+        scan, ids, r, d = scan[keep], ids[keep], r[keep], d[keep]
+        labels = track_labels(scan, ids)
+        # Slot of each report within its scan (rows are scan-ordered)
+        order = np.argsort(scan, kind='stable')
+        scan, labels, r, d = scan[order], labels[order], r[order], d[order]
+        start = np.searchsorted(scan, np.arange(S))
+        slot = np.arange(len(scan)) - start[scan]
+        width = max(width, int(slot.max()) + 1 if len(slot) else 1)
+        per_run.append((scan, slot, labels, r, d))
+
+    B = len(runs) * S
+    x_r = np.zeros((B, width))
+    x_d = np.zeros((B, width))
+    label = np.full((B, width), -1, dtype=np.int64)
+    for k, (scan, slot, labels, r, d) in enumerate(per_run):
+        row = k * S + scan
+        # Undo the signed Q2 wrap: tb_tactical logs the registers as signed
+        x_r[row, slot] = (r & ((1 << POS_R_BITS) - 1)) / 4.0
+        x_d[row, slot] = ((d & ((1 << POS_D_BITS) - 1)) / 4.0) % truth.n_doppler
+        label[row, slot] = labels
+    return x_r, x_d, label
+
+# ---- assignment -------------------------------------------------------------
+
+def batch_assign(cost):
+    """Minimum-cost assignment of rows to columns for a (B, n, m) stack, n <= m.
+
+    Shortest-augmenting-path Hungarian algorithm run on all B problems at
+    once; each Dijkstra step only touches the problems still searching.
+    Returns the column of every row, (B, n).
+    """
+    B, n, m = cost.shape
+    if n > m:
+        raise ValueError(f"batch_assign needs n <= m, got {n}x{m}")
+    a = np.zeros((B, n + 1, m + 1))
+    a[:, 1:, 1:] = cost
+    u = np.zeros((B, n + 1))
+    v = np.zeros((B, m + 1))
+    p = np.zeros((B, m + 1), dtype=np.int64)      # row (1-based) on each column
+    way = np.zeros((B, m + 1), dtype=np.int64)
+    j0 = np.zeros(B, dtype=np.int64)
+
+    for i in range(1, n + 1):
+        p[:, 0] = i
+        j0[:] = 0
+        minv = np.full((B, m + 1), np.inf)
+        used = np.zeros((B, m + 1), dtype=bool)
+        act = np.arange(B)
+        while len(act):
+            A = np.arange(len(act))
+            jj0 = j0[act]
+            uu = used[act]
+            uu[A, jj0] = True
+            pp = p[act]
+            i0 = pp[A, jj0]
+            uv = u[act]
+            cur = a[act, i0] - uv[A, i0][:, None] - v[act]
+            mv = minv[act]
+            better = ~uu & (cur < mv)
+            mv = np.where(better, cur, mv)
+            way[act] = np.where(better, jj0[:, None], way[act])
+            free = np.where(uu, np.inf, mv)
+            j1 = np.argmin(free, axis=1)
+            delta = free[A, j1]
+            # u[p[j]] += delta over used columns; their rows are distinct and
+            # unused columns are pointed at the spare row 0
+            uv[A[:, None], np.where(uu, pp, 0)] += np.where(uu, delta[:, None], 0.0)
+            u[act] = uv
+            v[act] -= np.where(uu, delta[:, None], 0.0)
+            minv[act] = np.where(uu, mv, mv - delta[:, None])
+            used[act] = uu
+            j0[act] = j1
+            act = act[pp[A, j1] != 0]
+        # Augment along way[] back to the root column
+        act = np.arange(B)
+        while len(act):
+            jj0 = j0[act]
+            j1 = way[act, jj0]
+            p[act, jj0] = p[act, j1]
+            j0[act] = j1
+            act = act[j1 != 0]
+
+    cols = np.zeros((B, n), dtype=np.int64)
+    b, j = np.nonzero(p[:, 1:])
+    cols[b, p[b, j + 1] - 1] = j
+    return cols
+
+def _distances(truth, x_r, x_d, doppler_weight, n_runs):
+    """(B, targets, width) truth-to-track distances in bins."""
+    t_r = np.tile(truth.range_bin, (n_runs, 1))[:, :, None]
+    t_d = np.tile(truth.doppler_bin, (n_runs, 1))[:, :, None]
+    n = truth.n_doppler
+    dd = (x_d[:, None, :] - t_d + n / 2) % n - n / 2
+    return np.hypot(x_r[:, None, :] - t_r, doppler_weight * dd)
+
+# ---- scoring ----------------------------------------------------------------
+
+def _gospa_cost(dist, x_act, t_act, c, p):
+    """(B, targets, tracks + targets) assignment costs for GOSPA (alpha=2).
+
+    Rows are targets; columns are tracks then one miss column per target.
+    Pairing costs min(d,c)^p - c^p/2 (the pair also saves the track's
+    false-track cost c^p/2, added back per track by the caller); a miss
+    costs c^p/2. Inactive targets cost nothing anywhere and absent tracks
+    look like misses.
+    """
+    B, T, M = dist.shape
+    half = c ** p / 2.0
+    cost = np.empty((B, T, M + T))
+    cost[:, :, :M] = np.where(x_act[:, None, :], np.minimum(dist, c) ** p - half, half)
+    cost[:, :, M:] = half
+    cost *= t_act[:, :, None]
+    return cost
+
+def _matches(cols, dist, x_act, t_act, c):
+    """(hit, distance, track column) per target from assigned columns."""
+    B, T, M = dist.shape
+    bi = np.arange(B)[:, None]
+    col = np.minimum(cols, M - 1)
+    d_hit = dist[bi, np.arange(T), col]
+    hit = t_act & (cols < M) & x_act[bi, col] & (d_hit < c)
+    return hit, d_hit, col
+
+def continuity_assign(dist, x_act, t_act, label, c=CUTOFF, p=ORDER):
+    """Track label per (run, scan, target), keeping correspondences alive.
+
+    As in CLEAR-MOT, a target keeps its last track for as long as that
+    track stays inside the cutoff, and only the rest is re-solved
+    optimally; otherwise targets closer together than the track noise
+    (the fighter formation) trade tracks every scan. Scans are solved in
+    order, each one batched over the runs. Inputs are (runs, scans, ...).
+    """
+    R, S, T, M = dist.shape
+    assigned = np.full((R, S, T), -1, dtype=np.int64)
+    prev = np.full((R, T), -1, dtype=np.int64)
+    for k in range(S):
+        cost = _gospa_cost(dist[:, k], x_act[:, k], t_act[:, k], c, p)
+        keep = ((label[:, k, None, :] == prev[:, :, None]) & (prev[:, :, None] >= 0)
+                & (dist[:, k] < c) & t_act[:, k, :, None])
+        cost[:, :, :M] = np.where(keep, -c ** p, cost[:, :, :M])
+        hit, _, col = _matches(batch_assign(cost), dist[:, k], x_act[:, k], t_act[:, k], c)
+        cur = np.where(hit, label[np.arange(R)[:, None], k, col], -1)
+        assigned[:, k] = cur
+        prev = np.where(hit, cur, prev)
+    return assigned
+
+def score_runs(runs, truth, c=CUTOFF, p=ORDER, doppler_weight=1.0):
+    """Score track tables (TrackStore or TRACK_ROW_DTYPE rows) against truth.
+
+    GOSPA uses alpha=2 and OSPA the same cutoff c and order p, both in
+    bins with Doppler scaled by doppler_weight; every scan of every run
+    goes through one batched assignment. The identity metrics use
+    continuity_assign(). Returns (SCAN_SCORE_DTYPE rows,
+    TRUTH_SCORE_DTYPE rows, assigned labels); the labels array is
+    (runs, scans, targets) with -1 where the target has no track.
+    """
+    R, S, T = len(runs), truth.n_scans, truth.n_targets
+    x_r, x_d, label = _pack_runs(runs, truth)
+    B, M = label.shape
+    t_act = np.tile(truth.active, (R, 1))
+    x_act = label >= 0
+
+    dist = _distances(truth, x_r, x_d, doppler_weight, R)
+    hit, d_hit, _ = _matches(batch_assign(_gospa_cost(dist, x_act, t_act, c, p)),
+                             dist, x_act, t_act, c)
+    half = c ** p / 2.0
+    n_truth = t_act.sum(1)
+    n_tracks = x_act.sum(1)
+    n_hit = hit.sum(1)
+    loc = np.where(hit, d_hit ** p, 0.0).sum(1)
+    gospa_p = loc + half * (n_truth - n_hit) + half * (n_tracks - n_hit)
+    big = np.maximum(n_truth, n_tracks)
+    ospa_p = (gospa_p + half * np.abs(n_truth - n_tracks)) / np.maximum(big, 1)
+
+    scans = np.zeros(B, dtype=SCAN_SCORE_DTYPE)
+    scans['run'] = np.repeat(np.arange(R), S)
+    scans['scan'] = np.tile(np.arange(S), R)
+    scans['gospa'] = gospa_p ** (1.0 / p)
+    scans['ospa'] = np.where(big > 0, ospa_p ** (1.0 / p), 0.0)
+    scans['loc'] = loc
+    scans['missed'] = n_truth - n_hit
+    scans['false'] = n_tracks - n_hit
+    scans['n_truth'] = n_truth
+    scans['n_tracks'] = n_tracks
+
+    assigned = continuity_assign(dist.reshape(R, S, T, M), x_act.reshape(R, S, M),
+                                 t_act.reshape(R, S, T), label.reshape(R, S, M), c, p)
+    return scans, truth_scores(assigned, truth.active), assigned
+
+def truth_scores(assigned, active):
+    """Per-target identity metrics from (runs, scans, targets) assigned labels."""
+    R, S, T = assigned.shape
+    act = np.broadcast_to(active, assigned.shape)
+    hit = assigned >= 0
+    k = np.arange(S)[None, :, None]
+
+    first = np.where(act.any(1), np.argmax(act, axis=1), -1)
+    confirm = np.where(hit.any(1), np.argmax(hit, axis=1), -1)
+    starts = hit.copy()
+    starts[:, 1:] &= ~hit[:, :-1]
+    # Label at the previous assigned scan (carried across gaps)
+    last = np.maximum.accumulate(np.where(hit, k, -1), axis=1)
+    prev = np.full(assigned.shape, -1, dtype=np.int64)
+    prev[:, 1:] = last[:, :-1]
+    prev_label = np.take_along_axis(assigned, np.maximum(prev, 0), axis=1)
+    swaps = hit & (prev >= 0) & (prev_label != assigned)
+    # Distinct labels per target: sort each column, count changes
+    srt = np.sort(np.where(hit, assigned, -1), axis=1)
+    n_tracks = ((srt[:, 1:] != srt[:, :-1]) & (srt[:, 1:] >= 0)).sum(1) + (srt[:, 0] >= 0)
+
+    out = np.zeros(R * T, dtype=TRUTH_SCORE_DTYPE)
+    out['run'] = np.repeat(np.arange(R), T)
+    out['target'] = np.tile(np.arange(T), R)
+    out['first_scan'] = first.ravel()
+    out['confirm_scan'] = confirm.ravel()
+    out['latency'] = np.where(confirm >= 0, confirm - first, -1).ravel()
+    out['coverage'] = (hit.sum(1) / np.maximum(act.sum(1), 1)).ravel()
+    out['tracks'] = n_tracks.ravel()
+    out['fragments'] = np.maximum(starts.sum(1) - 1, 0).ravel()
+    out['swaps'] = swaps.sum(1).ravel()
+    return out
+
+def phase_summary(scans, truth):
+    """Mean GOSPA/misses before, during and after the fighters' notch."""
+    n0, n1 = truth.notch_scan, truth.notch_scan + truth.notch_len
+    phases = {'pre-notch': scans['scan'] < n0,
+              'notch': (scans['scan'] >= n0) & (scans['scan'] < n1),
+              'post-notch': scans['scan'] >= n1}
+    out = {}
+    for name, sel in phases.items():
+        s = scans[sel]
+        if len(s):
+            out[name] = dict(gospa=float(s['gospa'].mean()), ospa=float(s['ospa'].mean()),
+                             missed=float(s['missed'].mean()), false=float(s['false'].mean()))
+    return out
+
+def print_report(scans, truths, truth):
+    """Per-target table and notch-phase GOSPA for one run."""
+    print(f"{'Target':>6} {'first':>6} {'confirm':>8} {'latency':>8} {'cover':>6} "
+          f"{'tracks':>7} {'frags':>6} {'swaps':>6}")
+    for t in truths:
+        conf = f"{t['confirm_scan']:8d}" if t['confirm_scan'] >= 0 else f"{'never':>8}"
+        lat = f"{t['latency'] / SCAN_RATE:7.1f}s" if t['latency'] >= 0 else f"{'-':>8}"
+        print(f"{truth.names[t['target']]:>6} {t['first_scan']:6d} {conf} {lat} "
+              f"{100 * t['coverage']:5.0f}% {t['tracks']:7d} {t['fragments']:6d} {t['swaps']:6d}")
+    print(f"\n{'Phase':>10} {'GOSPA':>7} {'OSPA':>6} {'missed':>7} {'false':>6}")
+    for name, s in phase_summary(scans, truth).items():
+        print(f"{name:>10} {s['gospa']:7.2f} {s['ospa']:6.2f} {s['missed']:7.2f} {s['false']:6.2f}")
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    opts = dict(a[2:].split('=', 1) if '=' in a else (a[2:], '1')
+                for a in sys.argv[1:] if a.startswith('--'))
+    files = args or ["tac_tracks.txt"]
+    quick = 'quick' in opts or all('quick' in f for f in files)
+    scenario = opts.get('scenario', scenario_for_file(files[0]))
+    c = float(opts.get('c', CUTOFF))
+    p = float(opts.get('p', ORDER))
+    wd = float(opts.get('doppler-weight', 1.0))
+    repeat = int(opts.get('repeat', 1))
+
+    truth = scenario_truth(quick, scenario=scenario)
+    runs = [TrackStore.from_file(f) for f in files] * repeat
+
+    print("\n=== TRACK SCORING vs SCENARIO TRUTH ===")
+    print(f"Mode: {'Quick' if quick else 'Full'} ({scenario}), {truth.n_targets} targets, "
+          f"{truth.n_scans} scans, c={c:g} bins, p={p:g}, Doppler weight {wd:g}")
+    t0 = time.perf_counter()
+    scans, truths, _ = score_runs(runs, truth, c, p, wd)
+    dt = time.perf_counter() - t0
+    print(f"Scored {len(runs)} runs ({len(scans)} scans) in {dt:.2f} s")
+
+    for k, f in enumerate(files):
+        print(f"\n--- {f} ---")
+        print(f"Mean GOSPA {scans['gospa'][scans['run'] == k].mean():.2f}, "
+              f"mean OSPA {scans['ospa'][scans['run'] == k].mean():.2f}")
+        print_report(scans[scans['run'] == k], truths[truths['run'] == k], truth)
+
+if __name__ == "__main__":
+    main()
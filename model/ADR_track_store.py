@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+ADR_track_store.py
+Columnar track store for tws_tracker reports
+One growable set of typed columns (track_id, scan, range_q2, doppler_q2,
+vel_r, quality, status) with amortized append. Rows stay in arrival
+(scan) order so scan slices are views; per-track views are slices of a
+track-grouped copy of the columns. New rows are merged into that copy on
+the next per-track access (no full re-sort), and per-id row counts are
+kept on append so len(), `in` and iteration never touch it.
+"""
+
+import numpy as np
+
+from ADR_prefetch import iter_track_chunks
+
+# Column name -> dtype (widths cover the tws_tracker output ports)
+TRACK_COLUMNS = {
+    'track_id': np.int16,
+    'scan': np.int32,
+    'range_q2': np.int32,      # trk_range, Q2 range bins
+    'doppler_q2': np.int32,    # trk_doppler, Q2 Doppler bins
+    'vel_r': np.int32,         # trk_vel_r, Q4 range bins/scan
+    'quality': np.int8,
+    'status': np.int8,         # TRK_FREE/TENTATIVE/FIRM/COAST = 0..3
+}
+
+# ADR_prefetch.TRACK_ROW_DTYPE field for each column
+_ROW_FIELDS = {'track_id': 'id', 'scan': 'scan', 'range_q2': 'range',
+               'doppler_q2': 'doppler', 'vel_r': 'vel_r', 'quality': 'quality',
+               'status': 'status'}
+
+class TrackView:
+    """Zero-copy column slices of one track's rows, in scan order.
+
+    The slices point into the store's track-grouped copy as of the view's
+    creation; they do not follow later appends.
+    """
+
+    __slots__ = ('id',) + tuple(TRACK_COLUMNS)
+
+    def __init__(self, trk_id, cols, lo, hi):
+        self.id = trk_id
+        for name in TRACK_COLUMNS:
+            setattr(self, name, cols[name][lo:hi])
+
+    def __len__(self):
+        return len(self.scan)
+
+    @property
+    def range_bins(self):
+        """Range in bins (Q2 / 4)."""
+        return self.range_q2 / 4.0
+
+    @property
+    def doppler_bins(self):
+        """Doppler in bins (Q2 / 4)."""
+        return self.doppler_q2 / 4.0
+
+class TrackStore:
+    """Growable columnar table of track reports.
+
+    Behaves like the old {track_id: Track} dict for iteration: len(),
+    `in`, iteration over ids, items() and store[track_id] all work, with
+    TrackView values.
+    """
+
+    def __init__(self, capacity=1024):
+        self._cols = {name: np.empty(capacity, dtype=dt) for name, dt in TRACK_COLUMNS.items()}
+        self._n = 0
+        self.scan_counts = []
+        # track id -> row count, in first-appearance order
+        self._counts = {}
+        # Track-grouped copy of the first _grouped_n rows, and id -> (lo, hi)
+        self._grouped = {name: np.empty(0, dtype=dt) for name, dt in TRACK_COLUMNS.items()}
+        self._grouped_n = 0
+        self._ranges = {}
+
+    # ---- append -------------------------------------------------------------
+
+    def _reserve(self, extra):
+        need = self._n + extra
+        cap = len(self._cols['scan'])
+        if need <= cap:
+            return
+        cap = max(need, 2 * cap)
+        for name, col in self._cols.items():
+            grown = np.empty(cap, dtype=col.dtype)
+            grown[:self._n] = col[:self._n]
+            self._cols[name] = grown
+
+    def append(self, track_id, scan, range_q2, doppler_q2, vel_r=0, quality=0, status=0):
+        self._reserve(1)
+        i = self._n
+        c = self._cols
+        c['track_id'][i] = track_id
+        c['scan'][i] = scan
+        c['range_q2'][i] = range_q2
+        c['doppler_q2'][i] = doppler_q2
+        c['vel_r'][i] = vel_r
+        c['quality'][i] = quality
+        c['status'][i] = status
+        self._counts[int(track_id)] = self._counts.get(int(track_id), 0) + 1
+        self._n += 1
+
+    def extend(self, rows):
+        """Append TRACK_ROW_DTYPE rows (ADR_prefetch parsers)."""
+        n = len(rows)
+        if n == 0:
+            return
+        self._reserve(n)
+        for name, field in _ROW_FIELDS.items():
+            self._cols[name][self._n:self._n + n] = rows[field]
+        uniq, first, count = np.unique(self._cols['track_id'][self._n:self._n + n],
+                                       return_index=True, return_counts=True)
+        # New ids join the dict in order of their first row
+        for t, _, c in sorted(zip(uniq.tolist(), first.tolist(), count.tolist()),
+                              key=lambda x: x[1]):
+            self._counts[t] = self._counts.get(t, 0) + c
+        self._n += n
+
+    def end_scan(self, active):
+        """Record a SCAN_END ACTIVE= count."""
+        self.scan_counts.append(active)
+
+    @classmethod
+    def from_file(cls, filepath):
+        """Load a TRK/SCAN_END track file."""
+        store = cls()
+        for rows, counts in iter_track_chunks(filepath):
+            store.extend(rows)
+            store.scan_counts += counts
+        return store
+
+    # ---- column access ------------------------------------------------------
+
+    @property
+    def n_rows(self):
+        return self._n
+
+    @property
+    def n_scans(self):
+        return len(self.scan_counts)
+
+    def column(self, name):
+        """View of one column over all rows (arrival order)."""
+        return self._cols[name][:self._n]
+
+    def scan_slice(self, lo, hi=None):
+        """Column views of scans [lo, hi); rows are scan-ordered so no copy."""
+        hi = lo + 1 if hi is None else hi
+        scan = self.column('scan')
+        a, b = np.searchsorted(scan, [lo, hi])
+        return {name: col[a:b] for name, col in self._cols.items()}
+
+    # ---- per-track index ----------------------------------------------------
+
+    def _index(self):
+        """Track-grouped columns and id -> (lo, hi), merged up to date."""
+        if self._grouped_n < self._n:
+            new = slice(self._grouped_n, self._n)
+            order = np.argsort(self._cols['track_id'][new], kind='stable')
+            new_ids = self._cols['track_id'][new][order]
+            # Rows arrive in scan order, so new rows go after a track's old ones
+            at = np.searchsorted(self._grouped['track_id'], new_ids, side='right')
+            self._grouped = {name: np.insert(self._grouped[name], at,
+                                             self._cols[name][new][order])
+                             for name in TRACK_COLUMNS}
+            self._grouped_n = self._n
+            ids = sorted(self._counts)
+            hi = np.cumsum([self._counts[t] for t in ids]).tolist()
+            lo = [0] + hi[:-1]
+            self._ranges = dict(zip(ids, zip(lo, hi)))
+        return self._grouped, self._ranges
+
+    def ids(self):
+        return list(self._counts)
+
+    def track(self, trk_id):
+        cols, ranges = self._index()
+        lo, hi = ranges[trk_id]
+        return TrackView(trk_id, cols, lo, hi)
+
+    def __getitem__(self, trk_id):
+        return self.track(trk_id)
+
+    def __contains__(self, trk_id):
+        return trk_id in self._counts
+
+    def __iter__(self):
+        return iter(self.ids())
+
+    def __len__(self):
+        return len(self._counts)
+
+    def items(self):
+        cols, ranges = self._index()
+        for trk_id in self._counts:
+            lo, hi = ranges[trk_id]
+            yield trk_id, TrackView(trk_id, cols, lo, hi)
+
+    def values(self):
+        for _, view in self.items():
+            yield view
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+ADR_tws_tracker.py
+Bit-exact model of tws_tracker
+Reproduces the track-while-scan state machine (collect, predict,
+associate, update, initiate, maintain, output) one scan at a time,
+including the RTL's register widths and signal-update ordering:
+Q2 positions that wrap at 12/9 bits, the 6-bit detection counter, and
+best_distance carrying over from the previous associated track.
+"""
+
+import sys
+import numpy as np
+
+from ADR_fixed import wrap, resize, shift_right
+from ADR_kernels import tracker_scan_kernel
+from ADR_prefetch import TRACK_ROW_DTYPE, load_scans
+
+# Generics used by radar_core (match VHDL)
+MAX_TRACKS = 32
+INIT_HITS = 2
+COAST_MAX = 5
+ASSOC_GATE_R = 10
+ASSOC_GATE_D = 5
+ALPHA_GAIN = 128
+BETA_GAIN = 64
+
+# Fixed by the entity
+MAX_DETS = 64
+RANGE_BITS = 10
+DOPPLER_BITS = 7
+POS_R_BITS = 12     # range_pos, Q2
+POS_D_BITS = 9      # dopp_pos, Q2
+VEL_R_BITS = 10     # range_vel, Q4
+VEL_D_BITS = 8
+NO_DISTANCE = 0xFFFF
+
+TRK_FREE, TRK_TENTATIVE, TRK_FIRM, TRK_COAST = 0, 1, 2, 3
+
+# One row per trk_valid beat; TRACK_ROW_DTYPE plus the Doppler velocity port
+REPORT_DTYPE = np.dtype(TRACK_ROW_DTYPE.descr + [('vel_d', np.int32)])
+
+class TwsTracker:
+    """tws_tracker with the given generics; feed one scan per scan() call.
+
+    The model assumes the testbench holds off detections until
+    scan_complete, as radar_core and the unit testbench do. The predict ..
+    initiate pass runs as one ADR_kernels loop when numba is available
+    (jit=None); jit=False keeps the NumPy methods below.
+    """
+
+    def __init__(self, max_tracks=MAX_TRACKS, init_hits=INIT_HITS, coast_max=COAST_MAX,
+                 assoc_gate_r=ASSOC_GATE_R, assoc_gate_d=ASSOC_GATE_D,
+                 alpha_gain=ALPHA_GAIN, beta_gain=BETA_GAIN, jit=None):
+        self.max_tracks = max_tracks
+        self.init_hits = init_hits
+        self.coast_max = coast_max
+        self.gate_r = assoc_gate_r
+        self.gate_d = assoc_gate_d
+        # to_signed(GAIN, innov'length) in the products
+        self.alpha_r = int(wrap(alpha_gain, POS_R_BITS))
+        self.alpha_d = int(wrap(alpha_gain, POS_D_BITS))
+        self.beta_r = int(wrap(beta_gain, POS_R_BITS))
+        self.beta_d = int(wrap(beta_gain, POS_D_BITS))
+        self._kernel = tracker_scan_kernel(jit)
+        self._params = np.array([self.gate_r, self.gate_d, self.alpha_r, self.alpha_d,
+                                 self.beta_r, self.beta_d, init_hits, coast_max],
+                                dtype=np.int64)
+        self.n_scans = 0
+        # best_distance/best_det_idx are not reset by aresetn
+        self.best_distance = NO_DISTANCE
+        self.best_det_idx = MAX_DETS - 1
+        self.reset()
+
+    def reset(self):
+        n = self.max_tracks
+        self.active = np.zeros(n, dtype=bool)
+        self.status = np.zeros(n, dtype=np.int64)
+        self.range_pos = np.zeros(n, dtype=np.int64)
+        self.dopp_pos = np.zeros(n, dtype=np.int64)
+        self.range_vel = np.zeros(n, dtype=np.int64)
+        self.dopp_vel = np.zeros(n, dtype=np.int64)
+        self.hit_count = np.zeros(n, dtype=np.int64)
+        self.miss_count = np.zeros(n, dtype=np.int64)
+        self.quality = np.zeros(n, dtype=np.int64)
+        self.age = np.zeros(n, dtype=np.int64)
+        self.num_active = 0
+        self._clear_dets()
+
+    def _clear_dets(self):
+        self.det_valid = np.zeros(MAX_DETS, dtype=bool)
+        self.det_assoc = np.zeros(MAX_DETS, dtype=bool)
+        self.det_range = np.zeros(MAX_DETS, dtype=np.int64)
+        self.det_dopp = np.zeros(MAX_DETS, dtype=np.int64)
+        self.det_count = 0
+
+    # ---- ST_COLLECT ---------------------------------------------------------
+
+    def collect(self, rng, dop):
+        """One det_valid beat. det_count is 6 bits, so the 65th detection
+        of a scan overwrites slot 0."""
+        k = self.det_count
+        self.det_valid[k] = True
+        self.det_assoc[k] = False
+        self.det_range[k] = int(rng) & ((1 << RANGE_BITS) - 1)
+        self.det_dopp[k] = int(dop) & ((1 << DOPPLER_BITS) - 1)
+        self.det_count = (k + 1) % MAX_DETS
+
+    # ---- det_last -> ST_PREDICT .. ST_OUTPUT --------------------------------
+
+    def _predict(self):
+        a = self.active
+        self.range_pos[a] = wrap(self.range_pos[a] + self.range_vel[a], POS_R_BITS)
+        self.dopp_pos[a] = wrap(self.dopp_pos[a] + self.dopp_vel[a], POS_D_BITS)
+        self.age[a] = (self.age[a] + 1) & 0xFF
+
+    def _associate(self, ti):
+        """ST_ASSOCIATE: the loop compares against the best_distance signal,
+        i.e. the value left by the previous active track, and the last
+        passing detection wins."""
+        # Gate uses unsigned Q2 detections (shift_left of the 12/9-bit resize)
+        meas_r = (self.det_range << 2) & ((1 << POS_R_BITS) - 1)
+        meas_d = (self.det_dopp << 2) & ((1 << POS_D_BITS) - 1)
+        dist_r = np.abs(self.range_pos[ti] - meas_r)
+        dist_d = np.abs(self.dopp_pos[ti] - meas_d)
+        dist = dist_r + dist_d
+        ok = (self.det_valid & ~self.det_assoc & (dist_r < 4 * self.gate_r)
+              & (dist_d < 4 * self.gate_d) & (dist < self.best_distance))
+        hits = np.flatnonzero(ok)
+        if len(hits):
+            self.best_det_idx = int(hits[-1])
+            self.best_distance = int(dist[hits[-1]])
+        else:
+            self.best_det_idx = MAX_DETS - 1
+            self.best_distance = NO_DISTANCE
+
+    def _update(self, ti):
+        if self.best_det_idx < MAX_DETS and self.best_distance < NO_DISTANCE:
+            k = self.best_det_idx
+            self.det_assoc[k] = True
+            # Track-side measurement is signed('0' & bin), wrapping when shifted
+            meas_r = int(wrap(self.det_range[k] << 2, POS_R_BITS))
+            meas_d = int(wrap(self.det_dopp[k] << 2, POS_D_BITS))
+            innov_r = int(wrap(meas_r - self.range_pos[ti], POS_R_BITS))
+            innov_d = int(wrap(meas_d - self.dopp_pos[ti], POS_D_BITS))
+            self.range_pos[ti] = wrap(self.range_pos[ti] + resize(
+                shift_right(innov_r * self.alpha_r, 8), POS_R_BITS), POS_R_BITS)
+            self.dopp_pos[ti] = wrap(self.dopp_pos[ti] + resize(
+                shift_right(innov_d * self.alpha_d, 8), POS_D_BITS), POS_D_BITS)
+            self.range_vel[ti] = wrap(self.range_vel[ti] + resize(
+                shift_right(innov_r * self.beta_r, 8), VEL_R_BITS), VEL_R_BITS)
+            self.dopp_vel[ti] = wrap(self.dopp_vel[ti] + resize(
+                shift_right(innov_d * self.beta_d, 8), VEL_D_BITS), VEL_D_BITS)
+            hits = self.hit_count[ti]
+            self.hit_count[ti] = (hits + 1) & 0xF
+            self.miss_count[ti] = 0
+            if self.status[ti] == TRK_TENTATIVE and hits >= self.init_hits:
+                self.status[ti] = TRK_FIRM
+            elif self.status[ti] == TRK_COAST:
+                self.status[ti] = TRK_FIRM
+            if self.quality[ti] < 15:
+                self.quality[ti] += 1
+        else:
+            misses = self.miss_count[ti]
+            self.miss_count[ti] = (misses + 1) & 0xF
+            if self.status[ti] == TRK_FIRM:
+                self.status[ti] = TRK_COAST
+            if misses >= self.coast_max:
+                self.active[ti] = False
+                self.status[ti] = TRK_FREE
+            if self.quality[ti] > 0:
+                self.quality[ti] -= 1
+
+    def _initiate(self):
+        k = 0
+        while True:
+            if self.det_valid[k] and not self.det_assoc[k]:
+                free = np.flatnonzero(~self.active)
+                if len(free):
+                    t = free[0]
+                    self.active[t] = True
+                    self.status[t] = TRK_TENTATIVE
+                    self.range_pos[t] = wrap(self.det_range[k] << 2, POS_R_BITS)
+                    self.dopp_pos[t] = wrap(self.det_dopp[k] << 2, POS_D_BITS)
+                    self.range_vel[t] = 0
+                    self.dopp_vel[t] = 0
+                    self.hit_count[t] = 1
+                    self.miss_count[t] = 0
+                    self.quality[t] = 1
+                    self.age[t] = 0
+            # Stops at det_count - 1 (6-bit) or straight away when det_count = 0
+            if self.det_count == 0 or k == (self.det_count - 1) % MAX_DETS:
+                break
+            k += 1
+
+    def _output(self):
+        out = np.flatnonzero(self.active & ((self.status == TRK_FIRM) |
+                                            (self.status == TRK_COAST)))
+        rows = np.zeros(len(out), dtype=REPORT_DTYPE)
+        rows['scan'] = self.n_scans
+        rows['id'] = out
+        rows['range'] = self.range_pos[out]
+        rows['doppler'] = self.dopp_pos[out]
+        rows['vel_r'] = self.range_vel[out]
+        rows['vel_d'] = self.dopp_vel[out]
+        rows['quality'] = self.quality[out]
+        rows['status'] = self.status[out]
+        return rows
+
+    def end_scan(self):
+        """det_last: run one scan; returns (REPORT_DTYPE rows, active_tracks)."""
+        if self._kernel is not None:
+            best = np.array([self.best_distance, self.best_det_idx], dtype=np.int64)
+            self._kernel(self.active, self.status, self.range_pos, self.dopp_pos,
+                         self.range_vel, self.dopp_vel, self.hit_count, self.miss_count,
+                         self.quality, self.age, self.det_valid, self.det_assoc,
+                         self.det_range, self.det_dopp, self.det_count, best, self._params)
+            self.best_distance, self.best_det_idx = int(best[0]), int(best[1])
+        else:
+            self._predict()
+            for ti in range(self.max_tracks):
+                if self.active[ti]:
+                    self._associate(ti)
+                    self._update(ti)
+            self._initiate()
+        self.num_active = int(self.active.sum())
+        rows = self._output()
+        self._clear_dets()
+        self.n_scans += 1
+        return rows, self.num_active
+
+    def scan(self, dets):
+        """Feed (N, 2+) [range, doppler, ...] detections and det_last."""
+        for det in np.asarray(dets):
+            self.collect(det[0], det[1])
+        return self.end_scan()
+
+def format_track_lines(rows, active):
+    """tac_tracks.txt lines for one scan, as tb_tactical writes them."""
+    lines = [f"TRK {r['id']} R={r['range']} D={r['doppler']} VR={r['vel_r']} "
+             f"Q={r['quality']} S={r['status']:02b}" for r in rows]
+    lines.append(f"SCAN_END ACTIVE={active}")
+    return lines
+
+def run_file(det_file, n_doppler=128, **generics):
+    """Track every scan of a detection file; returns (rows, active counts)."""
+    trk = TwsTracker(**generics)
+    rows, counts = [], []
+    for dets, _, _ in load_scans(det_file, None, n_doppler):
+        r, active = trk.scan(dets)
+        rows.append(r)
+        counts.append(active)
+    rows = np.concatenate(rows) if rows else np.zeros(0, dtype=REPORT_DTYPE)
+    return rows, counts
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    det_file = args[0] if len(args) > 0 else "tac_detections.txt"
+    out_file = args[1] if len(args) > 1 else "ADR_model_tracks.txt"
+    ref_file = args[2] if len(args) > 2 else None
+
+    is_quick = "quick" in det_file
+    n_doppler = 32 if is_quick else 128
+
+    rows, counts = run_file(det_file, n_doppler)
+    bounds = np.searchsorted(rows['scan'], np.arange(len(counts) + 1))
+    with open(out_file, 'w') as f:
+        for k, active in enumerate(counts):
+            f.write("\n".join(format_track_lines(rows[bounds[k]:bounds[k + 1]], active)) + "\n")
+
+    print("\n=== TWS TRACKER MODEL ===")
+    print(f"Scans: {len(counts)}, track reports: {len(rows)}, "
+          f"tracks seen: {len(np.unique(rows['id']))}")
+    print(f"Max active: {max(counts, default=0)}")
+    print(f"Written: {out_file}")
+
+    if ref_file:
+        with open(out_file) as a, open(ref_file) as b:
+            got, exp = a.read().split('\n'), b.read().split('\n')
+        diff = [k for k, (x, y) in enumerate(zip(got, exp)) if x.strip() != y.strip()]
+        if len(got) != len(exp):
+            diff.append(min(len(got), len(exp)))
+        if diff:
+            print(f"MISMATCH vs {ref_file}: {len(diff)} lines, first at line {diff[0] + 1}")
+        else:
+            print(f"Matches {ref_file} line for line")
+
+if __name__ == "__main__":
+    main()
@@ -3,15 +3,28 @@
 ADR_visualize.py
 Visualizer for Air Defense Radar tactical scenario
 Displays detections, tracks, and notch maneuver effects
+
+  python ADR_visualize.py summary [folder]        track summary text only
+  python ADR_visualize.py plot [folder] [--scan=N] [--history] [--no-show]
+  python ADR_visualize.py notch-report [folder]   notch analysis + truth scores
+  --det=FILE --trk=FILE name the files instead of searching
+
+matplotlib is only imported by the plot command. The old form
+`python ADR_visualize.py [folder] [scan]` still runs plot + summary.
 """
 
+import sys
 import numpy as np
-import matplotlib.pyplot as plt
 from pathlib import Path
-from dataclasses import dataclass, field
 from typing import Optional
 import glob
 
+from ADR_plot_extract import extract_plots, scan_ids, PLOT_DTYPE
+from ADR_prefetch import prefetch_detection_scans, prefetch_tracks, RdmAccumulator
+from ADR_scan_index import ScanIndex
+from ADR_track_store import TrackStore
+from ADR_track_score import scenario_truth, scenario_for_file, score_runs, print_report
+
 # Radar parameters (match VHDL)
 N_RANGE = 1024
 N_DOPPLER = 128
@@ -25,17 +38,26 @@ NOTCH_TIME = 30.0  # seconds
 N_RANGE_QUICK = 128
 N_DOPPLER_QUICK = 32
 
-@dataclass
-class Track:
-    id: int
-    range_bins: list = field(default_factory=list)
-    doppler_bins: list = field(default_factory=list)
-    velocities: list = field(default_factory=list)
-    qualities: list = field(default_factory=list)
-    scans: list = field(default_factory=list)
-
-def find_sim_files(det_name="ADR_quick_det.txt", trk_name="ADR_quick_trk.txt"):
-    """Auto-find simulation output files in common Vivado locations."""
+COMMANDS = ('summary', 'plot', 'notch-report')
+
+def _pyplot():
+    """matplotlib.pyplot, imported on first use so text commands start fast."""
+    import matplotlib.pyplot as plt
+    return plt
+
+def find_sim_files(det_name="ADR_quick_det.txt", trk_name="ADR_quick_trk.txt", folder=None):
+    """Auto-find simulation output files in common Vivado locations.
+
+    With folder set only that folder is searched (quick files first).
+    """
+    if folder is not None:
+        folder = Path(folder)
+        found = []
+        for names in ((det_name, "ADR_detections.txt"), (trk_name, "ADR_tracks.txt")):
+            hits = [folder / n for n in names if (folder / n).exists()]
+            found.append(str(hits[0]) if hits else None)
+        return tuple(found)
+    
     search_paths = [
         ".",  # Current directory
         "..",
@@ -122,50 +144,16 @@ def load_detections(filepath: str = "ADR_detections.txt"):
     return np.array(detections) if detections else np.array([])
 
 def load_tracks(filepath: str = "ADR_tracks.txt"):
-    """Load track data from simulation output."""
-    tracks = {}
-    scan_counts = []
-    current_scan = 0
-    
+    """Load track data from simulation output.
+
+    Returns (TrackStore, scan_counts); both TRK formats are accepted:
+      TRK id R=range D=doppler Q=quality
+      TRK id R=range D=doppler VR=vel Q=quality S=status
+    """
     if not filepath or not Path(filepath).exists():
-        return {}, []
-    
-    with open(filepath) as f:
-        for line in f:
-            parts = line.strip().split()
-            if not parts:
-                continue
-            
-            if parts[0] == "TRK":
-                trk_id = int(parts[1])
-                if trk_id not in tracks:
-                    tracks[trk_id] = Track(id=trk_id)
-                
-                # Parse: TRK id R=range D=doppler Q=quality
-                # or:    TRK id R=range D=doppler VR=vel Q=quality S=status
-                r = int(parts[2].split('=')[1])
-                d = int(parts[3].split('=')[1])
-                
-                # Handle both quick format (5 parts) and full format (7 parts)
-                if len(parts) >= 5:
-                    # Find Q= field
-                    q = 0
-                    for p in parts[4:]:
-                        if p.startswith('Q='):
-                            q = int(p.split('=')[1])
-                            break
-                
-                tracks[trk_id].range_bins.append(r)
-                tracks[trk_id].doppler_bins.append(d)
-                tracks[trk_id].qualities.append(q)
-                tracks[trk_id].scans.append(current_scan)
-                
-            elif parts[0] == "SCAN_END":
-                active = int(parts[1].split('=')[1])
-                scan_counts.append(active)
-                current_scan += 1
-    
-    return tracks, scan_counts
+        return TrackStore(), []
+    tracks = TrackStore.from_file(filepath)
+    return tracks, tracks.scan_counts
 
 def bin_to_range_km(bin_idx):
     """Convert range bin to km."""
@@ -181,25 +169,35 @@ def bin_to_velocity_mps(doppler_bin, prf_idx=0):
     fd = centered * prf / N_DOPPLER
     return fd * WAVELENGTH_M / 2.0
 
-def plot_rdm_with_tracks(detections, tracks, scan_idx=None, title=""):
-    """Plot Range-Doppler Map with track overlays."""
+def plot_rdm_with_tracks(detections, tracks, scan_idx=None, title="", det_index=None,
+                         scans=None):
+    """Plot Range-Doppler Map with track overlays.
+
+    With scan_idx set, only that scan's detections are drawn; they are read
+    through det_index (a ScanIndex of the detection file) when given, else
+    picked out of detections by scan number (scans, or scan_ids() when the
+    scan numbers are not known).
+    """
+    plt = _pyplot()
     fig, axes = plt.subplots(1, 2, figsize=(14, 5))
     
     # Build RDM from detections
-    rdm = np.zeros((N_DOPPLER, N_RANGE))
-    if len(detections) > 0:
-        # If scan_idx specified, filter to approximate scan
-        samples_per_scan = N_RANGE * N_DOPPLER
-        if scan_idx is not None:
-            start = scan_idx * samples_per_scan
-            end = min(start + samples_per_scan, len(detections))
-            scan_dets = detections[start:end]
+    if scan_idx is not None:
+        if det_index is not None:
+            scan_dets, _ = det_index.load_detections(scan_idx)
+        elif len(detections) > 0:
+            if scans is None:
+                scans = scan_ids(detections, N_DOPPLER)
+            scan_dets = detections[scans == scan_idx]
         else:
             scan_dets = detections
-        
-        for r, d, mag in scan_dets:
-            if 0 <= r < N_RANGE and 0 <= d < N_DOPPLER:
-                rdm[int(d), int(r)] = max(rdm[int(d), int(r)], mag)
+    else:
+        scan_dets = detections
+    
+    rdm_acc = RdmAccumulator(N_RANGE, N_DOPPLER)
+    if len(scan_dets) > 0:
+        rdm_acc.add(np.asarray(scan_dets, dtype=np.int64))
+    rdm = rdm_acc.rdm
     
     # RDM plot
     ax1 = axes[0]
@@ -220,9 +218,9 @@ def plot_rdm_with_tracks(detections, tracks, scan_idx=None, title=""):
     # Overlay tracks
     colors = plt.cm.tab10(np.linspace(0, 1, 10))
     for trk_id, trk in tracks.items():
-        if len(trk.range_bins) > 0:
-            r_km = [bin_to_range_km(r) for r in trk.range_bins]
-            v_mps = [bin_to_velocity_mps(d) for d in trk.doppler_bins]
+        if len(trk) > 0:
+            r_km = bin_to_range_km(trk.range_bins)
+            v_mps = bin_to_velocity_mps(trk.doppler_bins)
             
             color = colors[trk_id % 10]
             ax1.plot(r_km, v_mps, 'o-', color=color, markersize=4, 
@@ -237,10 +235,10 @@ def plot_rdm_with_tracks(detections, tracks, scan_idx=None, title=""):
     # Track quality over time
     ax2 = axes[1]
     for trk_id, trk in tracks.items():
-        if len(trk.scans) > 0:
-            t_sec = np.array(trk.scans) / SCAN_RATE
+        if len(trk) > 0:
+            t_sec = trk.scan / SCAN_RATE
             color = colors[trk_id % 10]
-            ax2.plot(t_sec, trk.qualities, 'o-', color=color, 
+            ax2.plot(t_sec, trk.quality, 'o-', color=color, 
                     markersize=3, label=f'Track {trk_id}')
     
     ax2.axvline(NOTCH_TIME, color='red', linestyle='--', label='Notch Start')
@@ -257,6 +255,7 @@ def plot_rdm_with_tracks(detections, tracks, scan_idx=None, title=""):
 
 def plot_track_history(tracks):
     """Plot track position history in Range-Time and Doppler-Time."""
+    plt = _pyplot()
     fig, axes = plt.subplots(2, 1, figsize=(12, 8), sharex=True)
     
     colors = plt.cm.tab10(np.linspace(0, 1, 10))
@@ -264,9 +263,9 @@ def plot_track_history(tracks):
     # Range vs Time
     ax1 = axes[0]
     for trk_id, trk in tracks.items():
-        if len(trk.scans) > 0:
-            t_sec = np.array(trk.scans) / SCAN_RATE
-            r_km = [bin_to_range_km(r) for r in trk.range_bins]
+        if len(trk) > 0:
+            t_sec = trk.scan / SCAN_RATE
+            r_km = bin_to_range_km(trk.range_bins)
             color = colors[trk_id % 10]
             ax1.plot(t_sec, r_km, 'o-', color=color, markersize=2, 
                     label=f'Track {trk_id}')
@@ -281,9 +280,9 @@ def plot_track_history(tracks):
     # Velocity vs Time
     ax2 = axes[1]
     for trk_id, trk in tracks.items():
-        if len(trk.scans) > 0:
-            t_sec = np.array(trk.scans) / SCAN_RATE
-            v_mps = [bin_to_velocity_mps(d) for d in trk.doppler_bins]
+        if len(trk) > 0:
+            t_sec = trk.scan / SCAN_RATE
+            v_mps = bin_to_velocity_mps(trk.doppler_bins)
             color = colors[trk_id % 10]
             ax2.plot(t_sec, v_mps, 'o-', color=color, markersize=2,
                     label=f'Track {trk_id}')
@@ -302,6 +301,7 @@ def plot_track_history(tracks):
 
 def plot_active_tracks(scan_counts):
     """Plot number of active tracks over time."""
+    plt = _pyplot()
     fig, ax = plt.subplots(figsize=(10, 4))
     
     t_sec = np.arange(len(scan_counts)) / SCAN_RATE
@@ -321,20 +321,25 @@ def plot_active_tracks(scan_counts):
     plt.tight_layout()
     return fig
 
-def analyze_notch_performance(tracks):
-    """Analyze track maintenance during notch maneuver."""
+def analyze_notch_performance(tracks, quick=False, scenario='tactical'):
+    """Analyze track maintenance during notch maneuver.
+
+    Ends with truth-based scores (GOSPA, coverage, fragmentation, ID
+    swaps, latency) against the trajectories of the testbench that wrote
+    the tracks (scenario, see ADR_track_score.scenario_for_file).
+    """
     print("\n=== NOTCH MANEUVER ANALYSIS ===\n")
     
     notch_start_scan = int(NOTCH_TIME * SCAN_RATE)
     notch_end_scan = int((NOTCH_TIME + 10) * SCAN_RATE)
     
     for trk_id, trk in tracks.items():
-        if len(trk.scans) < 5:
+        if len(trk) < 5:
             continue
         
-        scans = np.array(trk.scans)
-        quals = np.array(trk.qualities)
-        vels = np.array([bin_to_velocity_mps(d) for d in trk.doppler_bins])
+        scans = trk.scan
+        quals = trk.quality
+        vels = bin_to_velocity_mps(trk.doppler_bins)
         
         # Check if track existed before notch
         pre_notch = scans < notch_start_scan
@@ -364,46 +369,119 @@ def analyze_notch_performance(tracks):
             print(f"  ❌ Track NOT RECOVERED after notch")
         
         print()
-
-def main():
-    print("Searching for simulation output files...")
     
-    det_file, trk_file = find_sim_files()
-    
-    if det_file:
-        print(f"Found detections: {det_file}")
-    else:
-        print("No detection file found")
+    truth = scenario_truth(quick, scenario=scenario)
+    scans, truths, _ = score_runs([tracks], truth)
+    print(f"Truth scoring (mean GOSPA {scans['gospa'].mean():.2f} bins):")
+    print_report(scans, truths, truth)
+
+
+class SimRun:
+    """One simulation's output files, loaded on demand.
+
+    Text commands only touch the track file; detections, the RDM and the
+    plots are loaded the first time a plot needs them.
+    """
+
+    def __init__(self, det_file=None, trk_file=None):
+        self.det_file = det_file
+        self.trk_file = trk_file
+        # Detect if quick or full sim based on filename
+        self.is_quick = "quick" in (det_file or "") or "quick" in (trk_file or "")
+        self.n_range = N_RANGE_QUICK if self.is_quick else N_RANGE
+        self.n_doppler = N_DOPPLER_QUICK if self.is_quick else N_DOPPLER
+        self._tracks = None
+        self.detections = None
+        self.det_scans = None
+        self.rdm_acc = None
+
+    @classmethod
+    def find(cls, folder=None):
+        if folder is not None:
+            print(f"Searching in: {folder}")
+        else:
+            print("Searching for simulation output files...")
+        return cls(*find_sim_files(folder=folder))
+
+    def report_files(self):
+        print(f"Found detections: {self.det_file}" if self.det_file else "No detection file found")
+        print(f"Found tracks: {self.trk_file}" if self.trk_file else "No track file found")
+        if not self.det_file and not self.trk_file:
+            print("\nNo data found. Run simulation first.")
+            print("Searched for: ADR_quick_det.txt, ADR_quick_trk.txt")
+            print("             ADR_detections.txt, ADR_tracks.txt")
+            print("\nOr specify path manually:")
+            print("  python ADR_visualize.py <command> /path/to/sim/folder")
+            return False
+        print(f"Mode: {'Quick' if self.is_quick else 'Full'} ({self.n_range}x{self.n_doppler})")
+        return True
+
+    @property
+    def tracks(self):
+        if self._tracks is None:
+            self._tracks = TrackStore.from_file(self.trk_file) if self.trk_file else TrackStore()
+        return self._tracks
+
+    def load_all(self):
+        """Detections and tracks together.
+
+        Both files parse in background threads; chunks are consumed as they
+        arrive so RDM accumulation and track building overlap the parsing.
+        """
+        det_stream = prefetch_detection_scans(self.det_file, self.n_doppler)
+        trk_stream = prefetch_tracks(self.trk_file) if self._tracks is None else []
         
-    if trk_file:
-        print(f"Found tracks: {trk_file}")
-    else:
-        print("No track file found")
-    
-    if not det_file and not trk_file:
-        print("\nNo data found. Run simulation first.")
-        print("Searched for: ADR_quick_det.txt, ADR_quick_trk.txt")
-        print("             ADR_detections.txt, ADR_tracks.txt")
-        print("\nOr specify path manually:")
-        print("  python ADR_visualize.py /path/to/sim/folder")
-        return
-    
-    # Detect if quick or full sim based on filename
-    is_quick = "quick" in (det_file or "") or "quick" in (trk_file or "")
-    n_range = N_RANGE_QUICK if is_quick else N_RANGE
-    n_doppler = N_DOPPLER_QUICK if is_quick else N_DOPPLER
-    
-    print(f"Mode: {'Quick' if is_quick else 'Full'} ({n_range}x{n_doppler})")
-    
-    detections = load_detections(det_file) if det_file else np.array([])
-    tracks, scan_counts = load_tracks(trk_file) if trk_file else ({}, [])
+        self.rdm_acc = RdmAccumulator(self.n_range, self.n_doppler)
+        det_chunks, ends, n = [], [], 0
+        for dets, e in det_stream:
+            if len(dets):
+                self.rdm_acc.add(dets)
+            det_chunks.append(dets)
+            ends.append(e + n)
+            n += len(dets)
+        self.detections = np.concatenate(det_chunks) if n else np.array([])
+        # Scan number of each detection, from the file's SCAN_END markers
+        ends = np.concatenate(ends) if ends else np.zeros(0, dtype=np.int64)
+        self.det_scans = np.searchsorted(ends, np.arange(n), side='right').astype(np.int32)
+        
+        if self._tracks is None:
+            self._tracks = TrackStore()
+            for rows, counts in trk_stream:
+                self._tracks.extend(rows)
+                self._tracks.scan_counts.extend(counts)
+
+def print_track_summary(run):
+    print("\n=== TRACK SUMMARY ===")
+    km_per_bin = MAX_RANGE_KM / run.n_range
+    nm_per_km = 0.539957
+    nm_per_bin = km_per_bin * nm_per_km
+    for trk_id, trk in run.tracks.items():
+        r_start = trk.range_bins[0] * nm_per_bin
+        r_end = trk.range_bins[-1] * nm_per_bin
+        print(f"Track {trk_id}: {len(trk)} updates, "
+              f"R={r_start:.1f}->{r_end:.1f} nm, "
+              f"Q={trk.quality[-1] if len(trk) else 0}")
+
+def plot_run(run, scan_idx=None, history=False, show=True):
+    """Track and detection-heatmap figures (plus the history set with history)."""
+    plt = _pyplot()
+    run.load_all()
+    detections, tracks = run.detections, run.tracks
+    n_range, n_doppler = run.n_range, run.n_doppler
+    scan_counts = tracks.scan_counts
     
     print(f"Loaded {len(detections)} detections")
     print(f"Loaded {len(tracks)} tracks over {len(scan_counts)} scans")
     
+    # Plot extraction: one centroid per cluster of adjacent CFAR hits
+    plots = extract_plots(detections, n_range, n_doppler, run.det_scans) if len(detections) > 0 \
+        else np.zeros(0, dtype=PLOT_DTYPE)
+    if len(plots) > 0:
+        print(f"Extracted {len(plots)} plots over {plots['scan'][-1] + 1} scans")
+    
     if len(tracks) == 0 and len(detections) == 0:
         print("Files found but empty.")
-        return
+        return False
     
     # Quick track plot
     if tracks:
@@ -420,16 +498,15 @@ def main():
         mps_per_bin = prf * WAVELENGTH_M / (2 * n_doppler)
         kts_per_mps = 1.94384
         kts_per_bin = mps_per_bin * kts_per_mps
-        zero_doppler_q2 = n_doppler / 2 * 4  # Q2 format
         
         # Range vs scan
         ax1 = axes[0]
         colors = plt.cm.tab10(np.linspace(0, 1, 10))
         for trk_id, trk in tracks.items():
-            if len(trk.scans) > 0:
+            if len(trk) > 0:
                 color = colors[trk_id % 10]
-                range_nm = [r / 4 * nm_per_bin for r in trk.range_bins]  # Q2 to bins to nm
-                ax1.plot(trk.scans, range_nm, 'o-', color=color, 
+                range_nm = trk.range_bins * nm_per_bin
+                ax1.plot(trk.scan, range_nm, 'o-', color=color, 
                         markersize=4, label=f'Track {trk_id}')
         ax1.set_xlabel('Scan')
         ax1.set_ylabel('Range (nm)')
@@ -440,11 +517,10 @@ def main():
         # Doppler vs scan (in knots)
         ax2 = axes[1]
         for trk_id, trk in tracks.items():
-            if len(trk.scans) > 0:
+            if len(trk) > 0:
                 color = colors[trk_id % 10]
-                # Q2 doppler bins to velocity: (d/4 - N/2) * kts_per_bin
-                vel_kts = [(d / 4 - n_doppler / 2) * kts_per_bin for d in trk.doppler_bins]
-                ax2.plot(trk.scans, vel_kts, 'o-', color=color,
+                vel_kts = (trk.doppler_bins - n_doppler / 2) * kts_per_bin
+                ax2.plot(trk.scan, vel_kts, 'o-', color=color,
                         markersize=4, label=f'Track {trk_id}')
         ax2.axhline(0, color='red', linestyle='--', alpha=0.5, label='Zero Doppler (Notch)')
         ax2.set_xlabel('Scan')
@@ -460,12 +536,7 @@ def main():
     # Detection heatmap
     if len(detections) > 0:
         fig2, ax = plt.subplots(figsize=(10, 6))
-        rdm = np.zeros((n_doppler, n_range))
-        for r, d, mag in detections:
-            if 0 <= int(r) < n_range and 0 <= int(d) < n_doppler:
-                rdm[int(d), int(r)] = max(rdm[int(d), int(r)], mag)
-        
-        rdm_db = 20 * np.log10(rdm + 1)
+        rdm_db = 20 * np.log10(run.rdm_acc.rdm + 1)
         
         # Axis labels in nm and kts
         km_per_bin = MAX_RANGE_KM / n_range
@@ -479,6 +550,12 @@ def main():
         
         ax.imshow(rdm_db, aspect='auto', origin='lower', cmap='viridis',
                   extent=[range_nm[0], range_nm[-1], vel_kts[0], vel_kts[-1]])
+        
+        # Plot centroids on top of the raw cells
+        ax.plot(plots['range'] * km_per_bin * nm_per_km,
+                (plots['doppler'] - n_doppler/2) * mps_per_bin * kts_per_mps,
+                'r+', markersize=5, label='Plots')
+        ax.legend(loc='upper right', fontsize=8)
         ax.set_xlabel('Range (nm)')
         ax.set_ylabel('Velocity (kts)')
         ax.set_title('Detection Heatmap (All Scans)')
@@ -487,42 +564,64 @@ def main():
         plt.savefig('ADR_detections_result.png', dpi=150)
         print("Saved: ADR_detections_result.png")
     
-    plt.show()
+    # Single scan, read through the per-scan byte-offset index
+    if scan_idx is not None and run.det_file:
+        det_index = ScanIndex.open(run.det_file, n_doppler=n_doppler)
+        if 0 <= scan_idx < det_index.n_scans:
+            plot_rdm_with_tracks(detections, tracks, scan_idx=scan_idx,
+                                 title=f'(Scan {scan_idx})', det_index=det_index)
+            plt.savefig('ADR_scan_result.png', dpi=150)
+            print(f"Saved: ADR_scan_result.png (scan {scan_idx} of {det_index.n_scans})")
+        else:
+            print(f"Scan {scan_idx} out of range (0..{det_index.n_scans - 1})")
+    
+    # All-scan overlay, range/velocity history and track count
+    if history:
+        fig = plot_rdm_with_tracks(detections, tracks, title="(All Scans Combined)")
+        fig.savefig('ADR_rdm_tracks.png', dpi=150, bbox_inches='tight')
+        print("Saved: ADR_rdm_tracks.png")
+        fig = plot_track_history(tracks)
+        fig.savefig('ADR_track_history.png', dpi=150, bbox_inches='tight')
+        print("Saved: ADR_track_history.png")
+        if scan_counts:
+            fig = plot_active_tracks(scan_counts)
+            fig.savefig('ADR_track_count.png', dpi=150, bbox_inches='tight')
+            print("Saved: ADR_track_count.png")
+    
+    if show:
+        plt.show()
+    return True
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    args = [a for a in argv if not a.startswith('--')]
+    opts = dict(a[2:].split('=', 1) if '=' in a else (a[2:], '1')
+                for a in argv if a.startswith('--'))
+    
+    # Old form: [folder] [scan] runs plot followed by the summary
+    cmd = args.pop(0) if args and args[0] in COMMANDS else None
+    if cmd is None and len(args) > 1:
+        opts.setdefault('scan', args.pop(1))
+    folder = args[0] if args else None
+    
+    if 'det' in opts or 'trk' in opts:
+        run = SimRun(opts.get('det'), opts.get('trk'))
+    else:
+        run = SimRun.find(folder)
+    if not run.report_files():
+        return
     
-    # Print summary
-    print("\n=== TRACK SUMMARY ===")
-    km_per_bin = MAX_RANGE_KM / n_range
-    nm_per_km = 0.539957
-    nm_per_bin = km_per_bin * nm_per_km
-    for trk_id, trk in tracks.items():
-        r_start = trk.range_bins[0] / 4 * nm_per_bin
-        r_end = trk.range_bins[-1] / 4 * nm_per_bin
-        print(f"Track {trk_id}: {len(trk.scans)} updates, "
-              f"R={r_start:.1f}->{r_end:.1f} nm, "
-              f"Q={trk.qualities[-1] if trk.qualities else 0}")
+    if cmd in (None, 'plot'):
+        scan_idx = int(opts['scan']) if 'scan' in opts else None
+        if not plot_run(run, scan_idx, history='history' in opts, show='no-show' not in opts):
+            return
+    if cmd == 'notch-report':
+        analyze_notch_performance(run.tracks, quick=run.is_quick,
+                                  scenario=scenario_for_file(run.trk_file))
+    if cmd in (None, 'summary'):
+        if cmd == 'summary':
+            print(f"Loaded {len(run.tracks)} tracks over {run.tracks.n_scans} scans")
+        print_track_summary(run)
 
 if __name__ == "__main__":
-    import sys
-    
-    # Allow manual path override
-    if len(sys.argv) > 1:
-        folder = Path(sys.argv[1])
-        print(f"Searching in: {folder}")
-        
-        det_file = None
-        trk_file = None
-        
-        for name in ["ADR_quick_det.txt", "ADR_detections.txt"]:
-            if (folder / name).exists():
-                det_file = str(folder / name)
-                break
-        for name in ["ADR_quick_trk.txt", "ADR_tracks.txt"]:
-            if (folder / name).exists():
-                trk_file = str(folder / name)
-                break
-        
-        # Override the find function
-        _original_find = find_sim_files
-        find_sim_files = lambda *a, **k: (det_file, trk_file)
-    
     main()
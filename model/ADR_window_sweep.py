@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+ADR_window_sweep.py
+Window quantization and sidelobe sweep for window_multiplier
+Regenerates the half-length coefficient ROM bit-exactly (init_hamming_rom
+with any cosine-sum window) for a grid of (N_SAMPLES, COEF_WIDTH, window),
+pushes tone and noise batches through the integer window stage and an
+N-point range FFT, and reports peak sidelobe, scalloping loss and SNR
+loss against the RAMB18 count of the ROM. Grid points run in parallel and
+their results are cached in a JSON file, so reruns only evaluate new
+points.
+"""
+
+import os
+import sys
+import json
+import time
+import numpy as np
+from pathlib import Path
+from multiprocessing import Pool
+
+from ADR_fixed import float_to_fixed
+from ADR_blocks import DATA_WIDTH, COEF_WIDTH, hamming_rom, window_coefs, apply_window
+
+# Radar parameters (match VHDL)
+N_SAMPLES = 1024
+
+# Cosine-sum windows: w = a0 - a1 cos(x) + a2 cos(2x) - a3 cos(3x),
+# x = 2 pi i / (N - 1), as init_hamming_rom evaluates them
+WINDOWS = {
+    'rect': (1.0,),
+    'hann': (0.5, 0.5),
+    'hamming': (0.54, 0.46),
+    'blackman': (0.42, 0.5, 0.08),
+    'blackman_harris': (0.35875, 0.48829, 0.14128, 0.01168),
+}
+
+# Default grid
+GRID_N = (512, 1024, 2048)
+GRID_CW = tuple(range(8, 19))
+
+# Measurement setup
+TONE_AMPLITUDE = 8000      # I/Q peak, below full scale after the x2 window gain
+NOISE_SIGMA = 2000.0       # per component
+NOISE_RECORDS = 32
+OFFSETS = np.linspace(0.0, 0.5, 11)  # tone offset from bin center (bins)
+OVERSAMPLE = 8             # zero-padding for the sidelobe search
+SEED = 0
+
+# Bump when the measurement changes so stale cache entries are recomputed
+CACHE_VERSION = 1
+DEFAULT_CACHE = "ADR_window_sweep.json"
+
+# xc7a35t: 50 RAMB36 = 100 RAMB18
+DEVICE_RAMB18 = 100
+
+# RAMB18 aspect ratios (depth, width)
+RAMB18_SHAPES = ((16384, 1), (8192, 2), (4096, 4), (2048, 9), (1024, 18), (512, 36))
+
+# =============================================================================
+# ROM
+# =============================================================================
+
+def window_real(n_samples, window='hamming'):
+    """Real-valued coefficients of the first N_SAMPLES/2 window entries."""
+    a = WINDOWS[window]
+    x = 2.0 * np.pi * np.arange(n_samples // 2) / (n_samples - 1)
+    w = np.full(len(x), a[0])
+    for k, ak in enumerate(a[1:], start=1):
+        w = w - ak * np.cos(k * x) if k % 2 else w + ak * np.cos(k * x)
+    return w
+
+def window_rom(n_samples, coef_width=COEF_WIDTH, window='hamming'):
+    """Half-length ROM as init_hamming_rom would build it for this window."""
+    full_scale = 2**(coef_width-1) - 1
+    coef = float_to_fixed(window_real(n_samples, window) * full_scale, 0, coef_width + 1,
+                          rounding='half_away')
+    return np.clip(coef, 0, full_scale)
+
+def bram18_count(depth, width):
+    """RAMB18 primitives for a depth x width ROM (best single aspect ratio)."""
+    return min(-(-depth // d) * -(-width // w) for d, w in RAMB18_SHAPES)
+
+# =============================================================================
+# Measurement
+# =============================================================================
+
+def _tones(n_samples):
+    """Integer I/Q tones at bin n/4 + OFFSETS, one record per offset."""
+    k0 = n_samples // 4
+    t = np.arange(n_samples)
+    phase = 2.0 * np.pi * np.outer(k0 + OFFSETS, t) / n_samples
+    i = np.rint(TONE_AMPLITUDE * np.cos(phase)).astype(np.int64)
+    q = np.rint(TONE_AMPLITUDE * np.sin(phase)).astype(np.int64)
+    return k0, i, q
+
+def _noise(n_samples):
+    rng = np.random.default_rng(SEED)
+    iq = np.rint(rng.normal(0.0, NOISE_SIGMA, (2, NOISE_RECORDS, n_samples)))
+    lim = 2**(DATA_WIDTH-2)
+    return np.clip(iq, -lim, lim - 1).astype(np.int64)
+
+def _mainlobe_psl(spec_db, peak):
+    """Highest level outside the mainlobe (first minimum either side of peak)."""
+    s = np.roll(spec_db, len(spec_db) // 2 - peak)
+    c = len(s) // 2
+    hi = c
+    while hi + 1 < len(s) and s[hi + 1] < s[hi]:
+        hi += 1
+    lo = c
+    while lo > 0 and s[lo - 1] < s[lo]:
+        lo -= 1
+    side = np.r_[s[:lo], s[hi + 1:]]
+    return float(side.max() - s[c]) if len(side) else -np.inf
+
+def _metrics(n_samples, window_fn):
+    """PSL, worst scalloping loss and SNR loss of window_fn(i, q) -> complex.
+
+    Tones are analysed with one batched zero-padded FFT: every OVERSAMPLE-th
+    output is the plain N-point range FFT bin, the rest feed the sidelobe
+    search. SNR loss is windowed vs unwindowed SNR at the tone bin, with
+    the noise measured through the same datapath (so ROM and output
+    rounding count).
+    """
+    k0, i, q = _tones(n_samples)
+    spec = np.abs(np.fft.fft(window_fn(i, q), n_samples * OVERSAMPLE, axis=-1))
+    spec_db = 20 * np.log10(np.maximum(spec, 1e-12))
+
+    psl = _mainlobe_psl(spec_db[0], k0 * OVERSAMPLE)
+
+    # Range FFT grid: best bin for each offset vs the on-bin response
+    grid = spec[:, ::OVERSAMPLE]
+    best = grid[:, k0:k0 + 2].max(axis=1)
+    scallop = float(20 * np.log10(best[0] / best.min()))
+
+    ni, nq = _noise(n_samples)
+    noise_pow = np.mean(np.abs(np.fft.fft(window_fn(ni, nq), axis=-1))**2)
+    snr_win = best[0]**2 / noise_pow
+    snr_rect = (TONE_AMPLITUDE * n_samples)**2 / (2 * NOISE_SIGMA**2 * n_samples)
+    snr_loss = float(10 * np.log10(snr_rect / snr_win))
+    return psl, scallop, snr_loss
+
+def measure(window, n_samples, coef_width):
+    """Metrics for one grid point through the bit-exact window stage."""
+    rom = window_rom(n_samples, coef_width, window)
+    coefs = window_coefs(n_samples, coef_width, rom=rom)
+    sat = [False]
+
+    def fn(i, q):
+        wi, si = apply_window(i, coefs, coef_width)
+        wq, sq = apply_window(q, coefs, coef_width)
+        sat[0] |= bool(si or sq)
+        return wi.astype(np.float64) + 1j * wq
+
+    psl, scallop, snr_loss = _metrics(n_samples, fn)
+    return dict(window=window, n_samples=n_samples, coef_width=coef_width,
+                psl_db=psl, scallop_db=scallop, snr_loss_db=snr_loss,
+                worst_loss_db=scallop + snr_loss, saturated=sat[0],
+                rom_bits=len(rom) * coef_width,
+                bram18=bram18_count(len(rom), coef_width))
+
+def ideal(window, n_samples):
+    """Metrics of the unquantized window (float datapath, float FFT)."""
+    w = window_real(n_samples, window)
+    full = np.r_[w, w[::-1]] if n_samples % 2 == 0 else np.r_[w, w[-1], w[::-1]]
+    psl, scallop, snr_loss = _metrics(n_samples, lambda i, q: (i + 1j * q) * full)
+    return dict(psl_db=psl, scallop_db=scallop, snr_loss_db=snr_loss)
+
+def _measure_task(args):
+    return measure(*args)
+
+# =============================================================================
+# Cached grid
+# =============================================================================
+
+def _key(window, n_samples, coef_width):
+    return f"{window}/{n_samples}/{coef_width}"
+
+class SweepCache:
+    """Grid results in a JSON file, keyed by window/N/COEF_WIDTH.
+
+    Entries written by another CACHE_VERSION are ignored.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE):
+        self.path = Path(path)
+        self.results = {}
+        if self.path.exists():
+            data = json.loads(self.path.read_text())
+            if data.get('version') == CACHE_VERSION:
+                self.results = data['results']
+
+    def get(self, window, n_samples, coef_width):
+        return self.results.get(_key(window, n_samples, coef_width))
+
+    def put(self, res):
+        self.results[_key(res['window'], res['n_samples'], res['coef_width'])] = res
+
+    def save(self):
+        self.path.write_text(json.dumps(dict(version=CACHE_VERSION, results=self.results),
+                                        indent=1))
+
+def sweep(windows=tuple(WINDOWS), n_list=GRID_N, cw_list=GRID_CW, cache=None,
+          processes=None, progress=False):
+    """Evaluate the grid, reusing cached points; returns a list of result dicts."""
+    points = [(w, n, cw) for w in windows for n in n_list for cw in cw_list]
+    todo = [p for p in points if cache is None or cache.get(*p) is None]
+    fresh = {}
+    if todo:
+        with Pool(processes or os.cpu_count()) as pool:
+            for k, res in enumerate(pool.imap_unordered(_measure_task, todo)):
+                fresh[_key(res['window'], res['n_samples'], res['coef_width'])] = res
+                if cache is not None:
+                    cache.put(res)
+                if progress:
+                    print(f"\r  {k + 1}/{len(todo)} configurations", end='', flush=True)
+        if progress:
+            print()
+        if cache is not None:
+            cache.save()
+    return [fresh.get(_key(*p)) or cache.get(*p) for p in points]
+
+def select(results, psl_spec, max_loss=None):
+    """Cheapest passing configuration: fewest RAMB18, then fewest ROM bits,
+    then lowest worst-case loss. None if nothing meets the spec."""
+    ok = [r for r in results if r['psl_db'] <= psl_spec and not r['saturated']
+          and (max_loss is None or r['worst_loss_db'] <= max_loss)]
+    if not ok:
+        return None
+    return min(ok, key=lambda r: (r['bram18'], r['rom_bits'], r['worst_loss_db']))
+
+def _parse_list(text, cast=int):
+    out = []
+    for part in text.split(','):
+        if '-' in part and cast is int:
+            a, b = part.split('-')
+            out += list(range(int(a), int(b) + 1))
+        else:
+            out.append(cast(part))
+    return tuple(out)
+
+def main():
+    opts = dict(a[2:].split('=', 1) for a in sys.argv[1:] if a.startswith('--') and '=' in a)
+    psl_spec = float(opts.get('psl', -40.0))
+    max_loss = float(opts['max-loss']) if 'max-loss' in opts else None
+    n_list = _parse_list(opts['n']) if 'n' in opts else GRID_N
+    cw_list = _parse_list(opts['cw']) if 'cw' in opts else GRID_CW
+    windows = _parse_list(opts['windows'], str) if 'windows' in opts else tuple(WINDOWS)
+    cache = SweepCache(opts.get('cache', DEFAULT_CACHE))
+    if '--fresh' in sys.argv:
+        cache.results = {}
+
+    # The generic generator must reproduce the shipped ROM
+    for n in n_list:
+        if not np.array_equal(window_rom(n, COEF_WIDTH, 'hamming'), hamming_rom(n, COEF_WIDTH)):
+            print(f"WARNING: window_rom differs from hamming_rom for N={n}")
+
+    n_points = len(windows) * len(n_list) * len(cw_list)
+    print(f"Window sweep: {len(windows)} windows x N {list(n_list)} x "
+          f"COEF_WIDTH {cw_list[0]}..{cw_list[-1]} = {n_points} points "
+          f"({len(cache.results)} cached in {cache.path})")
+    t0 = time.perf_counter()
+    results = sweep(windows, n_list, cw_list, cache=cache, progress=True)
+    print(f"Done in {time.perf_counter() - t0:.1f} s")
+
+    for n in n_list:
+        rows = [r for r in results if r['n_samples'] == n]
+        print(f"\n=== N_SAMPLES = {n} (ROM depth {n // 2}) ===")
+        print("Peak sidelobe (dB) by COEF_WIDTH:")
+        print(f"  {'window':16s} {'ideal':>6s} " + " ".join(f"{cw:>6d}" for cw in cw_list))
+        for w in windows:
+            ref = ideal(w, n)
+            vals = [r['psl_db'] for r in rows if r['window'] == w]
+            print(f"  {w:16s} {ref['psl_db']:6.1f} " + " ".join(f"{v:6.1f}" for v in vals))
+
+        print(f"\nSmallest COEF_WIDTH meeting PSL <= {psl_spec:g} dB"
+              f"{f' and loss <= {max_loss:g} dB' if max_loss is not None else ''}:")
+        print(f"  {'window':16s} {'CW':>3s} {'PSL':>7s} {'scallop':>8s} {'SNR loss':>9s} "
+              f"{'worst':>6s} {'bits':>6s} {'RAMB18':>7s}")
+        for w in windows:
+            r = select([r for r in rows if r['window'] == w], psl_spec, max_loss)
+            if r is None:
+                print(f"  {w:16s} {'-':>3s}   (spec not met in grid)")
+                continue
+            print(f"  {w:16s} {r['coef_width']:3d} {r['psl_db']:7.1f} {r['scallop_db']:8.2f} "
+                  f"{r['snr_loss_db']:9.2f} {r['worst_loss_db']:6.2f} {r['rom_bits']:6d} "
+                  f"{r['bram18']:7d}")
+
+        best = select(rows, psl_spec, max_loss)
+        cur = next((r for r in rows if r['window'] == 'hamming' and r['coef_width'] == COEF_WIDTH),
+                   None)
+        if best:
+            print(f"  -> {best['window']}, COEF_WIDTH={best['coef_width']}: "
+                  f"{best['bram18']} RAMB18 of {DEVICE_RAMB18}")
+        if cur:
+            print(f"  (current hamming, COEF_WIDTH={COEF_WIDTH}: PSL {cur['psl_db']:.1f} dB, "
+                  f"{cur['bram18']} RAMB18)")
+
+if __name__ == "__main__":
+    main()
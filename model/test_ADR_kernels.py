@@ -0,0 +1,35 @@
+"""
+test_ADR_kernels.py
+Parity of the ADR_kernels loops against the NumPy reference (pytest)
+The kernel source is checked uncompiled on every machine; the compiled
+checks are skipped when numba is not installed (or ADR_JIT=0).
+
+  python -m pytest test_ADR_kernels.py
+"""
+
+import pytest
+
+import ADR_kernels
+from ADR_kernels import backend, check_cfar, check_tracker
+
+needs_numba = pytest.mark.skipif(backend() != 'numba',
+                                 reason="numba not installed (or ADR_JIT=0)")
+
+@pytest.fixture
+def no_numba(monkeypatch):
+    """Force jit=True onto the uncompiled kernel source."""
+    monkeypatch.setattr(ADR_kernels, '_numba', False)
+
+@needs_numba
+def test_cfar_jit_matches_numpy():
+    assert check_cfar(jit=None) == 0
+
+@needs_numba
+def test_tracker_jit_matches_numpy():
+    assert check_tracker(jit=None) == 0
+
+def test_cfar_kernel_source_matches_numpy(no_numba):
+    assert check_cfar(n_maps=1, n_range=48, n_doppler=24) == 0
+
+def test_tracker_kernel_source_matches_numpy(no_numba):
+    assert check_tracker(n_scans=30) == 0
@@ -0,0 +1,169 @@
+library IEEE;
+use IEEE.STD_LOGIC_1164.ALL;
+use IEEE.NUMERIC_STD.ALL;
+use std.textio.all;
+
+-- Golden-vector variant of tb_corner_turner: writes the chirp-major frames
+-- of stimulus.txt and checks the range-major read-out against expected.txt
+-- from model/ADR_golden.py. Generate with
+-- "python ADR_golden.py <dir> --tb=tb_corner_turner" and point VECTOR_DIR
+-- at <dir>/tb_corner_turner/<key>. Words are split into 16-bit halves.
+--   stimulus.txt: case lo hi last
+--   expected.txt: case lo hi last
+
+entity tb_corner_turner_golden is
+    Generic (
+        VECTOR_DIR : string := "golden/tb_corner_turner/b2eb003cfaca"
+    );
+end tb_corner_turner_golden;
+
+architecture Behavioral of tb_corner_turner_golden is
+
+    constant CLK_PERIOD : time := 10 ns;
+    constant N_RANGE    : integer := 16;
+    constant N_DOPPLER  : integer := 8;
+    constant DATA_W     : integer := 32;
+    constant MAX_CASES  : integer := 32;
+
+    signal aclk           : std_logic := '0';
+    signal aresetn        : std_logic := '0';
+    signal s_axis_tdata   : std_logic_vector(DATA_W-1 downto 0) := (others => '0');
+    signal s_axis_tvalid  : std_logic := '0';
+    signal s_axis_tready  : std_logic;
+    signal s_axis_tlast   : std_logic := '0';
+    signal m_axis_tdata   : std_logic_vector(DATA_W-1 downto 0);
+    signal m_axis_tvalid  : std_logic;
+    signal m_axis_tready  : std_logic := '1';
+    signal m_axis_tlast   : std_logic;
+    signal frame_complete : std_logic;
+    signal overflow_error : std_logic;
+    signal sim_done       : boolean := false;
+    signal pass_count     : integer := 0;
+    signal fail_count     : integer := 0;
+
+    type case_count_t is array (0 to MAX_CASES-1) of integer;
+    signal case_fails : case_count_t := (others => 0);
+
+begin
+
+    uut: entity work.corner_turner
+    generic map ( N_RANGE => N_RANGE, N_DOPPLER => N_DOPPLER, DATA_WIDTH => DATA_W )
+    port map (
+        aclk => aclk, aresetn => aresetn,
+        s_axis_tdata => s_axis_tdata, s_axis_tvalid => s_axis_tvalid,
+        s_axis_tready => s_axis_tready, s_axis_tlast => s_axis_tlast,
+        m_axis_tdata => m_axis_tdata, m_axis_tvalid => m_axis_tvalid,
+        m_axis_tready => m_axis_tready, m_axis_tlast => m_axis_tlast,
+        frame_complete => frame_complete, overflow_error => overflow_error
+    );
+
+    aclk <= not aclk after CLK_PERIOD/2 when not sim_done else '0';
+
+    stim: process
+        file stim_f : text open read_mode is VECTOR_DIR & "/stimulus.txt";
+        file exp_f  : text open read_mode is VECTOR_DIR & "/expected.txt";
+        variable L : line;
+        variable c, lo, hi, last, n_stim, n_exp : integer;
+    begin
+        aresetn <= '0'; wait for 50 ns;
+        aresetn <= '1'; wait until rising_edge(aclk);
+
+        report "=== Corner Turner golden TB: " & VECTOR_DIR & " ===";
+
+        n_stim := 0;
+        while not endfile(stim_f) loop
+            readline(stim_f, L);
+            read(L, c); read(L, lo); read(L, hi); read(L, last);
+            s_axis_tdata <= std_logic_vector(to_unsigned(hi, DATA_W-16)) &
+                            std_logic_vector(to_unsigned(lo, 16));
+            s_axis_tvalid <= '1';
+            s_axis_tlast  <= '1' when last = 1 else '0';
+            n_stim := n_stim + 1;
+            wait until rising_edge(aclk);
+            while s_axis_tready = '0' loop wait until rising_edge(aclk); end loop;
+        end loop;
+
+        s_axis_tvalid <= '0'; s_axis_tlast <= '0';
+
+        -- Last frame is read out after its write completes
+        n_exp := 0;
+        while not endfile(exp_f) loop readline(exp_f, L); n_exp := n_exp + 1; end loop;
+        for t in 0 to 4 * N_RANGE * N_DOPPLER loop
+            exit when pass_count + fail_count >= n_exp;
+            wait until rising_edge(aclk);
+        end loop;
+        wait for 200 ns;
+
+        if pass_count + fail_count /= n_exp then
+            report "FAIL: " & integer'image(pass_count + fail_count) & " of " &
+                   integer'image(n_exp) & " expected beats received" severity error;
+        end if;
+
+        for k in 0 to MAX_CASES-1 loop
+            if case_fails(k) > 0 then
+                write(L, string'("  case ")); write(L, k);
+                write(L, string'(": ")); write(L, case_fails(k));
+                write(L, string'(" mismatches")); writeline(output, L);
+            end if;
+        end loop;
+
+        write(L, string'("=== RESULTS: "));
+        write(L, n_stim); write(L, string'(" in, "));
+        write(L, pass_count); write(L, string'(" pass, "));
+        write(L, fail_count); write(L, string'(" fail ==="));
+        writeline(output, L);
+
+        if fail_count = 0 and pass_count = n_exp then report "ALL TESTS PASSED" severity note;
+        else                                           report "FAILURES DETECTED" severity error; end if;
+
+        sim_done <= true; wait;
+    end process;
+
+    -- Backpressure: deassert tready every 7th cycle
+    bp: process(aclk)
+        variable cnt : integer := 0;
+    begin
+        if rising_edge(aclk) then
+            cnt := cnt + 1;
+            if cnt mod 7 = 0 then m_axis_tready <= '0';
+            else                  m_axis_tready <= '1'; end if;
+        end if;
+    end process;
+
+    -- Bit-exact compare (both halves, tlast) against expected.txt
+    check: process(aclk)
+        file exp_f : text open read_mode is VECTOR_DIR & "/expected.txt";
+        variable L : line;
+        variable c, exp_lo, exp_hi, exp_last, got_lo, got_hi, got_last : integer;
+    begin
+        if rising_edge(aclk) then
+            if overflow_error = '1' then
+                report "overflow_error asserted" severity warning;
+            end if;
+            if m_axis_tvalid = '1' and m_axis_tready = '1' and not endfile(exp_f) then
+                readline(exp_f, L);
+                read(L, c); read(L, exp_lo); read(L, exp_hi); read(L, exp_last);
+                got_lo := to_integer(unsigned(m_axis_tdata(15 downto 0)));
+                got_hi := to_integer(unsigned(m_axis_tdata(DATA_W-1 downto 16)));
+                if m_axis_tlast = '1' then got_last := 1; else got_last := 0; end if;
+
+                if got_lo = exp_lo and got_hi = exp_hi and got_last = exp_last then
+                    pass_count <= pass_count + 1;
+                else
+                    fail_count <= fail_count + 1;
+                    if c < MAX_CASES then case_fails(c) <= case_fails(c) + 1; end if;
+                    write(L, string'("FAIL case ")); write(L, c);
+                    write(L, string'(" beat ")); write(L, pass_count + fail_count);
+                    write(L, string'(": expected ")); write(L, exp_hi);
+                    write(L, string'(":")); write(L, exp_lo);
+                    write(L, string'(" last=")); write(L, exp_last);
+                    write(L, string'(" got ")); write(L, got_hi);
+                    write(L, string'(":")); write(L, got_lo);
+                    write(L, string'(" last=")); write(L, got_last);
+                    writeline(output, L);
+                end if;
+            end if;
+        end if;
+    end process;
+
+end Behavioral;
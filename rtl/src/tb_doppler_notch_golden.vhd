@@ -0,0 +1,162 @@
+library IEEE;
+use IEEE.STD_LOGIC_1164.ALL;
+use IEEE.NUMERIC_STD.ALL;
+use std.textio.all;
+
+-- Golden-vector variant of tb_doppler_notch: drives stimulus.txt (bypass
+-- per beat) and checks every output beat against expected.txt from
+-- model/ADR_golden.py. Generate with
+-- "python ADR_golden.py <dir> --tb=tb_doppler_notch"; each NOTCH_MODE has
+-- its own key, so set NOTCH_MODE and VECTOR_DIR together.
+--   stimulus.txt: case i q last bypass
+--   expected.txt: case i q last
+
+entity tb_doppler_notch_golden is
+    Generic (
+        NOTCH_MODE : integer := 2;
+        VECTOR_DIR : string := "golden/tb_doppler_notch/c7c9c6e4756e"  -- mode 3: 7b6b39cd6678
+    );
+end tb_doppler_notch_golden;
+
+architecture Behavioral of tb_doppler_notch_golden is
+
+    constant CLK_PERIOD : time := 10 ns;
+    constant N_DOPPLER  : integer := 32;
+    constant DATA_W     : integer := 32;
+    constant HALF_W     : integer := 16;
+    constant MAX_CASES  : integer := 32;
+
+    signal aclk          : std_logic := '0';
+    signal aresetn       : std_logic := '0';
+    signal s_axis_tdata  : std_logic_vector(DATA_W-1 downto 0) := (others => '0');
+    signal s_axis_tvalid : std_logic := '0';
+    signal s_axis_tready : std_logic;
+    signal s_axis_tlast  : std_logic := '0';
+    signal m_axis_tdata  : std_logic_vector(DATA_W-1 downto 0);
+    signal m_axis_tvalid : std_logic;
+    signal m_axis_tready : std_logic := '1';
+    signal m_axis_tlast  : std_logic;
+    signal bypass        : std_logic := '0';
+    signal sim_done      : boolean := false;
+    signal pass_count    : integer := 0;
+    signal fail_count    : integer := 0;
+
+    type case_count_t is array (0 to MAX_CASES-1) of integer;
+    signal case_fails : case_count_t := (others => 0);
+
+begin
+
+    uut: entity work.doppler_notch
+    generic map ( DATA_WIDTH => DATA_W, N_DOPPLER => N_DOPPLER, NOTCH_MODE => NOTCH_MODE )
+    port map (
+        aclk => aclk, aresetn => aresetn,
+        s_axis_tdata => s_axis_tdata, s_axis_tvalid => s_axis_tvalid,
+        s_axis_tready => s_axis_tready, s_axis_tlast => s_axis_tlast,
+        m_axis_tdata => m_axis_tdata, m_axis_tvalid => m_axis_tvalid,
+        m_axis_tready => m_axis_tready, m_axis_tlast => m_axis_tlast,
+        bypass => bypass
+    );
+
+    aclk <= not aclk after CLK_PERIOD/2 when not sim_done else '0';
+
+    stim: process
+        file stim_f : text open read_mode is VECTOR_DIR & "/stimulus.txt";
+        file exp_f  : text open read_mode is VECTOR_DIR & "/expected.txt";
+        variable L : line;
+        variable c, i_val, q_val, last, byp, n_stim, n_exp : integer;
+    begin
+        aresetn <= '0'; wait for 50 ns;
+        aresetn <= '1'; wait until rising_edge(aclk);
+
+        report "=== Doppler Notch golden TB (mode " & integer'image(NOTCH_MODE) &
+               "): " & VECTOR_DIR & " ===";
+
+        n_stim := 0;
+        while not endfile(stim_f) loop
+            readline(stim_f, L);
+            read(L, c); read(L, i_val); read(L, q_val); read(L, last); read(L, byp);
+            s_axis_tdata <= std_logic_vector(to_signed(q_val, HALF_W)) &
+                            std_logic_vector(to_signed(i_val, HALF_W));
+            s_axis_tvalid <= '1';
+            s_axis_tlast  <= '1' when last = 1 else '0';
+            bypass        <= '1' when byp = 1 else '0';
+            n_stim := n_stim + 1;
+            wait until rising_edge(aclk);
+            while s_axis_tready = '0' loop wait until rising_edge(aclk); end loop;
+        end loop;
+
+        s_axis_tvalid <= '0'; s_axis_tlast <= '0'; bypass <= '0';
+        wait for 200 ns;
+
+        n_exp := 0;
+        while not endfile(exp_f) loop readline(exp_f, L); n_exp := n_exp + 1; end loop;
+        if pass_count + fail_count /= n_exp then
+            report "FAIL: " & integer'image(pass_count + fail_count) & " of " &
+                   integer'image(n_exp) & " expected beats received" severity error;
+        end if;
+
+        for k in 0 to MAX_CASES-1 loop
+            if case_fails(k) > 0 then
+                write(L, string'("  case ")); write(L, k);
+                write(L, string'(": ")); write(L, case_fails(k));
+                write(L, string'(" mismatches")); writeline(output, L);
+            end if;
+        end loop;
+
+        write(L, string'("=== RESULTS: "));
+        write(L, n_stim); write(L, string'(" in, "));
+        write(L, pass_count); write(L, string'(" pass, "));
+        write(L, fail_count); write(L, string'(" fail ==="));
+        writeline(output, L);
+
+        if fail_count = 0 and pass_count = n_exp then report "ALL TESTS PASSED" severity note;
+        else                                           report "FAILURES DETECTED" severity error; end if;
+
+        sim_done <= true; wait;
+    end process;
+
+    -- Backpressure: deassert tready every 7th cycle
+    bp: process(aclk)
+        variable cnt : integer := 0;
+    begin
+        if rising_edge(aclk) then
+            cnt := cnt + 1;
+            if cnt mod 7 = 0 then m_axis_tready <= '0';
+            else                  m_axis_tready <= '1'; end if;
+        end if;
+    end process;
+
+    -- Bit-exact compare (I, Q, tlast) against expected.txt
+    check: process(aclk)
+        file exp_f : text open read_mode is VECTOR_DIR & "/expected.txt";
+        variable L : line;
+        variable c, exp_i, exp_q, exp_last, got_i, got_q, got_last : integer;
+    begin
+        if rising_edge(aclk) then
+            if m_axis_tvalid = '1' and m_axis_tready = '1' and not endfile(exp_f) then
+                readline(exp_f, L);
+                read(L, c); read(L, exp_i); read(L, exp_q); read(L, exp_last);
+                got_i := to_integer(signed(m_axis_tdata(HALF_W-1 downto 0)));
+                got_q := to_integer(signed(m_axis_tdata(DATA_W-1 downto HALF_W)));
+                if m_axis_tlast = '1' then got_last := 1; else got_last := 0; end if;
+
+                if got_i = exp_i and got_q = exp_q and got_last = exp_last then
+                    pass_count <= pass_count + 1;
+                else
+                    fail_count <= fail_count + 1;
+                    if c < MAX_CASES then case_fails(c) <= case_fails(c) + 1; end if;
+                    write(L, string'("FAIL case ")); write(L, c);
+                    write(L, string'(" beat ")); write(L, pass_count + fail_count);
+                    write(L, string'(": expected ")); write(L, exp_i);
+                    write(L, string'(",")); write(L, exp_q);
+                    write(L, string'(" last=")); write(L, exp_last);
+                    write(L, string'(" got ")); write(L, got_i);
+                    write(L, string'(",")); write(L, got_q);
+                    write(L, string'(" last=")); write(L, got_last);
+                    writeline(output, L);
+                end if;
+            end if;
+        end if;
+    end process;
+
+end Behavioral;
@@ -0,0 +1,181 @@
+library IEEE;
+use IEEE.STD_LOGIC_1164.ALL;
+use IEEE.NUMERIC_STD.ALL;
+use std.textio.all;
+
+-- Golden-vector variant of tb_os_cfar_2d: streams the range-major map of
+-- stimulus.txt and checks the CFAR output and dbg_threshold of every
+-- output beat against expected.txt from model/ADR_golden.py. Generate with
+-- "python ADR_golden.py <dir> --tb=tb_os_cfar_2d" and point VECTOR_DIR at
+-- <dir>/tb_os_cfar_2d/<key>. expected.txt has one row per map cell.
+--   stimulus.txt: case mag last
+--   expected.txt: case range doppler out threshold
+--
+-- Output beat k carries the CUT of map cell k + CELL_OFFSET: the first
+-- valid beat follows STARTUP_DELAY inputs and the CUT sits CUT_D+1 lines
+-- and CUT_R+1 beats behind the newest input. The pipeline is not flushed,
+-- so the last cells of the map are never emitted (reported, not failed).
+-- m_axis_tready stays high: dbg_threshold is then exactly one beat ahead
+-- of m_axis_tdata.
+
+entity tb_os_cfar_2d_golden is
+    Generic (
+        VECTOR_DIR : string := "golden/tb_os_cfar_2d/3684d031ec2b"
+    );
+end tb_os_cfar_2d_golden;
+
+architecture Behavioral of tb_os_cfar_2d_golden is
+
+    constant CLK_PERIOD : time := 10 ns;
+    constant DATA_W     : integer := 17;
+    constant N_RANGE    : integer := 64;
+    constant N_DOPPLER  : integer := 32;
+    constant REF_R      : integer := 3;
+    constant REF_D      : integer := 2;
+    constant GUARD_R    : integer := 1;
+    constant GUARD_D    : integer := 1;
+    constant MAX_CASES  : integer := 32;
+
+    -- Window geometry as in os_cfar_2d
+    constant CUT_R         : integer := REF_R + GUARD_R;
+    constant CUT_D         : integer := REF_D + GUARD_D;
+    constant STARTUP_DELAY : integer := (CUT_D + 1) * N_DOPPLER + CUT_R + 2;
+    constant CELL_OFFSET   : integer := STARTUP_DELAY - CUT_R - (CUT_D + 1) * N_DOPPLER;
+
+    signal aclk          : std_logic := '0';
+    signal aresetn       : std_logic := '0';
+    signal s_axis_tdata  : std_logic_vector(DATA_W-1 downto 0) := (others => '0');
+    signal s_axis_tvalid : std_logic := '0';
+    signal s_axis_tready : std_logic;
+    signal s_axis_tlast  : std_logic := '0';
+    signal m_axis_tdata  : std_logic_vector(DATA_W-1 downto 0);
+    signal m_axis_tvalid : std_logic;
+    signal m_axis_tready : std_logic := '1';
+    signal m_axis_tlast  : std_logic;
+    signal scale_ovr     : std_logic_vector(2 downto 0) := "000";
+    signal dbg_threshold : std_logic_vector(DATA_W-1 downto 0);
+    signal dbg_scale     : std_logic_vector(2 downto 0);
+    signal sim_done      : boolean := false;
+    signal pass_count    : integer := 0;
+    signal fail_count    : integer := 0;
+
+    type case_count_t is array (0 to MAX_CASES-1) of integer;
+    signal case_fails : case_count_t := (others => 0);
+
+begin
+
+    uut: entity work.os_cfar_2d
+    generic map (
+        DATA_WIDTH => DATA_W, REF_RANGE => REF_R, REF_DOPPLER => REF_D,
+        GUARD_RANGE => GUARD_R, GUARD_DOPPLER => GUARD_D,
+        RANK_PCT => 75, SCALE_MIN => 2, SCALE_MAX => 6, SCALE_NOM => 4,
+        N_DOPPLER => N_DOPPLER
+    )
+    port map (
+        aclk => aclk, aresetn => aresetn,
+        s_axis_tdata => s_axis_tdata, s_axis_tvalid => s_axis_tvalid,
+        s_axis_tready => s_axis_tready, s_axis_tlast => s_axis_tlast,
+        m_axis_tdata => m_axis_tdata, m_axis_tvalid => m_axis_tvalid,
+        m_axis_tready => m_axis_tready, m_axis_tlast => m_axis_tlast,
+        scale_override => scale_ovr, dbg_threshold => dbg_threshold,
+        dbg_scale => dbg_scale
+    );
+
+    aclk <= not aclk after CLK_PERIOD/2 when not sim_done else '0';
+
+    stim: process
+        file stim_f : text open read_mode is VECTOR_DIR & "/stimulus.txt";
+        variable L : line;
+        variable c, mag, last, n_stim, n_checked : integer;
+    begin
+        aresetn <= '0'; wait for 50 ns;
+        aresetn <= '1'; wait until rising_edge(aclk);
+
+        report "=== OS-CFAR-2D golden TB: " & VECTOR_DIR & " ===";
+
+        n_stim := 0;
+        while not endfile(stim_f) loop
+            readline(stim_f, L);
+            read(L, c); read(L, mag); read(L, last);
+            s_axis_tdata  <= std_logic_vector(to_unsigned(mag, DATA_W));
+            s_axis_tvalid <= '1';
+            s_axis_tlast  <= '1' when last = 1 else '0';
+            n_stim := n_stim + 1;
+            wait until rising_edge(aclk);
+            while s_axis_tready = '0' loop wait until rising_edge(aclk); end loop;
+        end loop;
+
+        s_axis_tvalid <= '0'; s_axis_tlast <= '0';
+        wait for 200 ns;
+
+        n_checked := pass_count + fail_count;
+        write(L, string'("Cells checked: ")); write(L, n_checked);
+        write(L, string'(" from cell ")); write(L, CELL_OFFSET);
+        write(L, string'(", not emitted: ")); write(L, n_stim - CELL_OFFSET - n_checked);
+        writeline(output, L);
+
+        for k in 0 to MAX_CASES-1 loop
+            if case_fails(k) > 0 then
+                write(L, string'("  case ")); write(L, k);
+                write(L, string'(": ")); write(L, case_fails(k));
+                write(L, string'(" mismatches")); writeline(output, L);
+            end if;
+        end loop;
+
+        write(L, string'("=== RESULTS: "));
+        write(L, pass_count); write(L, string'(" pass, "));
+        write(L, fail_count); write(L, string'(" fail ==="));
+        writeline(output, L);
+
+        if fail_count = 0 and n_checked > 0 then report "ALL TESTS PASSED" severity note;
+        else                                      report "FAILURES DETECTED" severity error; end if;
+
+        sim_done <= true; wait;
+    end process;
+
+    -- Bit-exact compare (output, low threshold bits) against expected.txt
+    check: process(aclk)
+        file exp_f : text open read_mode is VECTOR_DIR & "/expected.txt";
+        variable L : line;
+        variable skipped : boolean := false;
+        variable prev_thr : integer := 0;
+        variable c, r, d, exp_out, exp_thr, got_out : integer;
+    begin
+        if rising_edge(aclk) then
+            if m_axis_tvalid = '1' and m_axis_tready = '1' then
+                if not skipped then
+                    for k in 1 to CELL_OFFSET loop
+                        if not endfile(exp_f) then readline(exp_f, L); end if;
+                    end loop;
+                    skipped := true;
+                end if;
+                if not endfile(exp_f) then
+                    readline(exp_f, L);
+                    read(L, c); read(L, r); read(L, d); read(L, exp_out); read(L, exp_thr);
+                    got_out := to_integer(unsigned(m_axis_tdata));
+
+                    if got_out = exp_out and prev_thr = exp_thr then
+                        pass_count <= pass_count + 1;
+                    else
+                        fail_count <= fail_count + 1;
+                        if c < MAX_CASES then case_fails(c) <= case_fails(c) + 1; end if;
+                    end if;
+                    -- Print the first few cells per case; the summary counts the rest
+                    if (got_out /= exp_out or prev_thr /= exp_thr) and
+                       (c >= MAX_CASES or case_fails(c) < 4) then
+                        write(L, string'("FAIL case ")); write(L, c);
+                        write(L, string'(" cell (")); write(L, r);
+                        write(L, string'(",")); write(L, d);
+                        write(L, string'("): expected out=")); write(L, exp_out);
+                        write(L, string'(" thr=")); write(L, exp_thr);
+                        write(L, string'(" got out=")); write(L, got_out);
+                        write(L, string'(" thr=")); write(L, prev_thr);
+                        writeline(output, L);
+                    end if;
+                end if;
+            end if;
+            prev_thr := to_integer(unsigned(dbg_threshold));
+        end if;
+    end process;
+
+end Behavioral;
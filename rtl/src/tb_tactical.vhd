@@ -333,11 +333,18 @@ begin
         file f : text open write_mode is "tac_detections.txt";
         variable L : line;
     begin
-        if rising_edge(aclk) and det_tvalid = '1' and unsigned(det_tdata) > 0 then
-            write(L, to_integer(unsigned(det_range_bin))); write(L, string'(" "));
-            write(L, to_integer(unsigned(det_doppler_bin))); write(L, string'(" "));
-            write(L, to_integer(unsigned(det_tdata)));
-            writeline(f, L);
+        if rising_edge(aclk) then
+            if det_tvalid = '1' and unsigned(det_tdata) > 0 then
+                write(L, to_integer(unsigned(det_range_bin))); write(L, string'(" "));
+                write(L, to_integer(unsigned(det_doppler_bin))); write(L, string'(" "));
+                write(L, to_integer(unsigned(det_tdata)));
+                writeline(f, L);
+            end if;
+            -- Scan boundary marker (readers skip non 3-field lines)
+            if scan_done = '1' then
+                write(L, string'("SCAN_END"));
+                writeline(f, L);
+            end if;
         end if;
     end process;
 
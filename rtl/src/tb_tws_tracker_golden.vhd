@@ -0,0 +1,220 @@
+library IEEE;
+use IEEE.STD_LOGIC_1164.ALL;
+use IEEE.NUMERIC_STD.ALL;
+use std.textio.all;
+
+-- Golden-vector variant of tb_tws_tracker: replays the detection scans of
+-- stimulus.txt and checks every track report and scan_complete against
+-- expected.txt from model/ADR_golden.py. Generate with
+-- "python ADR_golden.py <dir> --tb=tb_tws_tracker" and point VECTOR_DIR at
+-- <dir>/tb_tws_tracker/<key>. Each case starts with a RESET row.
+--   stimulus.txt: case scan kind range doppler mag
+--                 (kind 0 = detection beat, 1 = det_last, 2 = aresetn pulse)
+--   expected.txt: case scan kind id range doppler vel_r vel_d quality status active
+--                 (kind 0 = trk_valid beat, 1 = scan_complete with active_tracks)
+
+entity tb_tws_tracker_golden is
+    Generic (
+        VECTOR_DIR : string := "golden/tb_tws_tracker/44b045f169f7"
+    );
+end tb_tws_tracker_golden;
+
+architecture Behavioral of tb_tws_tracker_golden is
+
+    constant CLK_PERIOD   : time := 10 ns;
+    constant MAX_TRACKS   : integer := 16;
+    constant N_RANGE      : integer := 1024;
+    constant N_DOPPLER    : integer := 128;
+    constant INIT_HITS    : integer := 2;
+    constant COAST_MAX    : integer := 3;
+    constant ASSOC_GATE_R : integer := 10;
+    constant ASSOC_GATE_D : integer := 5;
+    constant MAX_CASES    : integer := 32;
+
+    constant DET_BEAT      : integer := 0;
+    constant DET_LAST      : integer := 1;
+    constant RESET_PULSE   : integer := 2;
+    constant TRK_BEAT      : integer := 0;
+    constant SCAN_COMPLETE_ROW : integer := 1;
+
+    signal aclk          : std_logic := '0';
+    signal aresetn       : std_logic := '0';
+    signal det_valid     : std_logic := '0';
+    signal det_range     : std_logic_vector(9 downto 0) := (others => '0');
+    signal det_doppler   : std_logic_vector(6 downto 0) := (others => '0');
+    signal det_magnitude : std_logic_vector(16 downto 0) := (others => '0');
+    signal det_last      : std_logic := '0';
+
+    signal trk_valid     : std_logic;
+    signal trk_id        : std_logic_vector(5 downto 0);
+    signal trk_range     : std_logic_vector(11 downto 0);
+    signal trk_doppler   : std_logic_vector(8 downto 0);
+    signal trk_vel_r     : std_logic_vector(9 downto 0);
+    signal trk_vel_d     : std_logic_vector(7 downto 0);
+    signal trk_quality   : std_logic_vector(3 downto 0);
+    signal trk_status    : std_logic_vector(1 downto 0);
+    signal active_tracks : std_logic_vector(5 downto 0);
+    signal scan_complete : std_logic;
+
+    signal sim_done   : boolean := false;
+    signal pass_count : integer := 0;
+    signal fail_count : integer := 0;
+
+    type case_count_t is array (0 to MAX_CASES-1) of integer;
+    signal case_fails : case_count_t := (others => 0);
+
+begin
+
+    uut: entity work.tws_tracker
+    generic map (
+        MAX_TRACKS => MAX_TRACKS, N_RANGE => N_RANGE, N_DOPPLER => N_DOPPLER,
+        INIT_HITS => INIT_HITS, COAST_MAX => COAST_MAX,
+        ASSOC_GATE_R => ASSOC_GATE_R, ASSOC_GATE_D => ASSOC_GATE_D,
+        ALPHA_GAIN => 128, BETA_GAIN => 64
+    )
+    port map (
+        aclk => aclk, aresetn => aresetn,
+        det_valid => det_valid, det_range => det_range,
+        det_doppler => det_doppler, det_magnitude => det_magnitude,
+        det_last => det_last,
+        trk_valid => trk_valid, trk_id => trk_id, trk_range => trk_range,
+        trk_doppler => trk_doppler, trk_vel_r => trk_vel_r, trk_vel_d => trk_vel_d,
+        trk_quality => trk_quality, trk_status => trk_status,
+        active_tracks => active_tracks, scan_complete => scan_complete
+    );
+
+    aclk <= not aclk after CLK_PERIOD/2 when not sim_done else '0';
+
+    stim: process
+        file stim_f : text open read_mode is VECTOR_DIR & "/stimulus.txt";
+        file exp_f  : text open read_mode is VECTOR_DIR & "/expected.txt";
+        variable L : line;
+        variable c, scan, kind, r, d, mag, n_scans, n_exp : integer;
+    begin
+        report "=== TWS Tracker golden TB: " & VECTOR_DIR & " ===";
+
+        n_scans := 0;
+        while not endfile(stim_f) loop
+            readline(stim_f, L);
+            read(L, c); read(L, scan); read(L, kind); read(L, r); read(L, d); read(L, mag);
+            if kind = RESET_PULSE then
+                aresetn <= '0'; wait for 50 ns;
+                aresetn <= '1'; wait until rising_edge(aclk);
+            elsif kind = DET_BEAT then
+                det_range     <= std_logic_vector(to_unsigned(r, 10));
+                det_doppler   <= std_logic_vector(to_unsigned(d, 7));
+                det_magnitude <= std_logic_vector(to_unsigned(mag, 17));
+                det_valid     <= '1';
+                wait until rising_edge(aclk);
+                det_valid <= '0';
+            else
+                det_last <= '1'; det_valid <= '0';
+                wait until rising_edge(aclk);
+                det_last <= '0';
+                wait until scan_complete = '1';
+                wait until rising_edge(aclk);
+                n_scans := n_scans + 1;
+            end if;
+        end loop;
+
+        wait for 100 ns;
+
+        n_exp := 0;
+        while not endfile(exp_f) loop readline(exp_f, L); n_exp := n_exp + 1; end loop;
+        if pass_count + fail_count /= n_exp then
+            report "FAIL: " & integer'image(pass_count + fail_count) & " of " &
+                   integer'image(n_exp) & " expected rows received" severity error;
+        end if;
+
+        for k in 0 to MAX_CASES-1 loop
+            if case_fails(k) > 0 then
+                write(L, string'("  case ")); write(L, k);
+                write(L, string'(": ")); write(L, case_fails(k));
+                write(L, string'(" mismatches")); writeline(output, L);
+            end if;
+        end loop;
+
+        write(L, string'("=== RESULTS: "));
+        write(L, n_scans); write(L, string'(" scans, "));
+        write(L, pass_count); write(L, string'(" pass, "));
+        write(L, fail_count); write(L, string'(" fail ==="));
+        writeline(output, L);
+
+        if fail_count = 0 and pass_count = n_exp then report "ALL TESTS PASSED" severity note;
+        else                                           report "FAILURES DETECTED" severity error; end if;
+
+        sim_done <= true; wait;
+    end process;
+
+    -- Track reports, then scan_complete, against the next expected.txt rows
+    check: process(aclk)
+        file exp_f : text open read_mode is VECTOR_DIR & "/expected.txt";
+        variable L : line;
+        variable c, scan, kind, id, r, d, vr, vd, qual, status, active : integer;
+        variable ok : boolean;
+        variable passes, fails : integer;
+    begin
+        if rising_edge(aclk) then
+            passes := 0; fails := 0;
+            if aresetn = '1' and trk_valid = '1' and not endfile(exp_f) then
+                readline(exp_f, L);
+                read(L, c); read(L, scan); read(L, kind); read(L, id); read(L, r); read(L, d);
+                read(L, vr); read(L, vd); read(L, qual); read(L, status); read(L, active);
+                ok := kind = TRK_BEAT and
+                      to_integer(unsigned(trk_id)) = id and
+                      to_integer(signed(trk_range)) = r and
+                      to_integer(signed(trk_doppler)) = d and
+                      to_integer(signed(trk_vel_r)) = vr and
+                      to_integer(signed(trk_vel_d)) = vd and
+                      to_integer(unsigned(trk_quality)) = qual and
+                      to_integer(unsigned(trk_status)) = status;
+                if ok then passes := passes + 1;
+                else
+                    fails := fails + 1;
+                    write(L, string'("FAIL case ")); write(L, c);
+                    write(L, string'(" scan ")); write(L, scan);
+                    write(L, string'(": expected kind=")); write(L, kind);
+                    write(L, string'(" id=")); write(L, id);
+                    write(L, string'(" R=")); write(L, r);
+                    write(L, string'(" D=")); write(L, d);
+                    write(L, string'(" VR=")); write(L, vr);
+                    write(L, string'(" VD=")); write(L, vd);
+                    write(L, string'(" Q=")); write(L, qual);
+                    write(L, string'(" S=")); write(L, status);
+                    write(L, string'(" got id=")); write(L, to_integer(unsigned(trk_id)));
+                    write(L, string'(" R=")); write(L, to_integer(signed(trk_range)));
+                    write(L, string'(" D=")); write(L, to_integer(signed(trk_doppler)));
+                    write(L, string'(" VR=")); write(L, to_integer(signed(trk_vel_r)));
+                    write(L, string'(" VD=")); write(L, to_integer(signed(trk_vel_d)));
+                    write(L, string'(" Q=")); write(L, to_integer(unsigned(trk_quality)));
+                    write(L, string'(" S=")); write(L, to_integer(unsigned(trk_status)));
+                    writeline(output, L);
+                end if;
+            end if;
+
+            if aresetn = '1' and scan_complete = '1' and not endfile(exp_f) then
+                readline(exp_f, L);
+                read(L, c); read(L, scan); read(L, kind); read(L, id); read(L, r); read(L, d);
+                read(L, vr); read(L, vd); read(L, qual); read(L, status); read(L, active);
+                ok := kind = SCAN_COMPLETE_ROW and to_integer(unsigned(active_tracks)) = active;
+                if ok then passes := passes + 1;
+                else
+                    fails := fails + 1;
+                    write(L, string'("FAIL case ")); write(L, c);
+                    write(L, string'(" scan ")); write(L, scan);
+                    write(L, string'(": expected kind=")); write(L, kind);
+                    write(L, string'(" active=")); write(L, active);
+                    write(L, string'(" got scan_complete active="));
+                    write(L, to_integer(unsigned(active_tracks)));
+                    writeline(output, L);
+                end if;
+            end if;
+
+            pass_count <= pass_count + passes;
+            fail_count <= fail_count + fails;
+            -- A track beat and scan_complete in one cycle belong to the same case
+            if fails > 0 and c < MAX_CASES then case_fails(c) <= case_fails(c) + fails; end if;
+        end if;
+    end process;
+
+end Behavioral;